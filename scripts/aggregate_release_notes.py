@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from confluence_publisher import env_targets, publish_page_tree
+import instrumentation
+from jira_client import enrich_tickets
+from page_splitter import max_page_bytes, render_release_pages
+from patch_ids import get_patch_ids
+from release_cache import open_classification_cache, open_segment_store
+from generate_release_notes import (
+    CLASSIFICATION_KEY,
+    SEGMENT_KEY,
+    build_release,
+    categorize_range,
+    create_confluence_page,
+    make_segment_snapshot,
+)
+from git_log_reader import CommitRecord
+from tag_index import load_tag_index
+
+
+def load_manifest(path):
+    """Read [{'path', 'from_tag', 'to_tag', 'name'}] from a JSON manifest.
+
+    Repository paths are relative to the manifest. `name` defaults to the
+    repository's directory name and labels its changes on the page.
+    """
+    with open(path, encoding='utf-8') as manifest:
+        try:
+            entries = json.load(manifest)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid manifest {path}: {e}") from e
+    if isinstance(entries, dict):
+        entries = entries.get('repositories')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Manifest {path} must list repositories")
+
+    base = os.path.dirname(os.path.abspath(path))
+    repositories = []
+    for entry in entries:
+        missing = [key for key in ('path', 'from_tag', 'to_tag') if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Manifest entry {entry} is missing {', '.join(missing)}")
+        repo = os.path.normpath(os.path.join(base, entry['path']))
+        repositories.append({
+            'path': repo,
+            'from_tag': entry['from_tag'],
+            'to_tag': entry['to_tag'],
+            'name': entry.get('name') or os.path.basename(repo),
+        })
+    names = [repo['name'] for repo in repositories]
+    if len(set(names)) != len(names):
+        raise ValueError("Repository names in the manifest must be unique")
+    return repositories
+
+
+def categorize_repository(path, from_tag, to_tag):
+    """Categorize one repository's range; runs in a pool worker process.
+
+    Uses the repository's own caches exactly like generate_release_notes.py.
+    Returns a segment snapshot whose rows also carry each commit's patch ID,
+    so the parent can drop changes that several repositories share.
+    """
+    os.chdir(path)
+    tags = load_tag_index()
+    for tag in (from_tag, to_tag):
+        if tag not in tags:
+            raise ValueError(f"Tag '{tag}' not found in {path}")
+
+    with open_classification_cache(CLASSIFICATION_KEY) as cache, \
+            open_segment_store(SEGMENT_KEY) as segments:
+        categories, jira_tickets = categorize_range(from_tag, to_tag, cache, segments)
+    snapshot = make_segment_snapshot(categories, jira_tickets)
+    patch_ids = get_patch_ids([commit.sha for commits in categories.values() for commit in commits])
+    for rows in snapshot['categories'].values():
+        for row in rows:
+            row.append(patch_ids.get(row[0], ''))
+    return snapshot
+
+
+def merge_repositories(snapshots, label=True):
+    """Merge per-repository snapshots into one set of categories and tickets.
+
+    `snapshots` is [(name, snapshot)] in manifest order. A commit is listed
+    once even if it appears in several repositories, matched by SHA (forks
+    and mirrors) or patch ID (changes ported between repositories); the
+    first repository in the manifest keeps it. With `label`, every item
+    names its repository.
+    """
+    categories = {}
+    jira_tickets = set()
+    seen_shas = set()
+    seen_patch_ids = set()
+    for name, snapshot in snapshots:
+        for section, rows in snapshot['categories'].items():
+            items = categories.setdefault(section, [])
+            for sha, category, text, ticket, patch_id in rows:
+                if sha in seen_shas or (patch_id and patch_id in seen_patch_ids):
+                    continue
+                seen_shas.add(sha)
+                if patch_id:
+                    seen_patch_ids.add(patch_id)
+                commit = CommitRecord(sha).classify(category, f"{text} ({name})" if label else text, ticket)
+                items.append(commit)
+        jira_tickets.update(snapshot['tickets'])
+    return categories, jira_tickets
+
+
+def categorize_repositories(repositories, max_workers=None):
+    """Categorize every repository concurrently, one pool worker per repository.
+
+    Returns [(name, snapshot)] in manifest order, so wall time follows the
+    slowest repository rather than the sum. Failures are reported per
+    repository and abort the run.
+    """
+    max_workers = max_workers or int(os.getenv('AGGREGATE_WORKERS', os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(repositories))) as pool:
+        futures = [
+            pool.submit(categorize_repository, repo['path'], repo['from_tag'], repo['to_tag'])
+            for repo in repositories
+        ]
+
+    snapshots = []
+    failed = False
+    for repo, future in zip(repositories, futures):
+        error = future.exception()
+        if error:
+            # A SystemExit has already been explained by the worker's output
+            print(f"❌ {repo['name']} failed" if isinstance(error, SystemExit) else f"❌ {repo['name']}: {error}")
+            failed = True
+            continue
+        snapshot = future.result()
+        print(f"📄 {repo['name']}: {sum(snapshot['counts'].values())} commits "
+              f"from {repo['from_tag']} to {repo['to_tag']}")
+        instrumentation.gauge('commits', sum(snapshot['counts'].values()), repository=repo['name'])
+        snapshots.append((repo['name'], snapshot))
+    if failed:
+        sys.exit(1)
+    return snapshots
+
+
+def generate_aggregate(repositories, version, title):
+    """Categorize, merge, render and publish one page for many repositories."""
+    with instrumentation.stage('categorize'):
+        snapshots = categorize_repositories(repositories)
+        categories, jira_tickets = merge_repositories(snapshots, label=len(repositories) > 1)
+    for section, items in categories.items():
+        instrumentation.gauge('items', len(items), category=section)
+    instrumentation.gauge('tickets', len(jira_tickets))
+
+    if not any(categories.values()):
+        print("❌ No changes found in any repository")
+        sys.exit(1)
+
+    try:
+        with instrumentation.stage('enrich'):
+            issues = enrich_tickets(jira_tickets)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    with instrumentation.stage('render'):
+        release = build_release(categories, jira_tickets, version, issues)
+        content, children = render_release_pages(release, title, 'storage', max_page_bytes())
+    instrumentation.gauge('content_bytes', len(content.encode('utf-8')))
+
+    with instrumentation.stage('publish'):
+        if children or os.getenv('CONFLUENCE_TARGETS'):
+            results = publish_page_tree(env_targets(title, content), children, representation='storage')
+            if any(result.error for result in results):
+                sys.exit(1)
+        elif not create_confluence_page(content, title):
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate one combined release notes page for several repositories.'
+    )
+    parser.add_argument('manifest',
+                        help='JSON list of {"path", "from_tag", "to_tag", "name"} repository ranges')
+    parser.add_argument('--version', required=True, help='Product release version shown on the page')
+    parser.add_argument('--title', help="Confluence page title (default: '<version> Release Notes')")
+    args = parser.parse_args()
+
+    try:
+        repositories = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"🔍 Generating release notes for {len(repositories)} repositories")
+    instrumentation.configure_logging()
+    try:
+        generate_aggregate(repositories, args.version, args.title or f"{args.version} Release Notes")
+    finally:
+        instrumentation.gauge('repositories', len(repositories))
+        instrumentation.write_report()
+
+
+if __name__ == "__main__":
+    main()
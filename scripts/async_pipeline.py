@@ -0,0 +1,280 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+from confluence_client import get_client
+from confluence_publisher import env_targets
+from git_log_reader import CHUNK_SIZE, LOG_FORMAT, iter_git_log, parse_commit_record
+import instrumentation
+from jira_client import JIRA_BATCH_SIZE, get_jira_client, lookup_issues
+from release_cache import open_classification_cache, open_jira_cache, open_segment_store
+from release_stats import ReleaseStats
+from tag_index import load_tag_index
+from generate_release_notes import (
+    CACHE_BATCH_SIZE,
+    CLASSIFICATION_KEY,
+    SEGMENT_KEY,
+    add_categorized,
+    categorize_commits,
+    empty_categories,
+    iter_classified,
+    make_segment_snapshot,
+    merge_segment_snapshots,
+    plan_segments,
+    publish_release,
+)
+
+
+async def aiter_git_log(revision_range, extra_args=(), cwd=None):
+    """Async version of git_log_reader.iter_git_log, reading `git log -z` from an asyncio subprocess.
+
+    Commits are yielded while git is still walking, so the event loop can
+    run other work (Jira lookups, Confluence requests) in between.
+    """
+    cmd = ['git', 'log', '-z', f'--pretty=format:{LOG_FORMAT}', *extra_args, revision_range]
+    # stderr goes to a file, as in iter_git_log, so warnings cannot fill a pipe nobody reads yet
+    errors = tempfile.TemporaryFile()
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=errors, cwd=cwd
+    )
+    bytes_read = commits = 0
+    pending = b''
+    try:
+        while True:
+            chunk = await process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            pending += chunk
+            *records, pending = pending.split(b'\0')
+            for record in records:
+                if record:
+                    commits += 1
+                    yield parse_commit_record(record)
+        if pending:
+            commits += 1
+            yield parse_commit_record(pending)
+        if await process.wait() != 0:
+            errors.seek(0)
+            stderr = errors.read().decode('utf-8', errors='replace')
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        instrumentation.count('git_bytes_read', bytes_read)
+        instrumentation.count('git_commits_read', commits)
+        instrumentation.count('git_processes')
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        errors.close()
+
+
+def _check_tags(start_tag, end_tag):
+    tags = load_tag_index()
+    for label, tag in (('Start', start_tag), ('End', end_tag)):
+        if tag not in tags:
+            print(f"❌ {label} tag '{tag}' not found in repository")
+            print("Available tags:", ', '.join(tags.names()))
+            sys.exit(1)
+
+
+def _prefetch_pages(title):
+    """Start looking up the target pages by title, or return [] when publishing is not configured."""
+    if not title:
+        return []
+    try:
+        client = get_client()
+        targets = env_targets(title, None)
+    except ValueError:
+        # Reported when the page is published
+        return []
+    return [
+        asyncio.create_task(asyncio.to_thread(client.prefetch_page, target.space_key, title))
+        for target in targets if target.space_key
+    ]
+
+
+class TicketLookups:
+    """Start Jira lookups in threads as ticket keys turn up.
+
+    Each time JIRA_BATCH_SIZE new keys have been added, their lookup
+    starts, so Jira answers arrive while history is still being walked.
+    Without a Jira client, added keys are ignored.
+    """
+
+    def __init__(self, client=None, cache=None):
+        self.client = client
+        self.cache = cache
+        self.calls_before = client.calls if client else 0
+        self._seen = set()
+        self._pending = []
+        self._tasks = []
+
+    def add(self, keys):
+        if not self.client:
+            return
+        for key in keys:
+            if key not in self._seen:
+                self._seen.add(key)
+                self._pending.append(key)
+        if len(self._pending) >= JIRA_BATCH_SIZE:
+            self._start()
+
+    def _start(self):
+        keys, self._pending = sorted(self._pending), []
+        self._tasks.append(asyncio.create_task(asyncio.to_thread(lookup_issues, keys, self.client, self.cache)))
+
+    async def results(self, ticket_count):
+        """Wait for every lookup and return {key: JiraIssue}."""
+        if self._pending:
+            self._start()
+        if not self._tasks:
+            return {}
+        issues = {}
+        cached = 0
+        with instrumentation.stage('enrich'):
+            for found, hits in await asyncio.gather(*self._tasks):
+                issues.update(found)
+                cached += hits
+        print(f"🎫 Enriched {len(issues)} of {ticket_count} Jira tickets "
+              f"({cached} cached, {self.client.calls - self.calls_before} HTTP calls)")
+        return issues
+
+
+async def walk_and_classify(revision_range, cache, lookups, stats=None):
+    """Walk and classify one revision range, adding its tickets to `lookups` as they appear.
+
+    Commits are classified in batches on a worker thread, together with
+    their classification cache reads and writes, while the event loop goes
+    on reading git. With a ReleaseStats, the range is read with
+    `--numstat` by iter_git_log on a worker thread instead, and its
+    tickets are added once it is done. Returns (categories, jira_tickets).
+    """
+    if stats is not None:
+        categories, jira_tickets = await asyncio.to_thread(
+            categorize_commits, iter_git_log(revision_range, with_numstat=True), cache, stats
+        )
+        lookups.add(sorted(jira_tickets))
+        return categories, jira_tickets
+
+    categories = empty_categories()
+    jira_tickets = set()
+    batch = []
+    classifying = None
+
+    async def collect(classifying):
+        # Tickets are added on the event loop thread, which starts their lookups
+        for commit in await classifying:
+            if commit.ticket:
+                lookups.add((commit.ticket,))
+            add_categorized(categories, jira_tickets, commit)
+
+    def classify(batch):
+        return list(iter_classified(batch, cache))
+
+    async for commit in aiter_git_log(revision_range):
+        batch.append(commit)
+        if len(batch) == CACHE_BATCH_SIZE:
+            # One batch at a time, so commits stay in git log order
+            if classifying:
+                await collect(classifying)
+            classifying = asyncio.create_task(asyncio.to_thread(classify, batch))
+            batch = []
+    if classifying:
+        await collect(classifying)
+    if batch:
+        await collect(asyncio.to_thread(classify, batch))
+    return categories, jira_tickets
+
+
+async def categorize_and_enrich(start_tag, end_tag, cache, jira_client=None, jira_cache=None,
+                                segments=None, stats=None):
+    """Walk, classify and enrich one range with the stages overlapping.
+
+    As in categorize_range, the range is composed from stored tag segments
+    when possible. Tickets of stored segments are looked up straight away,
+    and only missing segments are walked, with their tickets looked up
+    while the walk goes on (see TicketLookups). Returns (categories,
+    jira_tickets, {key: JiraIssue}).
+    """
+    lookups = TicketLookups(jira_client, jira_cache)
+    with instrumentation.stage('categorize'):
+        plan = await asyncio.to_thread(plan_segments, start_tag, end_tag, segments, stats is not None)
+        if plan is None:
+            categories, jira_tickets = await walk_and_classify(
+                f'{start_tag}..{end_tag}', cache, lookups, stats
+            )
+        else:
+            for _, _, snapshot in plan:
+                if snapshot is not None:
+                    lookups.add(snapshot['tickets'])
+            snapshots = []
+            for from_sha, to_sha, snapshot in plan:
+                if snapshot is None:
+                    segment_stats = ReleaseStats() if stats is not None else None
+                    segment_categories, segment_tickets = await walk_and_classify(
+                        f'{from_sha}..{to_sha}', cache, lookups, segment_stats
+                    )
+                    snapshot = make_segment_snapshot(segment_categories, segment_tickets, segment_stats)
+                    segments.put(from_sha, to_sha, snapshot)
+                snapshots.append(snapshot)
+            # git log lists newest commits first, so merge the newest segment first
+            categories, jira_tickets = merge_segment_snapshots(reversed(snapshots), stats)
+
+    issues = await lookups.results(len(jira_tickets))
+    return categories, jira_tickets, issues
+
+
+async def generate_and_publish_async(start_tag, end_tag):
+    """Async counterpart of generate_and_publish for one range.
+
+    Target pages are looked up in Confluence while the range is walked and
+    enriched, then the page is rendered and published once.
+    """
+    _check_tags(start_tag, end_tag)
+    if os.getenv('RELEASE_NOTES_INCREMENTAL'):
+        print("⚠️ RELEASE_NOTES_INCREMENTAL is not used in async mode")
+    stats = ReleaseStats() if os.getenv('RELEASE_NOTES_STATS') else None
+    prefetches = _prefetch_pages(os.getenv('PAGE_TITLE'))
+
+    try:
+        jira_client = get_jira_client()
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    jira_cache = open_jira_cache() if jira_client else None
+    try:
+        with open_classification_cache(CLASSIFICATION_KEY) as cache, \
+                open_segment_store(SEGMENT_KEY) as segments:
+            categories, jira_tickets, issues = await categorize_and_enrich(
+                start_tag, end_tag, cache, jira_client, jira_cache, segments, stats
+            )
+            instrumentation.gauge('classification_cache_hits', cache.hits)
+            instrumentation.gauge('classification_cache_misses', cache.misses)
+    finally:
+        if jira_cache:
+            jira_cache.close()
+    for section, items in categories.items():
+        instrumentation.gauge('items', len(items), category=section)
+    instrumentation.gauge('tickets', len(jira_tickets))
+
+    # A failed prefetch only means publish_page looks the page up itself
+    await asyncio.gather(*prefetches, return_exceptions=True)
+
+    if not any(categories.values()):
+        print("❌ No changes found between tags")
+        sys.exit(1)
+
+    publish_release(categories, jira_tickets, end_tag, issues, stats)
+
+
+def run_pipeline(start_tag, end_tag):
+    """Run generate_and_publish_async to completion, reporting git failures."""
+    try:
+        asyncio.run(generate_and_publish_async(start_tag, end_tag))
+    except subprocess.CalledProcessError as e:
+        print(f"Error getting git log: {e}")
+        print(f"Error output: {e.stderr}")
+        sys.exit(1)
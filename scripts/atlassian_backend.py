@@ -0,0 +1,59 @@
+import os
+
+from atlassian import Confluence
+
+from confluence_publisher import env_targets
+
+
+def _publish(confluence, space_key, ancestor_id, title, content, representation):
+    """Create or update one page by title and return its id."""
+    existing = confluence.get_page_by_title(space_key, title)
+    # Older releases of the client return the page, newer ones the search results
+    if existing and 'results' in existing:
+        existing = existing['results'][0] if existing['results'] else None
+    if existing:
+        page = confluence.update_page(existing['id'], title, content, parent_id=ancestor_id,
+                                      representation=representation)
+    else:
+        page = confluence.create_page(space_key, title, content, parent_id=ancestor_id,
+                                      representation=representation)
+    return page['id']
+
+
+def publish_rendered_page(page, destination=None):
+    """Output backend publishing an output_backends.RenderedPage with atlassian-python-api.
+
+    For setups that standardize on the atlassian client. Uses the same
+    CONFLUENCE_* credentials and targets as the built-in client, but
+    every publish looks the page up by title: there is no page cache,
+    rate limiting or skipping of unchanged pages.
+    """
+    if page.output_format not in ('storage', 'wiki'):
+        print(f"❌ Confluence pages must be 'storage' or 'wiki', not '{page.output_format}'")
+        return False
+
+    base_url = os.getenv('CONFLUENCE_BASE_URL')
+    api_user = os.getenv('CONFLUENCE_API_USER')
+    api_token = os.getenv('CONFLUENCE_API_TOKEN')
+    missing = []
+    if not base_url: missing.append('CONFLUENCE_BASE_URL')
+    if not api_user: missing.append('CONFLUENCE_API_USER')
+    if not api_token: missing.append('CONFLUENCE_API_TOKEN')
+    if missing:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+
+    confluence = Confluence(url=base_url, username=api_user, password=api_token)
+    published = True
+    for target in env_targets(page.title, page.content):
+        label = f"{target.space_key}/{target.ancestor_id}: {page.title}"
+        try:
+            parent_id = _publish(confluence, target.space_key, target.ancestor_id, page.title,
+                                 page.content, page.output_format)
+            for title, content in page.children:
+                _publish(confluence, target.space_key, parent_id, title, content, page.output_format)
+        except Exception as e:
+            print(f"❌ {label} failed: {e}")
+            published = False
+            continue
+        print(f"✅ {label} published with {len(page.children)} child pages")
+    return published
@@ -0,0 +1,276 @@
+import argparse
+import fnmatch
+import os
+import sys
+
+from confluence_publisher import env_targets, publish_to_targets
+from git_log_reader import iter_git_log
+import instrumentation
+from jira_client import enrich_tickets
+from release_cache import open_classification_cache, open_segment_store
+from tag_index import reachable_tags
+from generate_release_notes import (
+    CLASSIFICATION_KEY,
+    RELEASE_TAG_RE,
+    SEGMENT_KEY,
+    add_categorized,
+    categorize_range,
+    empty_categories,
+    is_ancestor,
+    iter_classified,
+    list_release_tags,
+    build_release,
+    make_segment_snapshot,
+    merge_segment_snapshots,
+    render_release_notes,
+)
+from templates.release_renderer import OUTPUT_EXTENSIONS, WRITERS, write_release
+
+
+class NonLinearHistory(Exception):
+    """Raised when boundary tags do not form a single ancestry chain."""
+
+
+def parse_ranges(specs):
+    """Parse 'START..END' strings into (start, end) tuples."""
+    ranges = []
+    for spec in specs:
+        start, separator, end = spec.partition('..')
+        if not separator or not start or not end:
+            raise ValueError(f"Invalid range '{spec}', expected START_TAG..END_TAG")
+        ranges.append((start, end))
+    return ranges
+
+
+def consecutive_ranges(tags, pattern):
+    """Pair every consecutive release tag whose name matches a glob pattern."""
+    names = [name for name, _ in tags if fnmatch.fnmatchcase(name, pattern)]
+    return list(zip(names, names[1:]))
+
+
+def boundary_chain(tags, ranges, reachable=None):
+    """Return the version-ordered tags that split the requested ranges.
+
+    The chain holds every range endpoint plus all release tags in between,
+    so its segments are the same adjacent-tag segments categorize_range
+    stores and reuses. Given `reachable`, the names of the tags reachable
+    from the newest end, other tags such as hotfixes on maintenance
+    branches are left out.
+    """
+    positions = {name: index for index, (name, _) in enumerate(tags)}
+    for start, end in ranges:
+        for tag in (start, end):
+            if tag not in positions:
+                raise ValueError(f"Tag '{tag}' not found in repository")
+        if positions[start] >= positions[end]:
+            raise ValueError(f"Range {start}..{end} is not in version order")
+
+    endpoints = {tag for tag_range in ranges for tag in tag_range}
+    low = min(positions[start] for start, _ in ranges)
+    high = max(positions[end] for _, end in ranges)
+    return [tag for tag in tags[low:high + 1]
+            if (tag[0] in endpoints or RELEASE_TAG_RE.match(tag[0]))
+            and (reachable is None or tag[0] in reachable)]
+
+
+def walk_segments(chain, first, last, cache=None):
+    """Categorize segments first..last of a boundary chain in one history walk.
+
+    Segment i holds the commits reachable from chain[i] but not from
+    chain[i - 1]. A single `--topo-order` walk of chain[first - 1]..chain[last]
+    labels every commit with the lowest boundary that reaches it, by
+    carrying labels from children to parents, so only the walk frontier is
+    kept in memory. Raises NonLinearHistory if a boundary is not an
+    ancestor of the next one, since segments would then overlap.
+    """
+    # Tags on the same commit share a boundary: label it with the lowest
+    # index and expect the parent chain to continue above the highest one
+    lowest, highest = {}, {}
+    for index in range(first - 1, last + 1):
+        lowest.setdefault(chain[index][1], index)
+        highest[chain[index][1]] = index
+    if not is_ancestor(chain[first - 1][1], chain[first][1]):
+        raise NonLinearHistory(f"{chain[first - 1][0]} is not an ancestor of {chain[first][0]}")
+
+    pending = {}
+    labels = {}
+    seen_boundaries = set()
+
+    def labelled_commits():
+        revision_range = f'{chain[first - 1][1]}..{chain[last][1]}'
+        for commit in iter_git_log(revision_range, ['--topo-order']):
+            inherited = pending.pop(commit.sha, None)
+            label = lowest.get(commit.sha)
+            if label is not None:
+                top = highest[commit.sha]
+                if top < last and inherited != top + 1:
+                    raise NonLinearHistory(f"{chain[top][0]} is not an ancestor of {chain[top + 1][0]}")
+                seen_boundaries.update(range(label, top + 1))
+            else:
+                label = inherited
+            if label is None:
+                raise NonLinearHistory(f"Commit {commit.short_sha} is outside the boundary chain")
+            for parent in commit.parents:
+                if pending.get(parent, label + 1) > label:
+                    pending[parent] = label
+            labels[commit.sha] = label
+            yield commit
+
+    segments = {index: (empty_categories(), set()) for index in range(first, last + 1)}
+    for commit in iter_classified(labelled_commits(), cache):
+        categories, jira_tickets = segments[labels.pop(commit.sha)]
+        add_categorized(categories, jira_tickets, commit)
+
+    missing = set(range(first, last)) - seen_boundaries
+    if missing:
+        raise NonLinearHistory(f"{chain[min(missing)][0]} is not reachable from {chain[last][0]}")
+    return {index: make_segment_snapshot(*segments[index]) for index in segments}
+
+
+def build_batch(ranges, cache=None, segments=None, tags=None):
+    """Categorize many tag ranges with one tag listing and one history walk.
+
+    Returns {(start, end): (categories, jira_tickets)}. Segments already in
+    the segment store are reused; the rest are walked together and stored.
+    Ranges with an end the newest end does not reach, such as a hotfix on
+    a maintenance branch, are categorized on their own. Falls back to
+    categorize_range per range if the other tags still do not form a
+    single ancestry chain.
+    """
+    tags = tags if tags is not None else list_release_tags()
+    newest = boundary_chain(tags, ranges)[-1][0]
+    reachable = reachable_tags(newest)
+    requested = ranges
+    results = {}
+    for tag_range in ranges:
+        if not reachable.issuperset(tag_range):
+            start, end = tag_range
+            off_chain = start if start not in reachable else end
+            print(f"⚠️ {off_chain} is not an ancestor of {newest}; walking {start}..{end} separately")
+            results[tag_range] = categorize_range(*tag_range, cache, segments)
+    ranges = [tag_range for tag_range in ranges if tag_range not in results]
+    if not ranges:
+        return {tag_range: results[tag_range] for tag_range in requested}
+    chain = boundary_chain(tags, ranges, reachable)
+
+    snapshots = {}
+    for index in range(1, len(chain)):
+        snapshot = segments.get(chain[index - 1][1], chain[index][1]) if segments else None
+        if snapshot is not None and snapshot.get('linear') is not False:
+            snapshots[index] = snapshot
+
+    missing = [index for index in range(1, len(chain)) if index not in snapshots]
+    if missing:
+        try:
+            walked = walk_segments(chain, missing[0], missing[-1], cache)
+        except NonLinearHistory as e:
+            print(f"⚠️ {e}; walking each range separately")
+            results.update((tag_range, categorize_range(*tag_range, cache, segments)) for tag_range in ranges)
+            return {tag_range: results[tag_range] for tag_range in requested}
+        for index in missing:
+            snapshots[index] = walked[index]
+            if segments:
+                segments.put(chain[index - 1][1], chain[index][1], snapshots[index])
+
+    positions = {name: index for index, (name, _) in enumerate(chain)}
+    for start, end in ranges:
+        selected = [snapshots[index] for index in range(positions[start] + 1, positions[end] + 1)]
+        # git log lists newest commits first, so merge the newest segment first
+        results[(start, end)] = merge_segment_snapshots(reversed(selected))
+    return {tag_range: results[tag_range] for tag_range in requested}
+
+
+def generate_batch(ranges, tags, title_format, output_dir=None, formats=('storage',)):
+    """Categorize, render and write or publish every range, timing each stage."""
+    try:
+        with instrumentation.stage('categorize'), \
+                open_classification_cache(CLASSIFICATION_KEY) as cache, \
+                open_segment_store(SEGMENT_KEY) as segments:
+            results = build_batch(ranges, cache, segments, tags)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    # One bulk Jira lookup covers the tickets of every range
+    try:
+        with instrumentation.stage('enrich'):
+            issues = enrich_tickets(set().union(*(tickets for _, tickets in results.values())))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    pages = []
+    for (start, end), (categories, jira_tickets) in results.items():
+        if not any(categories.values()):
+            print(f"⚠️ No changes found between {start} and {end}")
+            continue
+        title = title_format.format(version=end, start=start)
+        if output_dir:
+            # Every requested format is written in a single pass over the release
+            os.makedirs(output_dir, exist_ok=True)
+            paths = {
+                name: os.path.join(output_dir, f"{start}..{end}.{OUTPUT_EXTENSIONS[name]}")
+                for name in formats
+            }
+            streams = {name: open(path, 'w', encoding='utf-8') for name, path in paths.items()}
+            try:
+                with instrumentation.stage('render'):
+                    write_release(build_release(categories, jira_tickets, end, issues), streams)
+            finally:
+                for stream in streams.values():
+                    stream.close()
+            for path in paths.values():
+                print(f"📄 Wrote {path}")
+        else:
+            with instrumentation.stage('render'):
+                content = render_release_notes(categories, jira_tickets, end, issues=issues)
+            pages.extend(env_targets(title, content))
+
+    if pages:
+        # Publish every page to every target concurrently
+        with instrumentation.stage('publish'):
+            published = publish_to_targets(pages, representation='storage')
+        failures = sum(1 for result in published if result.error)
+        if failures:
+            print(f"❌ {failures} of {len(published)} pages failed to publish")
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate release notes for many tag ranges at once.')
+    parser.add_argument('--range', dest='ranges', action='append', default=[],
+                        help='Tag range START_TAG..END_TAG (repeatable)')
+    parser.add_argument('--pattern',
+                        help='Generate notes for every consecutive pair of tags matching this glob')
+    parser.add_argument('--title-format', default='{version} Release Notes',
+                        help='Confluence page title, {version} is replaced by the end tag')
+    parser.add_argument('--output-dir',
+                        help='Write pages to this directory instead of publishing them')
+    parser.add_argument('--format', dest='formats', action='append', choices=sorted(WRITERS),
+                        help='Output format for --output-dir (repeatable, default: storage)')
+    args = parser.parse_args()
+    formats = list(dict.fromkeys(args.formats or ['storage']))
+
+    tags = list_release_tags()
+    try:
+        ranges = parse_ranges(args.ranges)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.pattern:
+        ranges.extend(consecutive_ranges(tags, args.pattern))
+    ranges = list(dict.fromkeys(ranges))
+    if not ranges:
+        print("❌ No tag ranges given, use --range or --pattern")
+        sys.exit(1)
+
+    print(f"🔍 Generating release notes for {len(ranges)} ranges")
+    instrumentation.configure_logging()
+    try:
+        generate_batch(ranges, tags, args.title_format, args.output_dir, formats)
+    finally:
+        instrumentation.gauge('ranges', len(ranges))
+        instrumentation.write_report()
+
+if __name__ == "__main__":
+    main()
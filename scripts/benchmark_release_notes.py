@@ -0,0 +1,216 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import instrumentation
+from synthetic_repo import PROJECTS, build_repo, parse_size
+
+DEFAULT_SIZES = '1k,10k,100k'
+RESULTS_VERSION = 1
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Benchmark stages are named '<pipeline>.<stage>'; the scripts' own stages are not
+PIPELINES = ('storage', 'wiki')
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the scripts' progress output while a stage runs."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_storage_pipeline(start_tag, end_tag):
+    """Time generate_release_notes.py: git log, categorize, enrich, render, publish."""
+    from generate_release_notes import (
+        categorize_commits,
+        create_confluence_page,
+        get_git_log,
+        render_release_notes,
+    )
+    from jira_client import enrich_tickets
+
+    with instrumentation.stage('storage.git_log'):
+        commits = list(get_git_log(start_tag, end_tag))
+    with instrumentation.stage('storage.categorize'):
+        categories, jira_tickets = categorize_commits(commits)
+    del commits
+    with instrumentation.stage('storage.enrich'), _quiet():
+        issues = enrich_tickets(jira_tickets)
+    with instrumentation.stage('storage.render'):
+        content = render_release_notes(categories, jira_tickets, end_tag, issues=issues)
+    with instrumentation.stage('storage.publish'), _quiet():
+        published = create_confluence_page(content, f"{end_tag} Release Notes (storage)")
+    if not published:
+        raise RuntimeError('Publishing the storage format page failed')
+    return {
+        'storage.items': sum(len(items) for items in categories.values()),
+        'storage.tickets': len(jira_tickets),
+        'storage.content_bytes': len(content.encode('utf-8')),
+    }
+
+
+def bench_wiki_pipeline(start_tag, end_tag):
+    """Time release_notes_generator.py: git commits, categorize, render, publish."""
+    import release_notes_generator as generator
+    from confluence_publisher import publish_to_confluence
+    from tag_index import parse_version
+
+    with instrumentation.stage('wiki.git_commits'), _quiet():
+        commits = generator.get_git_commits(start_tag, end_tag)
+    with instrumentation.stage('wiki.categorize'):
+        changes = generator.categorize_changes(commits)
+    with instrumentation.stage('wiki.render'):
+        jira_tickets, ticket_details = generator.extract_jira_tickets(commit.subject for commit in commits)
+        release_type = generator.determine_release_type(parse_version(start_tag), parse_version(end_tag))
+        release = generator.build_release(end_tag, release_type, changes, jira_tickets, ticket_details)
+        generator.render_release(release, ('wiki',))
+    del commits, changes, release
+    with instrumentation.stage('wiki.generate'), _quiet():
+        content = generator.generate_release_notes(start_tag, end_tag)
+    with instrumentation.stage('wiki.publish'), _quiet():
+        publish_to_confluence(f"{end_tag} Release Notes (wiki)", content)
+    return {'wiki.content_bytes': len(content.encode('utf-8'))}
+
+
+def run_worker(repo, start_tag, end_tag, output):
+    """Benchmark one repository in this process and write the results as JSON."""
+    from fake_confluence import FakeConfluence
+    from fake_jira import FakeJira
+
+    os.chdir(repo)
+    with FakeConfluence() as confluence, FakeJira() as jira:
+        for project in PROJECTS:
+            for number in range(1, 5001):
+                jira.add_issue(f"{project}-{number}", f"{project} issue {number}", 'Done', ['1.0'])
+        os.environ.update({
+            'CONFLUENCE_BASE_URL': confluence.base_url,
+            'CONFLUENCE_API_USER': 'benchmark',
+            'CONFLUENCE_API_TOKEN': 'benchmark',
+            'CONFLUENCE_RATE_LIMIT': '0',
+            'SPACE_KEY': 'BENCH',
+            'ANCESTOR_ID': '1',
+            'JIRA_BASE_URL': jira.base_url,
+        })
+        counts = bench_storage_pipeline(start_tag, end_tag)
+        counts.update(bench_wiki_pipeline(start_tag, end_tag))
+        counts['confluence_calls'] = len(confluence.calls)
+        counts['jira_calls'] = len(jira.calls)
+
+    metrics = instrumentation.metrics.report()
+    stages = {
+        name: stage['seconds'] for name, stage in metrics['stages'].items()
+        if name.partition('.')[0] in PIPELINES
+    }
+    with open(output, 'w', encoding='utf-8') as results:
+        json.dump({
+            'stages': stages,
+            'counts': counts,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'metrics': metrics,
+        }, results)
+
+
+def _git_output(*args, cwd=None):
+    result = subprocess.run(['git', *args], capture_output=True, text=True, cwd=cwd)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def run_size(size, work_dir, use_cache, run):
+    """Build (or reuse) the repository for one size and benchmark it in a fresh process."""
+    repo = os.path.join(work_dir, f"repo-{size}")
+    start = time.perf_counter()
+    tags = build_repo(repo, size)
+    build_seconds = time.perf_counter() - start
+    start_tag, end_tag = tags[0], tags[-1]
+
+    env = dict(os.environ)
+    for name in ('RELEASE_NOTES_CACHE', 'RELEASE_NOTES_NO_CACHE', 'CONFLUENCE_TARGETS'):
+        env.pop(name, None)
+    if use_cache:
+        env['RELEASE_NOTES_CACHE'] = os.path.join(work_dir, f"cache-{size}.sqlite3")
+    else:
+        env['RELEASE_NOTES_NO_CACHE'] = '1'
+
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as output:
+        output_path = output.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', repo, start_tag, end_tag, output_path],
+            check=True, env=env
+        )
+        with open(output_path, encoding='utf-8') as results:
+            result = json.load(results)
+    finally:
+        os.unlink(output_path)
+
+    result.update({
+        'commits': size,
+        'repo_commits': int(_git_output('rev-list', '--count', end_tag, cwd=repo) or 0),
+        'tags': len(tags),
+        'range': f"{start_tag}..{end_tag}",
+        'run': run,
+        'cache': use_cache,
+        'repo_build_seconds': round(build_seconds, 3),
+    })
+    return result
+
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == '--worker':
+        run_worker(*sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description='Benchmark release notes generation end to end.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='Comma-separated commit counts, e.g. 1k,10k,100k,1m')
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'release-notes-bench'),
+                        help='Where synthetic repositories are built and kept between runs')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per size')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep the on-disk caches between runs, so runs after the first are warm')
+    parser.add_argument('--output', default='benchmark-results.json',
+                        help="JSON results file, or '-' for stdout")
+    args = parser.parse_args()
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = []
+    for size in [parse_size(size) for size in args.sizes.split(',') if size.strip()]:
+        for run in range(1, args.repeat + 1):
+            print(f"⏱️ {size} commits, run {run}/{args.repeat}", file=sys.stderr)
+            try:
+                result = run_size(size, args.work_dir, args.cache, run)
+            except (ValueError, subprocess.CalledProcessError) as e:
+                print(f"❌ Benchmark for {size} commits failed: {e}", file=sys.stderr)
+                sys.exit(1)
+            results.append(result)
+            stages = ', '.join(f"{name} {seconds:.3f}s" for name, seconds in result['stages'].items())
+            print(f"📊 {stages}", file=sys.stderr)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'git': _git_output('--version'),
+        'tool_commit': _git_output('rev-parse', 'HEAD', cwd=SCRIPTS_DIR),
+        'results': results,
+    }
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import hashlib
+import re
+
+
+def _build_trie(words):
+    """Build a nested dict trie from words; '' marks the end of a word."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie
+
+
+def _trie_pattern(node):
+    """Render a trie as a prefix-factored regex that prefers the longest word."""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if '' in node:
+        branches.append('')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+class CommitClassifier:
+    """Classify commit messages against ordered keyword rules in a single scan.
+
+    `rules` is an ordered sequence of (category, keywords) pairs; when a
+    message contains keywords of several rules the earliest rule wins, as
+    with a chain of `if any(keyword in message ...)` checks. Keywords match
+    case-insensitively anywhere in the message. `ticket_pattern` is a regex
+    for ticket references; its first group, if any, is the ticket key.
+
+    All keywords and the ticket pattern are compiled once into one
+    prefix-factored alternation, so classifying a message costs one pass
+    over its text no matter how many rules are configured.
+    """
+
+    def __init__(self, rules, ticket_pattern):
+        self.rules = tuple((category, tuple(keywords)) for category, keywords in rules)
+        self.ticket_pattern = ticket_pattern
+        self.rules_hash = hashlib.sha1(
+            repr((self.rules, ticket_pattern)).encode('utf-8')
+        ).hexdigest()
+
+        # Map each keyword to the earliest rule that lists it, and drop
+        # keywords that can never win because a prefix of them belongs to
+        # the same or an earlier rule.
+        self._keyword_rules = {}
+        for index, (_, keywords) in enumerate(self.rules):
+            for keyword in keywords:
+                self._keyword_rules.setdefault(keyword.lower(), index)
+        keywords = [
+            keyword for keyword, index in self._keyword_rules.items()
+            if not any(keyword != other and keyword.startswith(other) and other_index <= index
+                       for other, other_index in self._keyword_rules.items())
+        ]
+
+        self._ticket_re = re.compile(ticket_pattern)
+        self._scanner = re.compile(
+            '(?=(?P<keyword>(?i:' + _trie_pattern(_build_trie(keywords)) + '))'
+            '|(?:' + ticket_pattern + '))'
+        )
+
+    def _ticket_at(self, message, position):
+        match = self._ticket_re.match(message, position)
+        if not match:
+            return None
+        return match.group(1) if match.re.groups else match.group(0)
+
+    def classify(self, message):
+        """Return (category, ticket) for a message.
+
+        `category` is the winning rule's category or None when no keyword
+        matches; `ticket` is the first ticket key in the message or None.
+        """
+        best = None
+        ticket = None
+        for match in self._scanner.finditer(message):
+            keyword = match.group('keyword')
+            if keyword is not None:
+                index = self._keyword_rules.get(keyword.lower())
+                if index is not None and (best is None or index < best):
+                    best = index
+            if ticket is None:
+                ticket = self._ticket_at(message, match.start())
+            if best == 0 and ticket is not None:
+                break
+
+        category = self.rules[best][0] if best is not None else None
+        return category, ticket
+
+    def iter_tickets(self, message):
+        """Yield (ticket, match) for every ticket reference in a message."""
+        for match in self._ticket_re.finditer(message):
+            yield (match.group(1) if match.re.groups else match.group(0)), match
@@ -0,0 +1,201 @@
+import argparse
+import logging
+import os
+import subprocess
+import sys
+
+from component_router import ComponentRouter, load_components
+from confluence_publisher import env_targets, publish_to_targets
+from git_log_reader import iter_git_log
+import instrumentation
+from jira_client import enrich_tickets
+from patch_ids import dedupe_commits
+from release_cache import open_classification_cache
+from release_notes_generator import (
+    CHANGE_CLASSIFIER,
+    CHANGE_SECTIONS,
+    build_release,
+    categorize_changes,
+    determine_release_type,
+    extract_jira_tickets,
+    single_tag_range,
+)
+from tag_index import parse_version
+from templates.release_renderer import OUTPUT_EXTENSIONS, WRITERS, render_release, write_release
+
+logger = logging.getLogger(__name__)
+
+
+def route_commits(from_tag, to_tag, router):
+    """Walk the range once and group commits by the components they touch.
+
+    Like get_git_commits, cherry-picks of the same change are dropped by
+    patch ID. A commit touching several components is shared between
+    them, not copied. Merges are routed by the paths they change against
+    their first parent. Without `from_tag`, only the tagged commit is
+    walked, or for a merge the merged branch, as in get_git_commits.
+    Returns ({component: [CommitRecord]}, commits matching no component).
+    """
+    if from_tag:
+        revision_range, extra_args = f'{from_tag}..{to_tag}', ()
+    else:
+        found = single_tag_range(to_tag)
+        if found is None:
+            raise ValueError(f"Git revision not found: {to_tag}")
+        revision_range, extra_args = found
+    owned = []
+    unrouted = 0
+    for commit, paths in iter_git_log(revision_range, extra_args, with_files=True):
+        if not commit.subject:
+            continue
+        owners = router.route(paths)
+        if not owners:
+            unrouted += 1
+            continue
+        owned.append((commit, owners))
+
+    unique = {id(commit) for commit in dedupe_commits(commit for commit, _ in owned)}
+    routed = {name: [] for name in router.components}
+    for commit, owners in owned:
+        if id(commit) in unique:
+            for name in owners:
+                routed[name].append(commit)
+    return routed, unrouted
+
+
+def group_changes(commits):
+    """Group already classified commits into the release note sections."""
+    changes = {key: [] for key, _, _ in CHANGE_SECTIONS}
+    for commit in commits:
+        if commit.category:
+            changes[commit.category].append(commit)
+    return changes
+
+
+def build_component_releases(from_tag, to_tag, router):
+    """Return {component: Release} for every component with changes in the range.
+
+    History is walked and classified once, and tickets are enriched in one
+    bulk lookup, however many components there are.
+    """
+    with instrumentation.stage('git_log'):
+        routed, unrouted = route_commits(from_tag, to_tag, router)
+    if unrouted:
+        logger.info(f"{unrouted} commits touched no configured component")
+
+    # Classify every routed commit once, in place, then group per component
+    with instrumentation.stage('categorize'), \
+            open_classification_cache(CHANGE_CLASSIFIER.rules_hash) as cache:
+        unique = list({id(commit): commit for commits in routed.values() for commit in commits}.values())
+        categorize_changes(unique, cache)
+        changes = {name: group_changes(commits) for name, commits in routed.items()}
+    instrumentation.gauge('commits', len(unique))
+
+    with instrumentation.stage('extract_tickets'):
+        tickets = {
+            name: extract_jira_tickets(commit.subject for commit in commits)
+            for name, commits in routed.items()
+        }
+    with instrumentation.stage('enrich'):
+        issues = enrich_tickets(set().union(*(keys for keys, _ in tickets.values())))
+
+    release_type = "Minor"
+    if from_tag:
+        release_type = determine_release_type(parse_version(from_tag), parse_version(to_tag))
+
+    releases = {}
+    for name in routed:
+        if not any(changes[name].values()):
+            print(f"⚠️ No changes found for {name}")
+            continue
+        jira_tickets, ticket_details = tickets[name]
+        releases[name] = build_release(to_tag, release_type, changes[name], jira_tickets, ticket_details, issues)
+        instrumentation.gauge('items', releases[name].item_count(), component=name)
+    return releases
+
+
+def generate_components(from_tag, to_tag, router, title_format, output_dir=None, formats=('wiki',)):
+    """Render and write or publish one page per component, timing each stage."""
+    try:
+        releases = build_component_releases(from_tag, to_tag, router)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Git command failed: {e.stderr.strip()}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    pages = []
+    for name, release in releases.items():
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            paths = {
+                fmt: os.path.join(output_dir, f"{name}.{OUTPUT_EXTENSIONS[fmt]}") for fmt in formats
+            }
+            streams = {fmt: open(path, 'w', encoding='utf-8') for fmt, path in paths.items()}
+            try:
+                with instrumentation.stage('render'):
+                    write_release(release, streams)
+            finally:
+                for stream in streams.values():
+                    stream.close()
+            for path in paths.values():
+                print(f"📄 Wrote {path}")
+        else:
+            with instrumentation.stage('render'):
+                content = render_release(release, ('wiki',))['wiki']
+            pages.extend(env_targets(title_format.format(component=name, version=to_tag), content))
+
+    if pages:
+        # Every component page goes to every target concurrently
+        with instrumentation.stage('publish'):
+            published = publish_to_targets(pages)
+        failures = sum(1 for result in published if result.error)
+        if failures:
+            print(f"❌ {failures} of {len(published)} pages failed to publish")
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate one release notes page per monorepo component from a single history walk.'
+    )
+    parser.add_argument('--from-tag', help='Starting tag for range')
+    parser.add_argument('--to-tag', help='Ending tag for range', required=True)
+    parser.add_argument('--components', required=True,
+                        help='JSON file mapping component names to path prefixes')
+    parser.add_argument('--component', dest='only', action='append',
+                        help='Only generate notes for this component (repeatable)')
+    parser.add_argument('--title-format', default='{component} {version} Release Notes',
+                        help='Confluence page title, with {component} and {version} (the end tag)')
+    parser.add_argument('--output-dir',
+                        help='Write pages to this directory instead of publishing them')
+    parser.add_argument('--format', dest='formats', action='append', choices=sorted(WRITERS),
+                        help='Output format for --output-dir (repeatable, default: wiki)')
+    args = parser.parse_args()
+    formats = list(dict.fromkeys(args.formats or ['wiki']))
+
+    try:
+        components = load_components(args.components)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.only:
+        unknown = sorted(set(args.only) - set(components))
+        if unknown:
+            print(f"❌ Unknown components: {', '.join(unknown)}")
+            sys.exit(1)
+        components = {name: components[name] for name in args.only}
+
+    print(f"🔍 Generating release notes for {len(components)} components")
+    instrumentation.configure_logging()
+    try:
+        generate_components(args.from_tag, args.to_tag, ComponentRouter(components),
+                            args.title_format, args.output_dir, formats)
+    finally:
+        instrumentation.gauge('components', len(components))
+        instrumentation.write_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+
+
+def _segments(path):
+    return [part for part in path.strip().strip('/').split('/') if part and part != '.']
+
+
+class ComponentRouter:
+    """Map changed paths to the monorepo components that own them.
+
+    Each component is declared as one or more path prefixes, e.g.
+    {'billing': ['services/billing', 'libs/payments']}. Prefixes match
+    whole directory names, so 'services/bill' does not own
+    'services/billing/api.py', and nested prefixes route a path to every
+    component above it. Prefixes live in a trie keyed by path segment, so
+    routing a path costs one dict lookup per directory level however many
+    components there are.
+    """
+
+    def __init__(self, components):
+        self.components = list(components)
+        self._root = {}
+        for name, prefixes in components.items():
+            for prefix in prefixes:
+                node = self._root
+                for part in _segments(prefix):
+                    node = node.setdefault(part, {})
+                # None never clashes with a path segment
+                node.setdefault(None, set()).add(name)
+
+    def route_path(self, path):
+        """Return the set of components owning one path."""
+        node = self._root
+        owners = set(node.get(None, ()))
+        for part in path.split('/'):
+            node = node.get(part)
+            if node is None:
+                break
+            owners.update(node.get(None, ()))
+        return owners
+
+    def route(self, paths):
+        """Return the set of components owning any of the given paths."""
+        owners = set()
+        for path in paths:
+            owners.update(self.route_path(path))
+        return owners
+
+
+def load_components(path):
+    """Read {component: [path prefix, ...]} from a JSON file.
+
+    A single prefix may be given as a string instead of a list.
+    """
+    with open(path, encoding='utf-8') as config:
+        try:
+            data = json.load(config)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid components file {path}: {e}") from e
+    if not isinstance(data, dict) or not data:
+        raise ValueError(f"Components file {path} must map component names to path prefixes")
+
+    components = {}
+    for name, prefixes in data.items():
+        if isinstance(prefixes, str):
+            prefixes = [prefixes]
+        if not isinstance(prefixes, list) or not all(isinstance(prefix, str) for prefix in prefixes):
+            raise ValueError(f"Component '{name}' must list its path prefixes as strings")
+        components[name] = prefixes
+    return components
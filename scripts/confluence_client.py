@@ -0,0 +1,333 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from release_cache import open_page_cache
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+DEFAULT_RATE_LIMIT = 10
+MAX_BACKOFF = 60
+POOL_SIZE = 16
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ConfluenceError(Exception):
+    """Raised when a Confluence API call fails after all retries."""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+def content_hash(title, body, ancestor_id=None, representation='storage'):
+    """Hash everything a page publish writes, to detect unchanged pages."""
+    digest = hashlib.sha256()
+    for part in (title, str(ancestor_id or ''), representation, body):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _retry_after(response):
+    """Return the delay requested by a Retry-After header, in seconds."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second.
+
+    Up to `burst` requests may go out back to back; after that callers
+    block in acquire() until a token has been refilled. `clock` and
+    `sleep` default to time.monotonic and time.sleep.
+    """
+
+    def __init__(self, rate, burst=None, clock=None, sleep=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or time.sleep
+        self._tokens = self.capacity
+        self._updated = self._clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class ConfluenceClient:
+    """Confluence REST client with pooled connections, retries and a page cache.
+
+    One keep-alive session is shared by every call. Requests time out
+    after `timeout` seconds and are retried with exponential backoff and
+    jitter on connection errors and on 429/502/503/504 responses,
+    sleeping for the server's Retry-After instead when it sends one.
+    POSTs are only retried on 429 so a page is never created twice. An
+    optional TokenBucket caps the request rate across all threads.
+
+    publish_page keeps a local title -> (page id, version, body hash)
+    cache, so republishing a known page is a single PUT and republishing
+    an unchanged page makes no request at all. `publish_counts` tallies
+    created, updated and skipped pages.
+    """
+
+    def __init__(self, base_url, api_user, api_token, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, page_cache=None,
+                 rate_limiter=None):
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.page_cache = page_cache
+        self.publish_counts = Counter(created=0, updated=0, skipped=0)
+        self._counts_lock = threading.Lock()
+        # (space key, title) -> page or None, looked up ahead of publish_page
+        self._prefetched = {}
+        self.session = requests.Session()
+        self.session.auth = (api_user, api_token)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        })
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _sleep(self, attempt, response=None):
+        delay = _retry_after(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+        time.sleep(min(delay, MAX_BACKOFF))
+
+    def request(self, method, path, **kwargs):
+        """Send a request, retrying transient failures, and return the response."""
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault('timeout', self.timeout)
+        retry_statuses = {429} if method == 'POST' else RETRY_STATUSES
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                start = time.perf_counter()
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                instrumentation.count('http_requests', service='confluence', method=method, status='error')
+                if method == 'POST' or attempt == self.max_retries:
+                    raise ConfluenceError(f"{method} {path} failed: {e}") from e
+                self._sleep(attempt)
+                continue
+
+            instrumentation.observe('http_request_seconds', time.perf_counter() - start,
+                                    service='confluence', method=method)
+            instrumentation.count('http_requests', service='confluence', method=method,
+                                  status=str(response.status_code))
+            if response.status_code in retry_statuses and attempt < self.max_retries:
+                self._sleep(attempt, response)
+                continue
+            if response.status_code >= 400:
+                raise ConfluenceError(
+                    f"{method} {path} failed with HTTP {response.status_code}",
+                    status=response.status_code, body=response.text
+                )
+            return response
+
+    def get_page_by_title(self, space_key, title):
+        """Return the page with a title in a space, or None."""
+        response = self.request('GET', '/rest/api/content', params={
+            'spaceKey': space_key,
+            'title': title,
+            'expand': 'version',
+        })
+        results = response.json().get('results', [])
+        return results[0] if results else None
+
+    def create_page(self, space_key, title, body, ancestor_id=None, representation='storage'):
+        data = {
+            'type': 'page',
+            'title': title,
+            'space': {'key': space_key},
+            'body': {representation: {'value': body, 'representation': representation}},
+        }
+        if ancestor_id:
+            data['ancestors'] = [{'id': ancestor_id}]
+        return self.request('POST', '/rest/api/content', json=data).json()
+
+    def update_page(self, page_id, title, body, version, ancestor_id=None, representation='storage'):
+        """Replace a page body; `version` is the page's current version number."""
+        data = {
+            'id': page_id,
+            'type': 'page',
+            'title': title,
+            'version': {'number': version + 1},
+            'body': {representation: {'value': body, 'representation': representation}},
+        }
+        if ancestor_id:
+            data['ancestors'] = [{'id': ancestor_id}]
+        return self.request('PUT', f'/rest/api/content/{page_id}', json=data).json()
+
+    def prefetch_page(self, space_key, title):
+        """Look up a page by title ahead of publishing it.
+
+        Lets callers resolve the page id while the content is still being
+        generated; the next publish_page for the title uses the result
+        instead of its own lookup. Pages already in the page cache need
+        no lookup and are skipped.
+        """
+        if self.page_cache and self.page_cache.get(self.base_url, space_key, title):
+            return
+        self._prefetched[(space_key, title)] = self.get_page_by_title(space_key, title)
+
+    def publish_page(self, space_key, title, body, ancestor_id=None, representation='storage',
+                     force=False):
+        """Create or update a page by title.
+
+        Returns ('created' | 'updated' | 'skipped', page). When the body,
+        title, parent and representation hash to the same value as the last
+        publish of this page, no request is made and the cached page id and
+        version are returned as 'skipped'; `force` (or CONFLUENCE_FORCE_PUBLISH)
+        writes regardless, e.g. after a page was edited by hand.
+
+        A cached page id and version are tried first; if the page was
+        deleted or edited elsewhere the entry is refreshed from a title
+        lookup and the update retried once.
+        """
+        body_hash = content_hash(title, body, ancestor_id, representation)
+        force = force or bool(os.getenv('CONFLUENCE_FORCE_PUBLISH'))
+        cache = self.page_cache
+        cached = cache.get(self.base_url, space_key, title) if cache else None
+        if cached:
+            page_id, version, cached_hash = cached
+            if cached_hash == body_hash and not force:
+                return self._count('skipped'), {'id': page_id, 'version': {'number': version}}
+            try:
+                page = self.update_page(page_id, title, body, version, ancestor_id, representation)
+                self._remember(space_key, title, page, body_hash)
+                return self._count('updated'), page
+            except ConfluenceError as e:
+                if e.status not in (404, 409):
+                    raise
+                cache.forget(self.base_url, space_key, title)
+
+        if (space_key, title) in self._prefetched:
+            existing = self._prefetched.pop((space_key, title))
+        else:
+            existing = self.get_page_by_title(space_key, title)
+        if existing:
+            page = self.update_page(
+                existing['id'], title, body, existing['version']['number'], ancestor_id, representation
+            )
+            action = 'updated'
+        else:
+            page = self.create_page(space_key, title, body, ancestor_id, representation)
+            action = 'created'
+        self._remember(space_key, title, page, body_hash)
+        return self._count(action), page
+
+    def _count(self, action):
+        with self._counts_lock:
+            self.publish_counts[action] += 1
+        return action
+
+    def publish_summary(self):
+        """Describe how many pages were created, updated and skipped."""
+        counts = self.publish_counts
+        return f"{counts['created']} created, {counts['updated']} updated, {counts['skipped']} skipped (unchanged)"
+
+    def _remember(self, space_key, title, page, body_hash=None):
+        if self.page_cache and page.get('id') and page.get('version'):
+            self.page_cache.put(
+                self.base_url, space_key, title, page['id'], page['version']['number'], body_hash
+            )
+
+    def page_url(self, page):
+        return f"{self.base_url}{page.get('_links', {}).get('webui', '')}"
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    """Return the process-wide Confluence rate limiter.
+
+    CONFLUENCE_RATE_LIMIT sets requests per second (0 disables limiting)
+    and CONFLUENCE_RATE_BURST the number allowed back to back.
+    """
+    global _rate_limiter
+    rate = float(os.getenv('CONFLUENCE_RATE_LIMIT', DEFAULT_RATE_LIMIT))
+    if rate <= 0:
+        return None
+    with _clients_lock:
+        if _rate_limiter is None:
+            burst = os.getenv('CONFLUENCE_RATE_BURST')
+            _rate_limiter = TokenBucket(rate, float(burst) if burst else None)
+        return _rate_limiter
+
+
+def get_client(base_url=None, api_user=None, api_token=None):
+    """Return the shared client for a Confluence instance.
+
+    Settings default to CONFLUENCE_BASE_URL, CONFLUENCE_API_USER and
+    CONFLUENCE_API_TOKEN; CONFLUENCE_TIMEOUT and CONFLUENCE_MAX_RETRIES
+    tune the request behaviour. Clients are reused for the life of the
+    process so their connections stay open between publishes, and all of
+    them share one rate limiter.
+    """
+    base_url = base_url or os.getenv('CONFLUENCE_BASE_URL')
+    api_user = api_user or os.getenv('CONFLUENCE_API_USER')
+    api_token = api_token or os.getenv('CONFLUENCE_API_TOKEN')
+
+    missing = []
+    if not base_url: missing.append('CONFLUENCE_BASE_URL')
+    if not api_user: missing.append('CONFLUENCE_API_USER')
+    if not api_token: missing.append('CONFLUENCE_API_TOKEN')
+    if missing:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+
+    key = (base_url, api_user, api_token)
+    rate_limiter = get_rate_limiter()
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = ConfluenceClient(
+                base_url, api_user, api_token,
+                timeout=float(os.getenv('CONFLUENCE_TIMEOUT', DEFAULT_TIMEOUT)),
+                max_retries=int(os.getenv('CONFLUENCE_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+                page_cache=open_page_cache(),
+                rate_limiter=rate_limiter,
+            )
+        return _clients[key]
@@ -1,81 +1,148 @@
 import os
-from atlassian import Confluence
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from confluence_client import ConfluenceError, get_client
 
 def publish_to_confluence(title, content):
     """Publish content to Confluence page."""
-    base_url = os.getenv('CONFLUENCE_BASE_URL')
-    api_user = os.getenv('CONFLUENCE_API_USER')
-    api_token = os.getenv('CONFLUENCE_API_TOKEN')
+    # Validates CONFLUENCE_BASE_URL, CONFLUENCE_API_USER and CONFLUENCE_API_TOKEN
+    confluence = get_client()
 
-    # Validate required environment variables
-    if not all([base_url, api_user, api_token]):
+    space_key = os.getenv('SPACE_KEY')
+    ancestor_id = os.getenv('ANCESTOR_ID')
+
+    if not all([space_key, ancestor_id]):
         missing = []
-        if not base_url: missing.append('CONFLUENCE_BASE_URL')
-        if not api_user: missing.append('CONFLUENCE_API_USER')
-        if not api_token: missing.append('CONFLUENCE_API_TOKEN')
+        if not space_key: missing.append('SPACE_KEY')
+        if not ancestor_id: missing.append('ANCESTOR_ID')
         raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
 
     try:
-        confluence = Confluence(
-            url=base_url,
-            username=api_user,
-            password=api_token,
-            cloud=True
+        # A cached page is updated with a single PUT; otherwise the page is
+        # looked up by title and then updated or created
+        action, _ = confluence.publish_page(
+            space_key,
+            title,
+            content,
+            ancestor_id=ancestor_id,
+            representation='wiki'
         )
+        if action == 'skipped':
+            print(f"Skipped unchanged page: {title}")
+        elif action == 'updated':
+            print(f"Updated existing page: {title}")
+        else:
+            print(f"Created new page: {title}")
 
-        space_key = os.getenv('SPACE_KEY')
-        ancestor_id = os.getenv('ANCESTOR_ID')
-
-        if not all([space_key, ancestor_id]):
-            missing = []
-            if not space_key: missing.append('SPACE_KEY')
-            if not ancestor_id: missing.append('ANCESTOR_ID')
-            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
-
-        try:
-            # Test connection and permissions
-            confluence.get_space(space_key)
-        except Exception as e:
-            print(f"Error connecting to Confluence or accessing space: {str(e)}")
-            print("Please verify your API token and permissions.")
-            raise
-
-        try:
-            # Check if page exists
-            existing_page = confluence.get_page_by_title(
-                space=space_key,
-                title=title
-            )
-
-            if existing_page:
-                # Update existing page
-                confluence.update_page(
-                    page_id=existing_page['id'],
-                    title=title,
-                    body=content,
-                    parent_id=ancestor_id,
-                    type='page',
-                    representation='wiki'
-                )
-                print(f"Updated existing page: {title}")
-            else:
-                # Create new page
-                confluence.create_page(
-                    space=space_key,
-                    title=title,
-                    body=content,
-                    parent_id=ancestor_id,
-                    type='page',
-                    representation='wiki'
-                )
-                print(f"Created new page: {title}")
-
-        except Exception as e:
-            print(f"Error managing Confluence page: {str(e)}")
-            print("Please verify page permissions and parent page existence.")
-            raise
-
-    except Exception as e:
+    except ConfluenceError as e:
         print(f"Error publishing to Confluence: {str(e)}")
-        print("Please verify your Confluence configuration and try again.")
+        if e.status in (401, 403):
+            print("Please verify your API token and permissions.")
+        elif e.status == 404:
+            print("Please verify the space key and parent page existence.")
+        else:
+            print("Please verify your Confluence configuration and try again.")
         raise
+
+DEFAULT_PUBLISH_WORKERS = 8
+
+PublishTarget = namedtuple('PublishTarget', ['space_key', 'ancestor_id', 'title', 'content'])
+PublishResult = namedtuple('PublishResult', ['target', 'action', 'error', 'page'], defaults=(None,))
+
+def parse_targets(spec):
+    """Parse 'SPACE:ANCESTOR_ID,SPACE:ANCESTOR_ID' into (space, ancestor) pairs."""
+    targets = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        space_key, separator, ancestor_id = item.partition(':')
+        if not separator or not space_key or not ancestor_id:
+            raise ValueError(f"Invalid Confluence target '{item}', expected SPACE_KEY:ANCESTOR_ID")
+        targets.append((space_key, ancestor_id))
+    return targets
+
+def env_targets(title, content):
+    """Build PublishTargets for one page from CONFLUENCE_TARGETS, or SPACE_KEY/ANCESTOR_ID."""
+    spec = os.getenv('CONFLUENCE_TARGETS')
+    if spec:
+        pairs = parse_targets(spec)
+    else:
+        pairs = [(os.getenv('SPACE_KEY'), os.getenv('ANCESTOR_ID'))]
+    return [PublishTarget(space_key, ancestor_id, title, content) for space_key, ancestor_id in pairs]
+
+def publish_to_targets(targets, representation='wiki', max_workers=None):
+    """Publish pages to many spaces/ancestors concurrently.
+
+    Targets run on a thread pool sharing one pooled client, and every
+    request passes through the client's global rate limiter, so the wall
+    time approaches the slowest single publish rather than the sum. A
+    failing target does not stop the others; each one gets a
+    PublishResult with its action or error, in the order given.
+    """
+    confluence = get_client()
+    if not targets:
+        return []
+    max_workers = max_workers or int(os.getenv('CONFLUENCE_PUBLISH_WORKERS', DEFAULT_PUBLISH_WORKERS))
+
+    def publish(target):
+        if not all([target.space_key, target.ancestor_id]):
+            raise ValueError("Missing space key or ancestor id")
+        return confluence.publish_page(
+            target.space_key,
+            target.title,
+            target.content,
+            ancestor_id=target.ancestor_id,
+            representation=representation
+        )
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as pool:
+        futures = [pool.submit(publish, target) for target in targets]
+
+    results = []
+    for target, future in zip(targets, futures):
+        error = future.exception()
+        action, page = (None, None) if error else future.result()
+        results.append(PublishResult(target, action, error, page))
+
+    for result in results:
+        target = result.target
+        label = f"{target.space_key}/{target.ancestor_id}: {target.title}"
+        if result.error:
+            print(f"❌ {label} failed: {result.error}")
+        else:
+            print(f"✅ {label} {result.action}")
+    failed = sum(1 for result in results if result.error)
+    print(f"📊 Published {len(results) - failed} of {len(results)} targets "
+          f"({confluence.publish_summary()})")
+    return results
+
+def publish_page_tree(targets, children, representation='wiki', max_workers=None):
+    """Publish release pages, then their child pages under each of them.
+
+    `targets` are PublishTargets for the parent page and `children` are
+    (title, content) pairs. Child pages need the parent's page id, so
+    parents are published first; all child pages of all targets then go
+    out concurrently, and unchanged ones are skipped like any other page.
+    Returns the PublishResults of parents followed by children.
+    """
+    results = publish_to_targets(targets, representation, max_workers)
+    child_targets = [
+        PublishTarget(result.target.space_key, result.page['id'], title, content)
+        for result in results if not result.error
+        for title, content in children
+    ]
+    return results + publish_to_targets(child_targets, representation, max_workers)
+
+def publish_rendered_page(page, destination=None):
+    """Output backend publishing an output_backends.RenderedPage to the env targets.
+
+    Only the 'storage' and 'wiki' formats can be published; `destination`
+    is not used, as targets come from CONFLUENCE_TARGETS or SPACE_KEY and
+    ANCESTOR_ID.
+    """
+    if page.output_format not in ('storage', 'wiki'):
+        print(f"❌ Confluence pages must be 'storage' or 'wiki', not '{page.output_format}'")
+        return False
+    results = publish_page_tree(env_targets(page.title, page.content), page.children, page.output_format)
+    return not any(result.error for result in results)
@@ -0,0 +1,186 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeConfluence:
+    """In-memory stand-in for the Confluence content REST API.
+
+    Serves the subset of /rest/api/content the publishers use, so they can
+    be exercised and benchmarked locally by pointing CONFLUENCE_BASE_URL
+    at `base_url`. Every call is recorded in `calls`.
+
+    `throttle_every` answers every Nth request with 429 and a Retry-After
+    of `retry_after` seconds, to exercise client backoff, and `latency`
+    delays every response by that many seconds.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, throttle_every=0, retry_after=0, latency=0):
+        self.pages = {}
+        self.latency = latency
+        self.calls = []
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self._next_id = 1000
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, method, path):
+        with self._lock:
+            self.calls.append((method, path))
+            return bool(self.throttle_every) and len(self.calls) % self.throttle_every == 0
+
+    def _find(self, space_key, title):
+        for page in self.pages.values():
+            if page['space']['key'] == space_key and page['title'] == title:
+                return page
+        return None
+
+    def _create(self, data):
+        with self._lock:
+            if self._find(data['space']['key'], data['title']):
+                return 400, {'message': 'A page with this title already exists'}
+            page_id = str(self._next_id)
+            self._next_id += 1
+            page = {
+                'id': page_id,
+                'type': 'page',
+                'title': data['title'],
+                'space': {'key': data['space']['key']},
+                'version': {'number': 1},
+                'ancestors': data.get('ancestors', []),
+                'body': data.get('body', {}),
+                '_links': {'webui': f'/pages/viewpage.action?pageId={page_id}'},
+            }
+            self.pages[page_id] = page
+            return 200, page
+
+    def _update(self, page_id, data):
+        with self._lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return 404, {'message': 'No content found'}
+            if data.get('version', {}).get('number') != page['version']['number'] + 1:
+                return 409, {'message': 'Version conflict'}
+            page.update({
+                'title': data['title'],
+                'version': {'number': data['version']['number']},
+                'body': data.get('body', page['body']),
+                'ancestors': data.get('ancestors', page['ancestors']),
+            })
+            return 200, page
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def _handle(self, method):
+                url = urlparse(self.path)
+                data = self._body() if method in ('POST', 'PUT') else None
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake._record(method, url.path):
+                    self._reply(429, {'message': 'Rate limited'},
+                                {'Retry-After': str(fake.retry_after)})
+                    return
+
+                parts = url.path.rstrip('/').split('/')
+                if url.path.rstrip('/') == '/rest/api/content':
+                    if method == 'GET':
+                        query = parse_qs(url.query)
+                        page = fake._find(query.get('spaceKey', [''])[0], query.get('title', [''])[0])
+                        self._reply(200, {'results': [page] if page else [], 'size': int(bool(page))})
+                    elif method == 'POST':
+                        self._reply(*fake._create(data))
+                    else:
+                        self._reply(405, {'message': 'Method not allowed'})
+                elif url.path.startswith('/rest/api/content/') and len(parts) == 5:
+                    page_id = parts[4]
+                    if method == 'PUT':
+                        self._reply(*fake._update(page_id, data))
+                    elif page_id in fake.pages:
+                        self._reply(200, fake.pages[page_id])
+                    else:
+                        self._reply(404, {'message': 'No content found'})
+                elif url.path.startswith('/rest/api/space/'):
+                    self._reply(200, {'key': parts[-1]})
+                else:
+                    self._reply(404, {'message': 'Not found'})
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_PUT(self):
+                self._handle('PUT')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake Confluence server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--throttle-every', type=int, default=0,
+                        help='Answer every Nth request with HTTP 429')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Delay every response by this many seconds')
+    args = parser.parse_args()
+
+    fake = FakeConfluence(args.host, args.port, throttle_every=args.throttle_every,
+                          latency=args.latency)
+    print(f"Fake Confluence listening on {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
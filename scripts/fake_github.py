@@ -0,0 +1,115 @@
+import argparse
+import hashlib
+import hmac
+import json
+import threading
+import uuid
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+ZERO_SHA = '0' * 40
+
+
+class FakeGitHub:
+    """Stand-in for GitHub delivering tag-push webhooks to a local endpoint.
+
+    push_tag() posts the payload GitHub sends when a tag is pushed, with
+    the X-GitHub-Event, X-GitHub-Delivery and, given `secret`,
+    X-Hub-Signature-256 headers, so the release notes daemon can be
+    exercised without a GitHub repository. Every delivery is recorded in
+    `deliveries` as (event, payload, HTTP status, response).
+    """
+
+    def __init__(self, webhook_url, secret=None, timeout=10):
+        self.webhook_url = webhook_url
+        self.secret = secret
+        self.timeout = timeout
+        self.deliveries = []
+        self._lock = threading.Lock()
+
+    def push_payload(self, repository, tag, sha):
+        owner, _, name = repository.partition('/')
+        return {
+            'ref': f'refs/tags/{tag}',
+            'before': ZERO_SHA,
+            'after': sha,
+            'created': True,
+            'deleted': False,
+            'forced': False,
+            'base_ref': None,
+            'commits': [],
+            'head_commit': {'id': sha},
+            'repository': {
+                'name': name,
+                'full_name': repository,
+                'owner': {'login': owner, 'name': owner},
+            },
+            'pusher': {'name': 'release-bot', 'email': 'release-bot@example.com'},
+        }
+
+    def create_payload(self, repository, tag):
+        owner, _, name = repository.partition('/')
+        return {
+            'ref': tag,
+            'ref_type': 'tag',
+            'master_branch': 'main',
+            'pusher_type': 'user',
+            'repository': {
+                'name': name,
+                'full_name': repository,
+                'owner': {'login': owner, 'name': owner},
+            },
+        }
+
+    def push_tag(self, repository, tag, sha=ZERO_SHA, event='push'):
+        """Deliver a 'push' (or 'create') event for a new tag; returns (status, response)."""
+        if event == 'create':
+            payload = self.create_payload(repository, tag)
+        else:
+            payload = self.push_payload(repository, tag, sha)
+        return self.deliver(event, payload)
+
+    def deliver(self, event, payload):
+        """POST one webhook delivery; returns (HTTP status, decoded response)."""
+        body = json.dumps(payload).encode('utf-8')
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'GitHub-Hookshot/fake',
+            'X-GitHub-Event': event,
+            'X-GitHub-Delivery': str(uuid.uuid4()),
+        }
+        if self.secret:
+            digest = hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+            headers['X-Hub-Signature-256'] = f'sha256={digest}'
+        request = Request(self.webhook_url, data=body, headers=headers, method='POST')
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                status, text = response.status, response.read()
+        except HTTPError as e:
+            status, text = e.code, e.read()
+        try:
+            reply = json.loads(text)
+        except ValueError:
+            reply = text.decode('utf-8', errors='replace')
+        with self._lock:
+            self.deliveries.append((event, payload, status, reply))
+        return status, reply
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send a GitHub tag-push webhook to a local endpoint.')
+    parser.add_argument('repository', help='Repository full name, e.g. org/repo')
+    parser.add_argument('tag', help='Tag that was pushed')
+    parser.add_argument('--url', default='http://127.0.0.1:8093/webhook')
+    parser.add_argument('--sha', default=ZERO_SHA, help='Commit the tag points to')
+    parser.add_argument('--event', default='push', choices=['push', 'create'])
+    parser.add_argument('--secret', help='Sign the delivery like a webhook with this secret')
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.url, args.secret)
+    status, reply = fake.push_tag(args.repository, args.tag, args.sha, args.event)
+    print(f"HTTP {status}: {json.dumps(reply)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+KEY_IN_RE = re.compile(r'key\s+in\s*\(([^)]*)\)', re.IGNORECASE)
+MAX_RESULTS = 100
+
+
+class FakeJira:
+    """In-memory stand-in for the Jira issue search REST API.
+
+    Serves GET and POST /rest/api/2/search for `key in (...)` JQL, enough
+    for the ticket enrichment to be exercised and benchmarked locally by
+    pointing JIRA_BASE_URL at `base_url`. Every call is recorded in
+    `calls`. Unknown keys fail the search with HTTP 400 unless the request
+    sets validateQuery to 'warn', as in Jira. `latency` delays every
+    response by that many seconds.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0):
+        self.issues = {}
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_issue(self, key, summary, status='To Do', fix_versions=()):
+        self.issues[key] = {
+            'summary': summary,
+            'status': {'name': status},
+            'fixVersions': [{'name': name} for name in fix_versions],
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, method, path):
+        with self._lock:
+            self.calls.append((method, path))
+
+    def _search(self, jql, fields, start_at, max_results, validate):
+        match = KEY_IN_RE.search(jql or '')
+        if not match:
+            return 400, {'errorMessages': [f"Unsupported JQL: {jql}"]}
+        keys = [key.strip().strip('"\'') for key in match.group(1).split(',') if key.strip()]
+        unknown = [key for key in keys if key not in self.issues]
+        if unknown and validate not in ('warn', 'none', 'false', False):
+            return 400, {'errorMessages': [f"An issue with key '{unknown[0]}' does not exist"]}
+
+        found = [key for key in keys if key in self.issues]
+        page = found[start_at:start_at + min(max_results, MAX_RESULTS)]
+        issues = []
+        for key in page:
+            issue_fields = self.issues[key]
+            if fields:
+                issue_fields = {name: value for name, value in issue_fields.items() if name in fields}
+            issues.append({'key': key, 'fields': issue_fields})
+        return 200, {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(found),
+            'issues': issues,
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method):
+                url = urlparse(self.path)
+                if method == 'POST':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    data = json.loads(self.rfile.read(length) or b'{}')
+                else:
+                    query = parse_qs(url.query)
+                    data = {name: values[0] for name, values in query.items()}
+                    if 'fields' in data:
+                        data['fields'] = data['fields'].split(',')
+                if fake.latency:
+                    time.sleep(fake.latency)
+                fake._record(method, url.path)
+
+                if url.path.rstrip('/') != '/rest/api/2/search':
+                    self._reply(404, {'errorMessages': ['Not found']})
+                    return
+                self._reply(*fake._search(
+                    data.get('jql'),
+                    data.get('fields'),
+                    int(data.get('startAt', 0)),
+                    int(data.get('maxResults', 50)),
+                    data.get('validateQuery', 'strict'),
+                ))
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake Jira server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--issues', default='',
+                        help='Seed issues as PROJECT:COUNT, e.g. ABC:2000')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Delay every response by this many seconds')
+    args = parser.parse_args()
+
+    fake = FakeJira(args.host, args.port, latency=args.latency)
+    for spec in filter(None, args.issues.split(',')):
+        project, _, count = spec.partition(':')
+        for number in range(1, int(count or 0) + 1):
+            fake.add_issue(f"{project}-{number}", f"{project} issue {number}", 'Done', ['1.0'])
+    print(f"Fake Jira listening on {fake.base_url} with {len(fake.issues)} issues")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,19 @@
+import hashlib
 import subprocess
-import requests
-import json
 import os
 import sys
 import re
 from datetime import datetime
-from templates.release_notes_template import (
-    RELEASE_TEMPLATE, 
-    format_ticket_list, 
-    format_section,
-    format_feature_with_ticket
-)
+from templates.release_renderer import render_release
+from release_model import Release, ReleaseSection, TicketRef
+from release_stats import ReleaseStats
+from git_log_reader import CommitRecord, iter_git_log
+from git_backend import get_backend
+import instrumentation
+from commit_classifier import CommitClassifier
+from release_cache import open_classification_cache, open_segment_store, open_watermark_store
+from tag_index import RELEASE_TAG_RE, load_tag_index, reachable_tags
+from page_splitter import max_page_bytes, render_release_pages
 
 COMMIT_CATEGORIES = {
     'feat': 'new_features',
@@ -22,52 +25,73 @@ COMMIT_CATEGORIES = {
     'ux': 'ux_changes'
 }
 
+COMMIT_CLASSIFIER = CommitClassifier(
+    [(key, (key, value.replace('_', ' '))) for key, value in COMMIT_CATEGORIES.items()],
+    r'[A-Z]+-\d+'
+)
+TICKET_REFERENCE_RE = re.compile(r'\[?([A-Z]+-\d+)\]?\s*[|-]?\s*')
+CACHE_BATCH_SIZE = 500
+
+# Bump when parse_commit_message changes how descriptions are derived in a
+# way TICKET_REFERENCE_RE does not show, so cached descriptions are redone
+CLASSIFICATION_FORMAT = 1
+# Cached classifications hold descriptions as well as categories and
+# tickets, so their key covers the description cleanup too
+CLASSIFICATION_KEY = hashlib.sha1(repr(
+    (COMMIT_CLASSIFIER.rules_hash, TICKET_REFERENCE_RE.pattern, CLASSIFICATION_FORMAT)
+).encode('utf-8')).hexdigest()
+
+# Bump when the stored segment snapshot layout changes, so old snapshots
+# are never merged with new ones
+SNAPSHOT_FORMAT = 3
+SEGMENT_KEY = f"{CLASSIFICATION_KEY}:{SNAPSHOT_FORMAT}"
+
+RELEASE_SECTIONS = [
+    ('new_features', 'New features'),
+    ('product_changes', 'Product changes'),
+    ('bug_fixes', 'Bug fixes'),
+    ('app_updates', 'App updates'),
+    ('api_changes', 'API changes'),
+    ('ux_changes', 'User experience enhancements'),
+    ('security_updates', 'Security updates'),
+]
+
 def parse_commit_message(message):
     """Parse commit message to extract category, description, and JIRA ticket."""
-    category = 'other'
-    jira_ticket = None
+    category, jira_ticket = COMMIT_CLASSIFIER.classify(message)
     description = message
 
-    # Extract JIRA ticket
-    jira_match = re.search(r'([A-Z]+-\d+)', message)
-    if jira_match:
-        jira_ticket = jira_match.group(1)
+    if jira_ticket:
         # Clean up the description by removing the ticket reference
-        description = re.sub(r'\[?'+jira_ticket+r'\]?\s*[|-]?\s*', '', description).strip()
+        description = TICKET_REFERENCE_RE.sub(
+            lambda match: '' if match.group(1) == jira_ticket else match.group(0),
+            description
+        ).strip()
 
-    # Determine category from common prefixes and keywords
-    lower_msg = message.lower()
-    for key, value in COMMIT_CATEGORIES.items():
-        if key in lower_msg or value.replace('_', ' ') in lower_msg:
-            category = key
-            break
+    return category or 'other', description, jira_ticket
 
-    return category, description, jira_ticket
+def get_git_log(start_tag, end_tag, with_numstat=False):
+    """Stream commits between two tags as CommitRecords.
 
-def get_git_log(start_tag, end_tag):
+    This is a generator: the tag check and the `git log -z` walk run when
+    iteration starts, and commits are yielded while git is still walking.
+    With `with_numstat`, (CommitRecord, [FileStat]) pairs are yielded.
+    """
     try:
         # First check if tags exist
-        check_tag_cmd = ['git', 'tag', '-l']
-        result = subprocess.run(check_tag_cmd, capture_output=True, text=True, check=True)
-        existing_tags = set(result.stdout.strip().split('\n'))
+        tags = load_tag_index()
 
-        if start_tag not in existing_tags:
+        if start_tag not in tags:
             print(f"❌ Start tag '{start_tag}' not found in repository")
-            print("Available tags:", ', '.join(sorted(existing_tags)))
+            print("Available tags:", ', '.join(tags.names()))
             sys.exit(1)
-        if end_tag not in existing_tags:
+        if end_tag not in tags:
             print(f"❌ End tag '{end_tag}' not found in repository")
-            print("Available tags:", ', '.join(sorted(existing_tags)))
+            print("Available tags:", ', '.join(tags.names()))
             sys.exit(1)
 
-        # Get git log between tags with pretty formatting
-        cmd = [
-            'git', 'log', 
-            f'{start_tag}..{end_tag}',
-            '--pretty=format:%h|%an|%s|%b'
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return result.stdout.strip()
+        # Stream NUL-delimited records between tags
+        yield from iter_git_log(f'{start_tag}..{end_tag}', with_numstat=with_numstat)
     except subprocess.CalledProcessError as e:
         print(f"Error getting git log: {e}")
         print(f"Error output: {e.stderr}")
@@ -75,9 +99,53 @@ def get_git_log(start_tag, end_tag):
             print("❌ Current directory is not a git repository")
         sys.exit(1)
 
-def categorize_commits(git_log):
-    """Categorize commits and collect JIRA tickets."""
-    categories = {
+def _batched(iterable, size):
+    """Yield lists of up to `size` items from an iterable."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_classified(git_log, cache=None):
+    """Classify CommitRecords in place and yield them.
+
+    `git_log` is an iterable of CommitRecords, typically the generator
+    returned by get_git_log, and is consumed in small batches. When a
+    ClassificationCache is given, only commits it has never seen are parsed.
+    Commits with an empty message are skipped. A classified record drops
+    its body and parents, since only the description and ticket are
+    rendered, keeping the records for very large ranges small.
+    """
+    for batch in _batched(git_log, CACHE_BATCH_SIZE):
+        cached = cache.get_many([commit.sha for commit in batch]) if cache else {}
+        parsed = []
+        results = []
+
+        for commit in batch:
+            if commit.sha in cached:
+                commit.classify(*cached[commit.sha])
+            else:
+                message = commit.message
+                if not message:
+                    continue
+                category, description, ticket = parse_commit_message(message)
+                parsed.append((commit.sha, category, description, ticket))
+                commit.classify(category, description, ticket)
+            commit.body = None
+            commit.parents = ()
+            results.append(commit)
+
+        if cache:
+            cache.put_many(parsed)
+        yield from results
+
+def empty_categories():
+    """Return a fresh mapping of release note sections to items."""
+    return {
         'new_features': [],
         'bug_fixes': [],
         'api_changes': [],
@@ -87,28 +155,200 @@ def categorize_commits(git_log):
         'ux_changes': [],
         'other': []
     }
+
+def add_categorized(categories, jira_tickets, commit):
+    """Add one classified commit to its section and the ticket set."""
+    if commit.ticket:
+        jira_tickets.add(commit.ticket)
+    categories[COMMIT_CATEGORIES.get(commit.category, 'other')].append(commit)
+
+def categorize_commits(git_log, cache=None, stats=None):
+    """Categorize commits and collect JIRA tickets.
+
+    With a ReleaseStats, `git_log` yields (CommitRecord, [FileStat]) pairs
+    from a `--numstat` walk, which are counted as they stream by.
+    """
+    categories = empty_categories()
     jira_tickets = set()
+    if stats is not None:
+        git_log = stats.track(git_log)
 
-    for line in git_log.split('\n'):
-        if not line.strip():
-            continue
+    for commit in iter_classified(git_log, cache):
+        add_categorized(categories, jira_tickets, commit)
+
+    return categories, jira_tickets
 
-        try:
-            commit_hash, author, subject, body = line.split('|', 3)
-            category, description, ticket = parse_commit_message(f"{subject}\n{body}")
+def list_release_tags():
+    """Return [(tag, commit_sha)] for all tags, version tags first in version order."""
+    return load_tag_index().version_ordered()
 
-            if ticket:
-                jira_tickets.add(ticket)
+def is_ancestor(ancestor, descendant):
+    """Check whether one commit is reachable from another."""
+    return get_backend().is_ancestor(ancestor, descendant)
 
-            feature_text = format_feature_with_ticket(description, ticket)
-            if category in COMMIT_CATEGORIES:
-                categories[COMMIT_CATEGORIES[category]].append(feature_text)
-            else:
-                categories['other'].append(feature_text)
+def make_segment_snapshot(categories, jira_tickets, stats=None):
+    """Build a JSON-serializable snapshot of a categorized segment.
+
+    Each commit is stored as [sha, category, text, ticket], and the
+    segment's ReleaseStats, if any, under 'stats'.
+    """
+    snapshot = {
+        'categories': {
+            section: [[commit.sha, commit.category, commit.text, commit.ticket] for commit in commits]
+            for section, commits in categories.items()
+        },
+        'tickets': sorted(jira_tickets),
+        'counts': {section: len(commits) for section, commits in categories.items()},
+    }
+    if stats is not None:
+        snapshot['stats'] = stats.to_dict()
+    return snapshot
+
+def merge_segment_snapshots(snapshots, stats=None):
+    """Merge segment snapshots, newest first, into categories and tickets.
+
+    Their statistics are merged into `stats` when it is given.
+    """
+    categories = {}
+    jira_tickets = set()
+    for snapshot in snapshots:
+        if stats is not None:
+            stats.merge(ReleaseStats.from_dict(snapshot['stats']))
+        for section, items in snapshot['categories'].items():
+            categories.setdefault(section, []).extend(
+                CommitRecord(sha).classify(category, text, ticket)
+                for sha, category, text, ticket in items
+            )
+        jira_tickets.update(snapshot['tickets'])
+    return categories, jira_tickets
 
-        except ValueError:
+def segment_chain(start_tag, end_tag, tags=None):
+    """Return the [(name, sha)] boundaries splitting START_TAG..END_TAG, oldest first.
+
+    The boundaries are the two ends and, in version order, every release
+    tag reachable from END_TAG but not from START_TAG. Tags on other
+    branches, such as hotfixes of an older release, are left out. Returns
+    None when an end is not a tag.
+    """
+    tags = tags if tags is not None else list_release_tags()
+    names = [name for name, _ in tags]
+    if start_tag not in names or end_tag not in names:
+        return None
+    start, end = names.index(start_tag), names.index(end_tag)
+    reachable = reachable_tags(end_tag, start_tag)
+    return [tags[start]] + [
+        tag for tag in tags[start + 1:end] if tag[0] in reachable and RELEASE_TAG_RE.match(tag[0])
+    ] + [tags[end]]
+
+def plan_segments(start_tag, end_tag, segments, with_stats=False):
+    """Split a tag range into its stored or missing per-tag segments.
+
+    Returns [(from_sha, to_sha, snapshot)], oldest segment first, with
+    snapshot None for segments that must be walked (and, with
+    `with_stats`, for stored ones without statistics). A boundary that
+    does not descend from the one before it is skipped, so segments never
+    overlap. Returns None when the range has to be walked directly: there
+    is no segment store, an end is not a tag, or START_TAG is not an
+    ancestor of END_TAG.
+    """
+    if segments is None or not segments.enabled:
+        return None
+    chain = segment_chain(start_tag, end_tag)
+    if chain is None:
+        return None
+
+    plan = []
+    from_sha = chain[0][1]
+    for position, (_, to_sha) in enumerate(chain[1:], 1):
+        snapshot = segments.get(from_sha, to_sha)
+        if snapshot is None and not is_ancestor(from_sha, to_sha):
+            snapshot = {'linear': False}
+            segments.put(from_sha, to_sha, snapshot)
+        if snapshot is not None and snapshot.get('linear') is False:
+            # Only START_TAG can fail to reach the last boundary, END_TAG
+            if position == len(chain) - 1:
+                return None
             continue
+        if snapshot is not None and with_stats and 'stats' not in snapshot:
+            snapshot = None
+        plan.append((from_sha, to_sha, snapshot))
+        from_sha = to_sha
+    return plan
+
+def categorize_range(start_tag, end_tag, cache=None, segments=None, stats=None):
+    """Categorize START_TAG..END_TAG by composing per-tag-segment snapshots.
+
+    The range is split at every release tag between the two ends (see
+    plan_segments). Stored snapshots are reused and only missing segments
+    are walked and stored; without a usable segment store the range is
+    walked directly. With a ReleaseStats, the walks also read `--numstat`
+    and the range's statistics are added to it; stored segments without
+    statistics are walked again once to add them.
+    """
+    with_numstat = stats is not None
+    plan = plan_segments(start_tag, end_tag, segments, with_numstat)
+    if plan is None:
+        return categorize_commits(get_git_log(start_tag, end_tag, with_numstat), cache, stats)
+
+    snapshots = []
+    for from_sha, to_sha, snapshot in plan:
+        if snapshot is None:
+            segment_stats = ReleaseStats() if with_numstat else None
+            categories, jira_tickets = categorize_commits(
+                iter_git_log(f'{from_sha}..{to_sha}', with_numstat=with_numstat), cache, segment_stats
+            )
+            snapshot = make_segment_snapshot(categories, jira_tickets, segment_stats)
+            segments.put(from_sha, to_sha, snapshot)
+        snapshots.append(snapshot)
+
+    # git log lists newest commits first, so merge the newest segment first
+    return merge_segment_snapshots(reversed(snapshots), stats)
+
+def resolve_commit(ref):
+    """Return the commit SHA a tag or branch points to, or None."""
+    return get_backend().resolve(ref)
+
+def categorize_incremental(start_tag, end_ref, watermarks, cache=None, segments=None):
+    """Categorize START_TAG..END_REF, walking only commits since the last run.
+
+    The watermark stored for the range holds the last processed commit and
+    the categorized model up to it. When that commit is still an ancestor
+    of END_REF, only `watermark..END_REF` is walked and its commits are
+    merged in front of the stored model. After a force push, a moved start
+    tag or on the first run the whole range is categorized. END_REF may be
+    a branch, so long-running release branches can be tracked.
+    """
+    start_sha = resolve_commit(start_tag)
+    end_sha = resolve_commit(end_ref)
+    if not start_sha:
+        print(f"❌ Start tag '{start_tag}' not found in repository")
+        sys.exit(1)
+    if not end_sha:
+        print(f"❌ End ref '{end_ref}' not found in repository")
+        sys.exit(1)
+
+    name = f'{start_tag}..{end_ref}'
+    stored = watermarks.get(name)
+    if stored and stored.base_sha == start_sha and stored.head_sha == end_sha:
+        print(f"⏭️ No new commits since {stored.head_sha[:12]}")
+        return merge_segment_snapshots([stored.snapshot])
+
+    if stored and stored.base_sha == start_sha and is_ancestor(stored.head_sha, end_sha):
+        # Commits reachable from END_REF but from neither the watermark nor the start
+        categories, jira_tickets = categorize_commits(
+            iter_git_log(f'{stored.head_sha}..{end_sha}', extra_args=(f'^{start_sha}',)), cache
+        )
+        walked = sum(len(commits) for commits in categories.values())
+        print(f"🔁 Incremental update: {walked} new commits since {stored.head_sha[:12]}")
+        categories, jira_tickets = merge_segment_snapshots(
+            [make_segment_snapshot(categories, jira_tickets), stored.snapshot]
+        )
+    elif end_ref in load_tag_index():
+        categories, jira_tickets = categorize_range(start_tag, end_ref, cache, segments)
+    else:
+        categories, jira_tickets = categorize_commits(iter_git_log(f'{start_sha}..{end_sha}'), cache)
 
+    watermarks.put(name, start_sha, end_sha, make_segment_snapshot(categories, jira_tickets))
     return categories, jira_tickets
 
 def determine_release_type(categories):
@@ -121,36 +361,49 @@ def determine_release_type(categories):
 
 def format_release_notes(git_log, version):
     categories, jira_tickets = categorize_commits(git_log)
-    release_type = determine_release_type(categories)
+    return render_release_notes(categories, jira_tickets, version)
+
+def build_release(categories, jira_tickets, version, issues=None, stats=None):
+    """Build the Release model for already categorized commits.
 
-    content = RELEASE_TEMPLATE.format(
-        version=version,
+    `issues` maps ticket keys to JiraIssues from enrich_tickets, and
+    `stats` is an optional ReleaseStats of the range.
+    """
+    issues = issues or {}
+    release_type = determine_release_type(categories)
+    sections = [
+        ReleaseSection(key, title, categories[key]) for key, title in RELEASE_SECTIONS
+    ]
+
+    return Release(
+        version,
+        release_type,
+        sections,
+        tickets=[TicketRef.from_issue(ticket, issues.get(ticket)) for ticket in sorted(jira_tickets)],
         owner=os.getenv('RELEASE_OWNER', 'Release Team'),
         last_updated=datetime.now().strftime('%b %d, %Y'),
-        release_type=release_type,
-        new_features=format_section(categories['new_features']),
-        product_changes=format_section(categories['product_changes']),
-        bug_fixes=format_section(categories['bug_fixes']),
-        app_updates=format_section(categories['app_updates']),
-        api_changes=format_section(categories['api_changes']),
-        ux_changes=format_section(categories['ux_changes']),
-        security_updates=format_section(categories['security_updates']),
         backward_compatible="Yes" if release_type != "Major" else "No",
-        upgrade_steps="<p>Run Github Action workflow of client</p>",
-        rollback_steps="<p>Run Github Action workflow of client with backward compatible version</p>",
-        major_rollback_steps="<p>N/A - " + ("release type " + release_type.lower() if release_type != "Major" else "See rollback steps above") + "</p>",
-        dependencies="<p>N/A</p>",
-        jira_tickets=format_ticket_list(sorted(jira_tickets))
+        upgrade_steps="Run Github Action workflow of client",
+        rollback_steps="Run Github Action workflow of client with backward compatible version",
+        major_rollback_steps="N/A - " + ("release type " + release_type.lower() if release_type != "Major" else "See rollback steps above"),
+        dependencies="N/A",
+        stats=stats.statistics(sections) if stats is not None else None
     )
 
-    return content
+def render_release_notes(categories, jira_tickets, version, output_format='storage', issues=None):
+    """Render already categorized commits in one output format."""
+    release = build_release(categories, jira_tickets, version, issues)
+    return render_release(release, (output_format,))[output_format]
+
+def create_confluence_page(content, page_title=None):
+    # The HTTP clients are imported on use, so rendering needs no requests
+    from confluence_client import ConfluenceError, get_client
 
-def create_confluence_page(content):
     base_url = os.getenv('CONFLUENCE_BASE_URL')
     api_user = os.getenv('CONFLUENCE_API_USER')
     api_token = os.getenv('CONFLUENCE_API_TOKEN')
     space_key = os.getenv('SPACE_KEY')
-    page_title = os.getenv('PAGE_TITLE')
+    page_title = page_title or os.getenv('PAGE_TITLE')
     ancestor = os.getenv('ANCESTOR_ID')
 
     # Validate all required environment variables are present and not None
@@ -170,49 +423,26 @@ def create_confluence_page(content):
             print("Missing ANCESTOR_ID")
         return False
 
-    url = f"{base_url}/rest/api/content"
-
-    headers = {
-        "Content-Type": "application/json",
-    }
-
-    data = {
-        "type": "page",
-        "title": page_title,
-        "space": {"key": space_key},
-        "ancestors": [{"id": ancestor}],
-        "body": {
-            "storage": {
-                "value": content,
-                "representation": "storage",
-            }
-        },
-    }
-
     try:
         # Only proceed with the request if we have valid credentials
         if not (isinstance(api_user, str) and isinstance(api_token, str)):
             print("❌ Invalid API credentials format")
             return False
 
-        response = requests.post(
-            url,
-            headers=headers,
-            auth=(api_user, api_token),  # Now we know these are strings
-            data=json.dumps(data),
-        )
+        client = get_client(base_url, api_user, api_token)
+        action, page = client.publish_page(space_key, page_title, content, ancestor_id=ancestor)
 
-        response.raise_for_status()
-
-        page_url = f"{base_url}{response.json().get('_links', {}).get('webui', '')}"
-        print("✅ Page created successfully!")
-        print(f"📄 Page URL: {page_url}")
+        if action == 'skipped':
+            print(f"⏭️ Page '{page_title}' is unchanged, skipped update")
+        else:
+            print(f"✅ Page {action} successfully!")
+            print(f"📄 Page URL: {client.page_url(page)}")
         return True
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to create Confluence page: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Response: {e.response.text}")
+    except ConfluenceError as e:
+        print(f"❌ Failed to publish Confluence page: {e}")
+        if e.body:
+            print(f"Response: {e.body}")
         return False
 
 def main():
@@ -224,20 +454,88 @@ def main():
         sys.exit(1)
 
     print(f"🔍 Generating release notes from {start_tag} to {end_tag}")
-
-    # Get git log
-    git_log = get_git_log(start_tag, end_tag)
-
-    if not git_log:
+    instrumentation.configure_logging()
+    try:
+        if os.getenv('RELEASE_NOTES_ASYNC'):
+            # Imported here: the pipeline builds on this module
+            from async_pipeline import run_pipeline
+            run_pipeline(start_tag, end_tag)
+        else:
+            generate_and_publish(start_tag, end_tag)
+    finally:
+        instrumentation.write_report()
+
+def generate_and_publish(start_tag, end_tag):
+    """Categorize, render and publish one range, timing each stage."""
+    # Compose the range from stored tag segments, walking only missing ones,
+    # or in incremental mode only the commits since the stored watermark
+    stats = ReleaseStats() if os.getenv('RELEASE_NOTES_STATS') else None
+    with instrumentation.stage('categorize'), \
+            open_classification_cache(CLASSIFICATION_KEY) as cache, \
+            open_segment_store(SEGMENT_KEY) as segments:
+        if os.getenv('RELEASE_NOTES_INCREMENTAL'):
+            if stats is not None:
+                print("⚠️ Release statistics are not collected in incremental mode")
+                stats = None
+            with open_watermark_store(SEGMENT_KEY) as watermarks:
+                categories, jira_tickets = categorize_incremental(
+                    start_tag, end_tag, watermarks, cache, segments
+                )
+        else:
+            categories, jira_tickets = categorize_range(start_tag, end_tag, cache, segments, stats)
+        instrumentation.gauge('classification_cache_hits', cache.hits)
+        instrumentation.gauge('classification_cache_misses', cache.misses)
+    for section, items in categories.items():
+        instrumentation.gauge('items', len(items), category=section)
+    instrumentation.gauge('tickets', len(jira_tickets))
+
+    if not any(categories.values()):
         print("❌ No changes found between tags")
         sys.exit(1)
 
-    # Format content for Confluence
-    confluence_content = format_release_notes(git_log, end_tag)
-
-    # Create Confluence page
-    if not create_confluence_page(confluence_content):
+    # Look up ticket summaries, status and fix versions in bulk
+    from jira_client import enrich_tickets
+    try:
+        with instrumentation.stage('enrich'):
+            issues = enrich_tickets(jira_tickets)
+    except ValueError as e:
+        print(f"❌ {e}")
         sys.exit(1)
 
+    publish_release(categories, jira_tickets, end_tag, issues, stats)
+
+def publish_release(categories, jira_tickets, end_tag, issues=None, stats=None):
+    """Render categorized commits and publish them, exiting on failure."""
+    from confluence_publisher import env_targets, publish_page_tree, publish_to_targets
+
+    # Format content for Confluence, moving overflowing sections to child
+    # pages when CONFLUENCE_MAX_PAGE_BYTES is set
+    page_title = os.getenv('PAGE_TITLE')
+    max_bytes = max_page_bytes() if page_title else None
+    with instrumentation.stage('render'):
+        release = build_release(categories, jira_tickets, end_tag, issues, stats)
+        confluence_content, children = render_release_pages(release, page_title, 'storage', max_bytes)
+    instrumentation.gauge('content_bytes', len(confluence_content.encode('utf-8')))
+    instrumentation.gauge('child_pages', len(children))
+
+    # Create Confluence page, or publish to several targets concurrently
+    with instrumentation.stage('publish'):
+        if children:
+            print(f"📄 Page is over {max_bytes} bytes, split into {len(children)} child pages")
+            results = publish_page_tree(
+                env_targets(page_title, confluence_content), children, representation='storage'
+            )
+            if any(result.error for result in results):
+                sys.exit(1)
+        elif os.getenv('CONFLUENCE_TARGETS'):
+            if not page_title:
+                print("❌ Missing PAGE_TITLE")
+                sys.exit(1)
+            results = publish_to_targets(env_targets(page_title, confluence_content), representation='storage')
+            if any(result.error for result in results):
+                sys.exit(1)
+        elif not create_confluence_page(confluence_content):
+            sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+import atexit
+import os
+import subprocess
+import threading
+
+import instrumentation
+from git_log_reader import CommitRecord
+from release_cache import git_dir
+
+
+class GitBackendError(Exception):
+    """Raised when the persistent `git cat-file` process stops answering."""
+
+
+def parse_commit_object(sha, data):
+    """Parse a raw commit object into a CommitRecord.
+
+    The subject is the first paragraph of the message joined into one
+    line, like git's %s, and the body is the rest, like %b.
+    """
+    header, _, message = data.partition(b'\n\n')
+    parents = []
+    author = ''
+    for line in header.split(b'\n'):
+        if line.startswith(b'parent '):
+            parents.append(line[7:].decode('ascii'))
+        elif line.startswith(b'author '):
+            author = line[7:].decode('utf-8', errors='replace').rsplit(' <', 1)[0]
+    text = message.decode('utf-8', errors='replace').strip()
+    subject, _, body = text.partition('\n\n')
+    return CommitRecord(sha, author, tuple(parents), ' '.join(subject.split('\n')), body.strip())
+
+
+class GitBackend:
+    """One long-lived `git cat-file --batch` process per repository.
+
+    Resolving refs and reading single commits is then a write and a read
+    on a pipe rather than a new git process each time, which adds up in
+    batch runs and long-lived servers. The process is started on first
+    use and stopped at exit. If it cannot be started or dies, the backend
+    disables itself and every call falls back to one-off git commands.
+    Range walks still go through `git log` (see git_log_reader).
+    """
+
+    def __init__(self, cwd=None):
+        self.cwd = cwd
+        self.enabled = os.getenv('RELEASE_NOTES_GIT_BACKEND', 'batch') != 'subprocess'
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=self.cwd
+        )
+        instrumentation.count('git_processes')
+
+    def _request(self, spec):
+        """Return (sha, type, content) for an object name, or None if it does not exist."""
+        if self._process is None:
+            self._start()
+        self._process.stdin.write(spec.encode('utf-8') + b'\n')
+        self._process.stdin.flush()
+        header = self._process.stdout.readline()
+        if not header:
+            raise GitBackendError(f"git cat-file exited while reading {spec}")
+        fields = header.split()
+        if len(fields) != 3:
+            # "<spec> missing" or "<spec> ambiguous"
+            return None
+        size = int(fields[2])
+        content = self._process.stdout.read(size + 1)[:-1]
+        instrumentation.count('git_bytes_read', len(header) + size + 1)
+        return fields[0].decode('ascii'), fields[1].decode('ascii'), content
+
+    def _commit_object(self, ref):
+        """Return (sha, raw commit) for a ref, or None. Falls back to a subprocess on failure."""
+        if '\n' in ref or not ref.strip():
+            return None
+        if self.enabled:
+            with self._lock:
+                try:
+                    found = self._request(f'{ref}^{{commit}}')
+                except (OSError, ValueError, GitBackendError):
+                    self._disable()
+                else:
+                    return (found[0], found[2]) if found else None
+        sha = self._rev_parse(ref)
+        if not sha:
+            return None
+        result = subprocess.run(['git', 'cat-file', 'commit', sha], capture_output=True, cwd=self.cwd)
+        instrumentation.count('git_processes')
+        return (sha, result.stdout) if result.returncode == 0 else None
+
+    def _rev_parse(self, ref):
+        cmd = ['git', 'rev-parse', '--verify', '--quiet', f'{ref}^{{commit}}']
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.cwd)
+        instrumentation.count('git_processes')
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def resolve(self, ref):
+        """Return the commit SHA a tag, branch or SHA points to, or None."""
+        found = self._commit_object(ref)
+        return found[0] if found else None
+
+    def read_commit(self, ref):
+        """Return the commit a ref points to as a CommitRecord, or None."""
+        found = self._commit_object(ref)
+        return parse_commit_object(*found) if found else None
+
+    def is_ancestor(self, ancestor, descendant):
+        """Return True if `ancestor` is reachable from `descendant`.
+
+        Answered by `git merge-base --is-ancestor`, which can use the
+        commit-graph rather than reading commits one by one over the pipe.
+        """
+        ancestor_sha = self.resolve(ancestor)
+        descendant_sha = self.resolve(descendant)
+        if not ancestor_sha or not descendant_sha:
+            return False
+        cmd = ['git', 'merge-base', '--is-ancestor', ancestor_sha, descendant_sha]
+        instrumentation.count('git_processes')
+        return subprocess.run(cmd, capture_output=True, cwd=self.cwd).returncode == 0
+
+    def _disable(self):
+        self.enabled = False
+        self._stop()
+
+    def _stop(self):
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(cwd=None):
+    """Return the shared GitBackend for the repository containing `cwd`."""
+    key = git_dir(cwd) or os.path.abspath(cwd or os.getcwd())
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = _backends[key] = GitBackend(os.path.abspath(cwd or os.getcwd()))
+        return backend
+
+
+@atexit.register
+def close_backends():
+    """Stop every persistent git process."""
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        backend.close()
@@ -0,0 +1,183 @@
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+
+import instrumentation
+
+# Fields are separated by the ASCII unit separator and every commit is
+# NUL-terminated by `git log -z`, so subjects and multi-line bodies may
+# contain '|' or newlines without breaking the parse.
+FIELD_SEPARATOR = '\x1f'
+LOG_FORMAT = '%H%x1f%an%x1f%P%x1f%s%x1f%b'
+HEADER_END = b'\x1e'
+CHUNK_SIZE = 64 * 1024
+SHORT_SHA_LENGTH = 12
+
+# One file of a `--numstat` walk; binary files have no line counts
+FileStat = namedtuple('FileStat', ['added', 'deleted', 'path'])
+
+
+class CommitRecord:
+    """One commit as it flows through the release notes pipeline.
+
+    Records use __slots__ and intern their author, so half a million of
+    them cost a fraction of the memory of dicts or strings. Classification
+    fills in `category`, `description` and `ticket` on the same record;
+    markup is only produced from it at render time.
+    """
+
+    __slots__ = ('sha', 'author', 'parents', 'subject', 'body', 'category', 'description', 'ticket')
+
+    def __init__(self, sha, author='', parents=(), subject='', body='', category=None,
+                 description=None, ticket=None):
+        self.sha = sha
+        self.author = sys.intern(author)
+        self.parents = parents
+        self.subject = subject
+        self.body = body
+        self.category = category
+        self.description = description
+        self.ticket = ticket
+
+    @property
+    def short_sha(self):
+        return self.sha[:SHORT_SHA_LENGTH]
+
+    @property
+    def message(self):
+        """The full commit message, sharing the subject string when there is no body."""
+        return (f"{self.subject}\n{self.body}" if self.body else self.subject).strip()
+
+    @property
+    def text(self):
+        """The text listed in release notes: the description, or else the subject."""
+        return self.description if self.description is not None else self.subject
+
+    def classify(self, category, description, ticket):
+        """Record a classification, interning the values shared between commits.
+
+        A description equal to the subject is not stored twice.
+        """
+        self.category = sys.intern(category) if category else None
+        self.description = None if description == self.subject else description
+        self.ticket = sys.intern(ticket) if ticket else None
+        return self
+
+    def __repr__(self):
+        return f"CommitRecord({self.short_sha}, {self.subject!r})"
+
+
+def iter_nul_records(stream, chunk_size=CHUNK_SIZE):
+    """Yield NUL-terminated records from a binary stream, one chunk at a time."""
+    pending = b''
+    while True:
+        chunk = stream.read1(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        *records, pending = pending.split(b'\0')
+        yield from records
+    if pending:
+        yield pending
+
+
+def parse_commit_record(record):
+    """Parse one raw `git log -z` record into a CommitRecord."""
+    text = record.decode('utf-8', errors='replace')
+    sha, author, parents, subject, body = text.split(FIELD_SEPARATOR, 4)
+    return CommitRecord(sha, author, tuple(parents.split()), subject, body.strip())
+
+
+def _file_stat(added, deleted, path):
+    # Binary files are listed with '-' for both counts
+    return FileStat(
+        int(added) if added != b'-' else 0,
+        int(deleted) if deleted != b'-' else 0,
+        path.decode('utf-8', errors='replace'),
+    )
+
+
+def iter_git_log(revision_range, extra_args=(), cwd=None, with_files=False, with_numstat=False):
+    """Stream commits in a revision range from a `git log -z` pipe.
+
+    Commits are yielded as soon as git writes them, so memory stays flat
+    regardless of the range size. With `with_files`, the same walk also
+    lists changed paths (`--name-only`) and (CommitRecord, [path]) pairs
+    are yielded, merges listing the paths changed against their first
+    parent; with `with_numstat`, lines added and removed per file
+    (`--numstat`) and (CommitRecord, [FileStat]) pairs are yielded, and
+    merges list no files so lines are not counted twice. Raises
+    subprocess.CalledProcessError once the stream is exhausted if git
+    exited with an error. Bytes and commits read are added to the
+    instrumentation counters.
+    """
+    if with_files or with_numstat:
+        # Paths follow the header as their own NUL-terminated records, so
+        # the header is ended with a marker to tell the two apart
+        # Merges are listed by their first-parent diff, which is what the
+        # merge brought into the mainline
+        diff_args = ['--numstat'] if with_numstat else ['--name-only', '--diff-merges=first-parent']
+        cmd = ['git', 'log', '-z', f'--pretty=format:{LOG_FORMAT}%x1e',
+               *diff_args, *extra_args, revision_range]
+    else:
+        cmd = ['git', 'log', '-z', f'--pretty=format:{LOG_FORMAT}', *extra_args, revision_range]
+    # stderr goes to a file rather than a pipe: nothing reads it until
+    # stdout ends, and a pipe full of warnings would block git meanwhile
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors, cwd=cwd)
+    bytes_read = commits = 0
+    try:
+        current = None
+        # A renamed file's counts come first, then its old and new paths
+        # as two more records
+        renamed = None
+        for record in iter_nul_records(process.stdout):
+            bytes_read += len(record) + 1
+            if not record:
+                continue
+            if not (with_files or with_numstat):
+                commits += 1
+                yield parse_commit_record(record)
+                continue
+            if renamed:
+                renamed.append(record)
+                if len(renamed) == 4:
+                    current[1].append(_file_stat(renamed[0], renamed[1], renamed[3]))
+                    renamed = None
+                continue
+            header, marker, path = record.rpartition(HEADER_END)
+            if marker:
+                if current:
+                    yield current
+                commits += 1
+                current = (parse_commit_record(header), [])
+                path = path.lstrip(b'\n')
+                if not path:
+                    continue
+            else:
+                path = record
+            if not with_numstat:
+                current[1].append(path.decode('utf-8', errors='replace'))
+                continue
+            added, deleted, path = path.split(b'\t', 2)
+            if path:
+                current[1].append(_file_stat(added, deleted, path))
+            else:
+                renamed = [added, deleted]
+        if current:
+            yield current
+        if process.wait() != 0:
+            errors.seek(0)
+            stderr = errors.read().decode('utf-8', errors='replace')
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        instrumentation.count('git_bytes_read', bytes_read)
+        instrumentation.count('git_commits_read', commits)
+        instrumentation.count('git_processes')
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
+
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = 'release_notes'
+LOG_FORMAT = '%(message)s'
+DEBUG_LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _label_text(labels, quote=False):
+    if not labels:
+        return ''
+    if quote:
+        return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+    return '{' + ','.join(f'{name}={value}' for name, value in labels) + '}'
+
+
+class Metrics:
+    """Process-wide stage timings, counters, gauges and latency histograms.
+
+    Stages accumulate wall time and call counts by name, so a stage that
+    runs once per range in a batch still reports a single total. Counters
+    and histograms take optional labels, e.g. service='jira'. Everything
+    is thread safe, since publishing and enrichment run on thread pools.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work as the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                seconds, calls = self.stages.get(name, (0.0, 0))
+                self.stages[name] = (seconds + elapsed, calls + 1)
+
+    def count(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one latency sample in seconds."""
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)
+                }
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['max'] = max(histogram['max'], seconds)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][index] += 1
+
+    def report(self):
+        """Return every metric as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                'started': self.started,
+                'duration_seconds': round(time.time() - self.started, 6),
+                'stages': {
+                    name: {'seconds': round(seconds, 6), 'calls': calls}
+                    for name, (seconds, calls) in self.stages.items()
+                },
+                'counters': {
+                    name + _label_text(labels): value for (name, labels), value in self.counters.items()
+                },
+                'gauges': {
+                    name + _label_text(labels): value for (name, labels), value in self.gauges.items()
+                },
+                'latencies': {
+                    name + _label_text(labels): {
+                        'count': histogram['count'],
+                        'sum': round(histogram['sum'], 6),
+                        'mean': round(histogram['sum'] / histogram['count'], 6),
+                        'max': round(histogram['max'], 6),
+                    }
+                    for (name, labels), histogram in self.histograms.items()
+                },
+            }
+
+    def prometheus(self, prefix=METRIC_PREFIX):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            if self.stages:
+                lines.append(f'# TYPE {prefix}_stage_seconds gauge')
+                for name, (seconds, _) in sorted(self.stages.items()):
+                    lines.append(f'{prefix}_stage_seconds{{stage="{name}"}} {seconds:.6f}')
+            for kind, metrics, suffix in (('counter', self.counters, '_total'), ('gauge', self.gauges, '')):
+                declared = set()
+                for (name, labels), value in sorted(metrics.items()):
+                    metric = f'{prefix}_{_metric_name(name)}{suffix}'
+                    if metric not in declared:
+                        lines.append(f'# TYPE {metric} {kind}')
+                        declared.add(metric)
+                    lines.append(f'{metric}{_label_text(labels, quote=True)} {value}')
+            declared = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = f'{prefix}_{_metric_name(name)}'
+                if metric not in declared:
+                    lines.append(f'# TYPE {metric} histogram')
+                    declared.add(metric)
+                for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                    bucket_labels = labels + (('le', bound),)
+                    lines.append(f'{metric}_bucket{_label_text(bucket_labels, quote=True)} {count}')
+                inf_labels = labels + (('le', '+Inf'),)
+                lines.append(f'{metric}_bucket{_label_text(inf_labels, quote=True)} {histogram["count"]}')
+                lines.append(f'{metric}_sum{_label_text(labels, quote=True)} {histogram["sum"]:.6f}')
+                lines.append(f'{metric}_count{_label_text(labels, quote=True)} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """One line listing the stages and their wall time."""
+        with self._lock:
+            stages = ', '.join(f"{name} {seconds:.3f}s" for name, (seconds, _) in self.stages.items())
+        return f"Stages: {stages or 'none'}"
+
+
+def _metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+metrics = Metrics()
+stage = metrics.stage
+count = metrics.count
+gauge = metrics.gauge
+observe = metrics.observe
+
+
+def _write_atomically(path, text):
+    # Write next to the target and rename, so collectors never read a partial file
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as output:
+        output.write(text)
+    os.replace(temporary, path)
+
+
+def write_report(metrics=metrics):
+    """Log the stage summary and write the configured metric files.
+
+    RELEASE_NOTES_METRICS names a JSON report file and
+    RELEASE_NOTES_PROMETHEUS a textfile for node_exporter's textfile
+    collector. Both are optional.
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"📊 {metrics.summary()}")
+    json_path = os.getenv('RELEASE_NOTES_METRICS')
+    prometheus_path = os.getenv('RELEASE_NOTES_PROMETHEUS')
+    try:
+        if json_path:
+            _write_atomically(json_path, json.dumps(metrics.report(), indent=2) + '\n')
+            logger.info(f"📄 Metrics written to {json_path}")
+        if prometheus_path:
+            _write_atomically(prometheus_path, metrics.prometheus())
+            logger.info(f"📄 Prometheus metrics written to {prometheus_path}")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write metrics: {e}")
+
+
+def configure_logging(level=None):
+    """Send log records to stdout at RELEASE_NOTES_LOG_LEVEL (default INFO)."""
+    level = (level or os.getenv('RELEASE_NOTES_LOG_LEVEL') or 'INFO').upper()
+    logging.basicConfig(
+        level=getattr(logging, level, logging.INFO),
+        format=DEBUG_LOG_FORMAT if level == 'DEBUG' else LOG_FORMAT,
+        stream=sys.stdout,
+    )
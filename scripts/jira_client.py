@@ -0,0 +1,228 @@
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from confluence_client import MAX_BACKOFF, RETRY_STATUSES, _retry_after
+from release_cache import open_jira_cache
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+# Jira Cloud caps a search page at 100 issues
+JIRA_BATCH_SIZE = 100
+DEFAULT_JIRA_WORKERS = 4
+JIRA_FIELDS = ['summary', 'status', 'fixVersions']
+
+JiraIssue = namedtuple('JiraIssue', ['key', 'summary', 'status', 'fix_versions'])
+
+
+class JiraError(Exception):
+    """Raised when a Jira API call fails after all retries."""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class JiraClient:
+    """Minimal Jira REST client for looking up many issues at once.
+
+    Uses one pooled keep-alive session and retries connection errors and
+    429/502/503/504 responses with backoff, honouring Retry-After. Search
+    is a read, so every request is safe to retry.
+    """
+
+    def __init__(self, base_url, api_user, api_token, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.calls = 0
+        # Searches run on several threads at once
+        self._calls_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.auth = (api_user, api_token)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        })
+        adapter = HTTPAdapter(pool_connections=DEFAULT_JIRA_WORKERS, pool_maxsize=DEFAULT_JIRA_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _sleep(self, attempt, response=None):
+        delay = _retry_after(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+        time.sleep(min(delay, MAX_BACKOFF))
+
+    def request(self, method, path, **kwargs):
+        """Send a request, retrying transient failures, and return the response."""
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            with self._calls_lock:
+                self.calls += 1
+            try:
+                start = time.perf_counter()
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                instrumentation.count('http_requests', service='jira', method=method, status='error')
+                if attempt == self.max_retries:
+                    raise JiraError(f"{method} {path} failed: {e}") from e
+                self._sleep(attempt)
+                continue
+
+            instrumentation.observe('http_request_seconds', time.perf_counter() - start,
+                                    service='jira', method=method)
+            instrumentation.count('http_requests', service='jira', method=method,
+                                  status=str(response.status_code))
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._sleep(attempt, response)
+                continue
+            if response.status_code >= 400:
+                raise JiraError(
+                    f"{method} {path} failed with HTTP {response.status_code}",
+                    status=response.status_code, body=response.text
+                )
+            return response
+
+    def search_issues(self, keys):
+        """Return {key: JiraIssue} for the given keys using `key in (...)` JQL.
+
+        validateQuery is set to 'warn' so keys that do not exist (or are
+        not visible) are left out instead of failing the whole search.
+        """
+        jql = f"key in ({', '.join(keys)})"
+        issues = {}
+        start_at = 0
+        while True:
+            data = self.request('POST', '/rest/api/2/search', json={
+                'jql': jql,
+                'fields': JIRA_FIELDS,
+                'startAt': start_at,
+                'maxResults': JIRA_BATCH_SIZE,
+                'validateQuery': 'warn',
+            }).json()
+            page = data.get('issues', [])
+            for issue in page:
+                fields = issue.get('fields') or {}
+                issues[issue['key']] = JiraIssue(
+                    issue['key'],
+                    fields.get('summary') or '',
+                    (fields.get('status') or {}).get('name') or '',
+                    tuple(version['name'] for version in fields.get('fixVersions') or [])
+                )
+            start_at += len(page)
+            if not page or start_at >= data.get('total', 0):
+                return issues
+
+    def close(self):
+        self.session.close()
+
+
+def get_jira_client():
+    """Return a JiraClient configured from the environment, or None.
+
+    Enrichment is enabled by setting JIRA_BASE_URL. JIRA_API_USER and
+    JIRA_API_TOKEN default to the Confluence credentials, since both
+    usually belong to the same Atlassian account.
+    """
+    base_url = os.getenv('JIRA_BASE_URL')
+    if not base_url:
+        return None
+    api_user = os.getenv('JIRA_API_USER') or os.getenv('CONFLUENCE_API_USER')
+    api_token = os.getenv('JIRA_API_TOKEN') or os.getenv('CONFLUENCE_API_TOKEN')
+
+    missing = []
+    if not api_user: missing.append('JIRA_API_USER')
+    if not api_token: missing.append('JIRA_API_TOKEN')
+    if missing:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+
+    return JiraClient(
+        base_url, api_user, api_token,
+        timeout=float(os.getenv('JIRA_TIMEOUT', DEFAULT_TIMEOUT)),
+        max_retries=int(os.getenv('JIRA_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+    )
+
+
+def _to_payload(issue):
+    return {'summary': issue.summary, 'status': issue.status, 'fix_versions': list(issue.fix_versions)}
+
+
+def _from_payload(key, payload):
+    return JiraIssue(key, payload['summary'], payload['status'], tuple(payload['fix_versions']))
+
+
+def lookup_issues(keys, client, cache, batch_size=JIRA_BATCH_SIZE, max_workers=None):
+    """Look up Jira tickets, searching only for keys missing from the cache.
+
+    Missing keys are split into `key in (...)` searches of `batch_size`
+    keys that run concurrently. Returns ({key: JiraIssue}, number of keys
+    answered from the cache). A failed batch is reported and left out.
+    """
+    cached = cache.get_many(client.base_url, keys)
+    issues = {key: _from_payload(key, payload) for key, payload in cached.items() if payload}
+    missing = [key for key in keys if key not in cached]
+    batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+
+    if batches:
+        max_workers = max_workers or int(os.getenv('JIRA_WORKERS', DEFAULT_JIRA_WORKERS))
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+            futures = [pool.submit(client.search_issues, batch) for batch in batches]
+
+        for batch, future in zip(batches, futures):
+            error = future.exception()
+            if error:
+                print(f"⚠️ Jira lookup failed for {len(batch)} tickets: {error}")
+                continue
+            found = future.result()
+            issues.update(found)
+            # Remember keys Jira did not return so they are not searched again
+            cache.put_many(client.base_url, {
+                key: _to_payload(found[key]) if key in found else None for key in batch
+            })
+
+    instrumentation.count('jira_tickets_cached', len(cached))
+    instrumentation.count('jira_tickets_enriched', len(issues))
+    return issues, len(cached)
+
+
+def enrich_tickets(keys, client=None, cache=None, batch_size=JIRA_BATCH_SIZE, max_workers=None):
+    """Fetch summary, status and fix versions for many Jira tickets.
+
+    Keys still fresh in the on-disk cache are not requested. The rest are
+    split into `key in (...)` searches of `batch_size` keys that run
+    concurrently, so 2,000 uncached tickets cost about 20 calls. Returns
+    {key: JiraIssue} for the tickets Jira knows about. Enrichment is best
+    effort: without JIRA_BASE_URL it returns {}, and a failed batch is
+    reported and left out rather than failing the release notes.
+    """
+    keys = sorted(set(keys))
+    client = client or get_jira_client()
+    if client is None or not keys:
+        return {}
+
+    own_cache = cache is None
+    if own_cache:
+        cache = open_jira_cache()
+    try:
+        calls_before = client.calls
+        issues, cached = lookup_issues(keys, client, cache, batch_size, max_workers)
+        print(f"🎫 Enriched {len(issues)} of {len(keys)} Jira tickets "
+              f"({cached} cached, {client.calls - calls_before} HTTP calls)")
+        return issues
+    finally:
+        if own_cache:
+            cache.close()
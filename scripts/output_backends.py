@@ -0,0 +1,72 @@
+import importlib
+import os
+import sys
+from collections import namedtuple
+
+from templates.release_renderer import OUTPUT_EXTENSIONS
+
+# A rendered release page: `children` are (title, content) pairs for the
+# child pages split off by page_splitter, `output_format` the renderer
+# format the content is in
+RenderedPage = namedtuple('RenderedPage', ['title', 'content', 'children', 'output_format'])
+
+# Output backend name -> ('module:function', help text). A backend's module
+# is only imported once the backend is selected, so a local preview never
+# loads the HTTP clients or needs their packages installed.
+BACKENDS = {
+    'stdout': ('output_backends:write_stdout', 'print the page'),
+    'file': ('output_backends:write_files', 'write the page and child pages to --destination'),
+    'confluence': ('confluence_publisher:publish_rendered_page', 'publish with the Confluence REST client'),
+    'atlassian': ('atlassian_backend:publish_rendered_page', 'publish with atlassian-python-api'),
+}
+
+
+class BackendError(Exception):
+    """Raised when an output backend is unknown or cannot be loaded."""
+
+
+def register_backend(name, target, help_text=''):
+    """Add an output backend implemented by `target`, a 'module:function' string."""
+    BACKENDS[name] = (target, help_text)
+
+
+def load_backend(name):
+    """Import a backend's module and return its output function.
+
+    Output functions take (RenderedPage, destination) and return True when
+    every page was written or published.
+    """
+    if name not in BACKENDS:
+        raise BackendError(f"Unknown output backend '{name}', expected one of {', '.join(sorted(BACKENDS))}")
+    module_name, _, function = BACKENDS[name][0].partition(':')
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise BackendError(f"Output backend '{name}' is not available: {e}") from e
+    return getattr(module, function)
+
+
+def write_stdout(page, destination=None):
+    """Print the page, followed by each child page under a title line."""
+    sys.stdout.write(page.content)
+    for title, content in page.children:
+        sys.stdout.write(f"\n--- {title} ---\n")
+        sys.stdout.write(content)
+    sys.stdout.flush()
+    return True
+
+
+def _file_name(title, output_format):
+    return f"{title.replace(os.sep, '-')}.{OUTPUT_EXTENSIONS[output_format]}"
+
+
+def write_files(page, destination=None):
+    """Write the page and its child pages to files named after their titles."""
+    directory = destination or '.'
+    os.makedirs(directory, exist_ok=True)
+    for title, content in [(page.title, page.content), *page.children]:
+        path = os.path.join(directory, _file_name(title, page.output_format))
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        print(f"📄 Wrote {path}")
+    return True
@@ -0,0 +1,148 @@
+import os
+
+from release_model import Release, ReleaseItem, ReleasePage, ReleaseSection
+from templates.release_renderer import render_page, render_release
+
+# Leave room for the placeholder lines that replace moved content
+SIZE_MARGIN = 0.9
+
+
+def max_page_bytes():
+    """Return CONFLUENCE_MAX_PAGE_BYTES as an int, or None when splitting is off."""
+    value = os.getenv('CONFLUENCE_MAX_PAGE_BYTES')
+    return int(value) if value else None
+
+
+def _size(text):
+    return len(text.encode('utf-8'))
+
+
+def _chunks(items, budget, measure):
+    """Split items into consecutive parts whose rendered size fits `budget`.
+
+    `measure` renders a list of items and returns its size. Each part is
+    filled until one more item would take it over the budget, found by
+    doubling then bisecting the item count, so long and short items are
+    packed by their bytes rather than by their number. An item too large
+    on its own still gets a part of its own.
+    """
+    chunks = []
+    start = 0
+    while start < len(items):
+        remaining = len(items) - start
+        fits, over = 1, remaining + 1
+        # Double the count until a part is too large, then bisect
+        count = 2
+        while count < over:
+            if measure(items[start:start + count]) > budget:
+                over = count
+                break
+            fits = count
+            count = min(count * 2, remaining) if count < remaining else over
+        while over - fits > 1:
+            middle = (fits + over) // 2
+            if measure(items[start:start + middle]) <= budget:
+                fits = middle
+            else:
+                over = middle
+        chunks.append(items[start:start + fits])
+        start += fits
+    return chunks
+
+
+def _part_titles(title, parts):
+    if parts == 1:
+        return [title]
+    return [f"{title} ({number} of {parts})" for number in range(1, parts + 1)]
+
+
+def _titles_text(titles):
+    return ', '.join(f"'{title}'" for title in titles)
+
+
+def split_release(release, title, output_format, max_bytes):
+    """Split a release whose rendered page is larger than `max_bytes`.
+
+    Returns (parent Release, [ReleasePage]). When the page fits, the
+    release is returned as is with no child pages. Otherwise the Jira
+    ticket list and then the largest sections move to child pages titled
+    '<title> - <section>' until the parent fits. The parent keeps the
+    summary and deployment sections, with one line per moved section
+    naming its child page. A section too large for one child page is
+    spread over numbered parts.
+    """
+    remaining = _size(render_release(release, (output_format,))[output_format])
+    if remaining <= max_bytes:
+        return release, []
+
+    budget = max_bytes * SIZE_MARGIN
+    candidates = []
+    if release.tickets:
+        page = ReleasePage(f"{title} - Jira Tickets", tickets=release.tickets)
+        candidates.append((_size(render_page(page, (output_format,))[output_format]), None))
+    sizes = [
+        (_size(render_page(ReleasePage(title, [section]), (output_format,))[output_format]), section)
+        for section in release.sections if section.items
+    ]
+    candidates.extend(sorted(sizes, key=lambda pair: pair[0], reverse=True))
+
+    moved = {}
+    for size, section in candidates:
+        if remaining <= budget:
+            break
+        moved[section.key if section else None] = size
+        remaining -= size
+
+    pages = []
+    sections = []
+    for section in release.sections:
+        if section.key not in moved:
+            sections.append(section)
+            continue
+        def section_page(part_title, items, section=section):
+            return ReleasePage(part_title, [ReleaseSection(
+                section.key, section.title, items, section.empty_text, section.link_label
+            )])
+
+        # Parts are measured under the longest title they can get
+        longest = f"{title} - {section.title} ({len(section.items)} of {len(section.items)})"
+        chunks = _chunks(section.items, budget, lambda items: _size(
+            render_page(section_page(longest, items), (output_format,))[output_format]))
+        titles = _part_titles(f"{title} - {section.title}", len(chunks))
+        for part_title, items in zip(titles, chunks):
+            pages.append(section_page(part_title, items))
+        sections.append(ReleaseSection(section.key, section.title, [ReleaseItem(
+            f"{len(section.items)} changes, listed on {_titles_text(titles)}"
+        )], section.empty_text, link_label=None))
+
+    tickets = release.tickets
+    tickets_empty_text = release.tickets_empty_text
+    if None in moved:
+        longest = f"{title} - Jira Tickets ({len(tickets)} of {len(tickets)})"
+        chunks = _chunks(tickets, budget, lambda part: _size(
+            render_page(ReleasePage(longest, tickets=part), (output_format,))[output_format]))
+        titles = _part_titles(f"{title} - Jira Tickets", len(chunks))
+        for part_title, part in zip(titles, chunks):
+            pages.append(ReleasePage(part_title, tickets=part))
+        tickets_empty_text = f"{len(tickets)} tickets, listed on {_titles_text(titles)}"
+        tickets = []
+
+    parent = Release(
+        release.version, release.release_type, sections, tickets, release.owner,
+        release.last_updated, tickets_empty_text, release.backward_compatible,
+        release.upgrade_steps, release.rollback_steps, release.major_rollback_steps,
+        release.dependencies, release.stats
+    )
+    return parent, pages
+
+
+def render_release_pages(release, title, output_format, max_bytes=None):
+    """Render a release page and, when it is over `max_bytes`, its child pages.
+
+    Returns (content, [(child title, child content)]).
+    """
+    pages = []
+    if max_bytes:
+        release, pages = split_release(release, title, output_format, max_bytes)
+    children = [(page.title, render_page(page, (output_format,))[output_format]) for page in pages]
+    return render_release(release, (output_format,))[output_format], children
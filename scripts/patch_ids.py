@@ -0,0 +1,106 @@
+import subprocess
+import tempfile
+import threading
+
+import instrumentation
+from release_cache import open_patch_id_cache
+
+
+def compute_patch_ids(shas, cwd=None):
+    """Return {sha: patch_id} for many commits through one pipe.
+
+    All SHAs are fed to a single `git diff-tree --stdin -p` whose output
+    goes straight into `git patch-id --stable`, so the cost is two
+    processes whatever the number of commits. Commits without a diff of
+    their own (merges, empty commits) get ''. Raises
+    subprocess.CalledProcessError if either git command fails.
+    """
+    shas = list(shas)
+    if not shas:
+        return {}
+    diff_cmd = ['git', 'diff-tree', '--stdin', '--root', '-p', '--no-color']
+    # stderr is only read once the pipe is drained, so it goes to a file
+    # that cannot fill up and block diff-tree
+    errors = tempfile.TemporaryFile()
+    diff = subprocess.Popen(diff_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=errors, cwd=cwd)
+    patch_id = subprocess.Popen(['git', 'patch-id', '--stable'], stdin=diff.stdout,
+                                stdout=subprocess.PIPE, cwd=cwd)
+    diff.stdout.close()
+    instrumentation.count('git_processes', 2)
+
+    # Feed SHAs from a thread: diff-tree blocks on a full pipe until
+    # patch-id output is read below
+    def feed():
+        try:
+            diff.stdin.write(''.join(f'{sha}\n' for sha in shas).encode('ascii'))
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                diff.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    found = dict.fromkeys(shas, '')
+    try:
+        for line in patch_id.stdout:
+            fields = line.split()
+            if len(fields) == 2:
+                found[fields[1].decode('ascii')] = fields[0].decode('ascii')
+    finally:
+        writer.join()
+        patch_id.stdout.close()
+        diff.wait()
+        errors.seek(0)
+        stderr = errors.read().decode('utf-8', errors='replace')
+        errors.close()
+        patch_id.wait()
+    if diff.returncode != 0:
+        raise subprocess.CalledProcessError(diff.returncode, diff_cmd, stderr=stderr)
+    if patch_id.returncode != 0:
+        raise subprocess.CalledProcessError(patch_id.returncode, ['git', 'patch-id', '--stable'])
+    return found
+
+
+def get_patch_ids(shas, cache=None, cwd=None):
+    """Return {sha: patch_id}, computing only the SHAs missing from the cache."""
+    own_cache = cache is None
+    if own_cache:
+        cache = open_patch_id_cache(cwd)
+    try:
+        patch_ids = cache.get_many(shas)
+        missing = [sha for sha in shas if sha not in patch_ids]
+        computed = compute_patch_ids(missing, cwd)
+        cache.put_many(computed)
+        patch_ids.update(computed)
+        instrumentation.count('patch_ids_cached', len(shas) - len(missing))
+        instrumentation.count('patch_ids_computed', len(missing))
+        return patch_ids
+    finally:
+        if own_cache:
+            cache.close()
+
+
+def dedupe_commits(commits, cache=None, cwd=None):
+    """Drop cherry-picks and backports: keep the first commit of each patch ID.
+
+    Commits are compared by what they change rather than by subject, so a
+    backport with an edited subject is dropped, while distinct commits
+    that happen to share a subject are both kept. Commits without a diff
+    of their own are never treated as duplicates.
+    """
+    commits = list(commits)
+    patch_ids = get_patch_ids([commit.sha for commit in commits], cache, cwd)
+    seen = set()
+    unique = []
+    for commit in commits:
+        patch_id = patch_ids.get(commit.sha)
+        if patch_id:
+            if patch_id in seen:
+                continue
+            seen.add(patch_id)
+        unique.append(commit)
+    return unique
@@ -0,0 +1,581 @@
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+CACHE_FILENAME = 'release-notes-cache.sqlite3'
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_MAX_SEGMENTS = 5000
+DEFAULT_JIRA_TTL = 3600
+# Evict a little below the limit so a full cache is not trimmed on every write
+EVICTION_SLACK = 0.1
+# Stay well below SQLite's bound-parameter limit
+QUERY_CHUNK_SIZE = 500
+
+
+def _find_git_dir(start):
+    """Locate the .git directory above `start` without spawning git."""
+    directory = os.path.abspath(start)
+    while True:
+        candidate = os.path.join(directory, '.git')
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            # Worktrees and submodules use a 'gitdir: <path>' pointer file
+            with open(candidate, encoding='utf-8') as pointer:
+                content = pointer.read().strip()
+            if content.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(directory, content[len('gitdir:'):].strip()))
+            return None
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def git_dir(cwd=None):
+    """Return the absolute .git directory of the current repository, or None."""
+    if os.getenv('GIT_DIR'):
+        return os.path.abspath(os.getenv('GIT_DIR'))
+    try:
+        found = _find_git_dir(cwd or os.getcwd())
+    except OSError:
+        found = None
+    if found:
+        return found
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--absolute-git-dir'],
+            capture_output=True, text=True, check=True, cwd=cwd
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def git_common_dir(cwd=None):
+    """Return the directory holding refs shared by all worktrees, or None."""
+    directory = git_dir(cwd)
+    if not directory:
+        return None
+    commondir = os.path.join(directory, 'commondir')
+    if os.path.isfile(commondir):
+        with open(commondir, encoding='utf-8') as pointer:
+            return os.path.normpath(os.path.join(directory, pointer.read().strip()))
+    return directory
+
+
+def default_cache_path(cwd=None):
+    """Resolve the cache database path.
+
+    RELEASE_NOTES_CACHE overrides the location; RELEASE_NOTES_NO_CACHE
+    disables caching. By default the database lives in the repository's
+    .git directory so it is never committed and is shared by all runs.
+    """
+    if os.getenv('RELEASE_NOTES_NO_CACHE'):
+        return None
+    if os.getenv('RELEASE_NOTES_CACHE'):
+        return os.getenv('RELEASE_NOTES_CACHE')
+    directory = git_dir(cwd)
+    return os.path.join(directory, CACHE_FILENAME) if directory else None
+
+
+def connect(path):
+    """Open the cache database and make sure its schema exists."""
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS classifications ('
+        ' sha TEXT NOT NULL,'
+        ' rules TEXT NOT NULL,'
+        ' category TEXT,'
+        ' description TEXT,'
+        ' ticket TEXT,'
+        ' last_used REAL NOT NULL,'
+        ' PRIMARY KEY (sha, rules))'
+    )
+    connection.execute(
+        'CREATE INDEX IF NOT EXISTS classifications_last_used '
+        'ON classifications (last_used)'
+    )
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS segments ('
+        ' from_sha TEXT NOT NULL,'
+        ' to_sha TEXT NOT NULL,'
+        ' rules TEXT NOT NULL,'
+        ' payload TEXT NOT NULL,'
+        ' last_used REAL NOT NULL,'
+        ' PRIMARY KEY (from_sha, to_sha, rules))'
+    )
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS confluence_pages ('
+        ' base_url TEXT NOT NULL,'
+        ' space TEXT NOT NULL,'
+        ' title TEXT NOT NULL,'
+        ' page_id TEXT NOT NULL,'
+        ' version INTEGER NOT NULL,'
+        ' body_hash TEXT,'
+        ' PRIMARY KEY (base_url, space, title))'
+    )
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS watermarks ('
+        ' name TEXT NOT NULL,'
+        ' rules TEXT NOT NULL,'
+        ' base_sha TEXT NOT NULL,'
+        ' head_sha TEXT NOT NULL,'
+        ' payload TEXT NOT NULL,'
+        ' updated_at REAL NOT NULL,'
+        ' PRIMARY KEY (name, rules))'
+    )
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS patch_ids ('
+        ' sha TEXT PRIMARY KEY,'
+        ' patch_id TEXT NOT NULL)'
+    )
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS jira_issues ('
+        ' base_url TEXT NOT NULL,'
+        ' issue_key TEXT NOT NULL,'
+        ' payload TEXT,'
+        ' fetched_at REAL NOT NULL,'
+        ' PRIMARY KEY (base_url, issue_key))'
+    )
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(confluence_pages)')}
+    if 'body_hash' not in columns:
+        connection.execute('ALTER TABLE confluence_pages ADD COLUMN body_hash TEXT')
+    return connection
+
+
+def _chunks(items, size=QUERY_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class CacheStore:
+    """Base for the stores kept in the shared cache database.
+
+    A store created without a path is disabled: lookups miss and writes
+    are ignored, so callers never need to special-case it. A store whose
+    database fails is disabled the same way, with one warning naming it.
+    """
+
+    name = 'Cache'
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        if path:
+            try:
+                self._connection = connect(path)
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    @property
+    def enabled(self):
+        return self._connection is not None
+
+    def _disable(self, error):
+        print(f"⚠️ {self.name} disabled: {error}")
+        self.close()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ClassificationCache(CacheStore):
+    """On-disk cache of commit classifications keyed by SHA and rules hash.
+
+    A commit's category, cleaned description and ticket never change, so
+    they are stored per (full SHA, classifier rules hash). Changing the
+    rules changes the hash, which makes every old entry a miss; stale
+    entries are no longer touched and are the first to go when the cache
+    is trimmed back to `max_entries` by least-recent use.
+    """
+
+    name = 'Classification cache'
+
+    def __init__(self, path, rules_hash, max_entries=DEFAULT_MAX_ENTRIES):
+        self.rules_hash = rules_hash
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = 0
+        super().__init__(path)
+        if self.enabled:
+            try:
+                self._entries = self._count()
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    def _count(self):
+        return self._connection.execute('SELECT COUNT(*) FROM classifications').fetchone()[0]
+
+    def get_many(self, shas):
+        """Return {sha: (category, description, ticket)} for cached SHAs."""
+        if not self.enabled or not shas:
+            return {}
+        found = {}
+        now = time.time()
+        try:
+            with self._connection:
+                for chunk in _chunks(list(shas)):
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self._connection.execute(
+                        f'SELECT sha, category, description, ticket FROM classifications '
+                        f'WHERE rules = ? AND sha IN ({placeholders})',
+                        (self.rules_hash, *chunk)
+                    ).fetchall()
+                    for sha, category, description, ticket in rows:
+                        found[sha] = (category, description, ticket)
+                    if rows:
+                        self._connection.execute(
+                            f'UPDATE classifications SET last_used = ? '
+                            f'WHERE rules = ? AND sha IN ({placeholders})',
+                            (now, self.rules_hash, *chunk)
+                        )
+        except sqlite3.Error as e:
+            self._disable(e)
+            return {}
+        self.hits += len(found)
+        self.misses += len(shas) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """Store (sha, category, description, ticket) tuples."""
+        if not self.enabled or not entries:
+            return
+        now = time.time()
+        try:
+            with self._connection:
+                before = self._connection.total_changes
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO classifications '
+                    '(sha, rules, category, description, ticket, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(sha, self.rules_hash, category, description, ticket, now)
+                     for sha, category, description, ticket in entries]
+                )
+                # Replacing a stored SHA also counts as a change, so the
+                # running total can only overestimate; recount before trimming
+                self._entries += self._connection.total_changes - before
+                if self._entries > self.max_entries:
+                    self._entries = self._count()
+                if self._entries > self.max_entries:
+                    self._evict()
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def _evict(self):
+        target = int(self.max_entries * (1 - EVICTION_SLACK))
+        excess = self._entries - target
+        self._connection.execute(
+            'DELETE FROM classifications WHERE rowid IN ('
+            ' SELECT rowid FROM classifications ORDER BY last_used LIMIT ?)',
+            (excess,)
+        )
+        self._entries = self._count()
+
+
+class SegmentStore(CacheStore):
+    """On-disk snapshots of categorized release segments.
+
+    A segment is the commit range between two adjacent release tags,
+    keyed by the commits the tags point to and the classifier rules hash,
+    so a moved tag or a rules change simply misses. Payloads are the
+    JSON-serializable snapshots built by the caller.
+    """
+
+    name = 'Segment snapshots'
+
+    def __init__(self, path, rules_hash, max_entries=DEFAULT_MAX_SEGMENTS):
+        self.rules_hash = rules_hash
+        self.max_entries = max_entries
+        super().__init__(path)
+
+    def get(self, from_sha, to_sha):
+        """Return the stored snapshot for a segment, or None."""
+        if not self.enabled:
+            return None
+        try:
+            with self._connection:
+                row = self._connection.execute(
+                    'SELECT payload FROM segments '
+                    'WHERE from_sha = ? AND to_sha = ? AND rules = ?',
+                    (from_sha, to_sha, self.rules_hash)
+                ).fetchone()
+                if row:
+                    self._connection.execute(
+                        'UPDATE segments SET last_used = ? '
+                        'WHERE from_sha = ? AND to_sha = ? AND rules = ?',
+                        (time.time(), from_sha, to_sha, self.rules_hash)
+                    )
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, from_sha, to_sha, snapshot):
+        """Store a segment snapshot, trimming the oldest when over the limit."""
+        if not self.enabled:
+            return
+        try:
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO segments '
+                    '(from_sha, to_sha, rules, payload, last_used) VALUES (?, ?, ?, ?, ?)',
+                    (from_sha, to_sha, self.rules_hash, json.dumps(snapshot), time.time())
+                )
+                self._connection.execute(
+                    'DELETE FROM segments WHERE rowid IN ('
+                    ' SELECT rowid FROM segments ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+
+Watermark = namedtuple('Watermark', ['base_sha', 'head_sha', 'snapshot'])
+
+
+class WatermarkStore(CacheStore):
+    """Last processed commit and categorized model for incremental runs.
+
+    Each entry is named after the range it covers (e.g. 'v2.0.0..release/2.x')
+    and records the commit the range starts from, the last commit that
+    was processed and a snapshot of the categorized range up to it. Like
+    SegmentStore, entries are keyed by the classifier rules hash.
+    """
+
+    name = 'Incremental watermarks'
+
+    def __init__(self, path, rules_hash):
+        self.rules_hash = rules_hash
+        super().__init__(path)
+
+    def get(self, name):
+        """Return the Watermark stored for a range, or None."""
+        if not self.enabled:
+            return None
+        try:
+            row = self._connection.execute(
+                'SELECT base_sha, head_sha, payload FROM watermarks WHERE name = ? AND rules = ?',
+                (name, self.rules_hash)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        return Watermark(row[0], row[1], json.loads(row[2])) if row else None
+
+    def put(self, name, base_sha, head_sha, snapshot):
+        if not self.enabled:
+            return
+        try:
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO watermarks '
+                    '(name, rules, base_sha, head_sha, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (name, self.rules_hash, base_sha, head_sha, json.dumps(snapshot), time.time())
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+
+class PatchIdCache(CacheStore):
+    """On-disk cache of `git patch-id --stable` results keyed by commit SHA.
+
+    A commit's diff never changes, so its patch ID is stored once for good.
+    Commits without a diff of their own, such as merges, are stored with
+    an empty patch ID so they are not diffed again.
+    """
+
+    name = 'Patch ID cache'
+
+    def get_many(self, shas):
+        """Return {sha: patch_id} for cached SHAs; '' means the commit has no diff."""
+        if not self.enabled or not shas:
+            return {}
+        found = {}
+        try:
+            for chunk in _chunks(list(shas)):
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._connection.execute(
+                    f'SELECT sha, patch_id FROM patch_ids WHERE sha IN ({placeholders})', chunk
+                ).fetchall())
+        except sqlite3.Error as e:
+            self._disable(e)
+            return {}
+        return found
+
+    def put_many(self, patch_ids):
+        """Store {sha: patch_id}."""
+        if not self.enabled or not patch_ids:
+            return
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO patch_ids (sha, patch_id) VALUES (?, ?)',
+                    patch_ids.items()
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+
+class PageCache(CacheStore):
+    """Local map of Confluence page titles to page id, version and body hash.
+
+    With the id and version known, republishing a page is a single PUT
+    instead of a title search followed by an update, and with the hash of
+    the last published body an unchanged page needs no call at all.
+    Entries can go stale if someone edits the page by hand; callers refresh
+    them on a version conflict.
+    """
+
+    name = 'Confluence page cache'
+
+    def __init__(self, path):
+        # The cache is shared by publisher threads
+        self._lock = threading.Lock()
+        super().__init__(path)
+
+    def get(self, base_url, space, title):
+        """Return (page_id, version, body_hash) for a page, or None."""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    'SELECT page_id, version, body_hash FROM confluence_pages '
+                    'WHERE base_url = ? AND space = ? AND title = ?',
+                    (base_url, space, title)
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        return tuple(row) if row else None
+
+    def put(self, base_url, space, title, page_id, version, body_hash=None):
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO confluence_pages '
+                    '(base_url, space, title, page_id, version, body_hash) VALUES (?, ?, ?, ?, ?, ?)',
+                    (base_url, space, title, str(page_id), version, body_hash)
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def forget(self, base_url, space, title):
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    'DELETE FROM confluence_pages WHERE base_url = ? AND space = ? AND title = ?',
+                    (base_url, space, title)
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+
+class JiraIssueCache(CacheStore):
+    """On-disk cache of Jira issue fields with a time-to-live.
+
+    Issues are stored as JSON payloads keyed by Jira base URL and issue
+    key. A None payload records a key Jira did not return, so unknown
+    keys are not searched for again until the entry expires. Entries
+    older than `ttl` seconds are misses.
+    """
+
+    name = 'Jira issue cache'
+
+    def __init__(self, path, ttl=DEFAULT_JIRA_TTL):
+        self.ttl = ttl
+        # Enrichment batches complete on worker threads
+        self._lock = threading.Lock()
+        super().__init__(path)
+
+    def get_many(self, base_url, keys):
+        """Return {key: payload} for fresh entries; payload is None for unknown keys."""
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        oldest = time.time() - self.ttl
+        try:
+            with self._lock:
+                for chunk in _chunks(list(keys)):
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self._connection.execute(
+                        f'SELECT issue_key, payload FROM jira_issues '
+                        f'WHERE base_url = ? AND fetched_at >= ? AND issue_key IN ({placeholders})',
+                        (base_url, oldest, *chunk)
+                    ).fetchall()
+                    for key, payload in rows:
+                        found[key] = json.loads(payload) if payload is not None else None
+        except sqlite3.Error as e:
+            self._disable(e)
+            return {}
+        return found
+
+    def put_many(self, base_url, payloads):
+        """Store {key: payload}, replacing older entries."""
+        if not self.enabled or not payloads:
+            return
+        now = time.time()
+        try:
+            with self._lock, self._connection:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO jira_issues (base_url, issue_key, payload, fetched_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    [(base_url, key, json.dumps(payload) if payload is not None else None, now)
+                     for key, payload in payloads.items()]
+                )
+                self._connection.execute(
+                    'DELETE FROM jira_issues WHERE fetched_at < ?', (now - self.ttl,)
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+
+def open_classification_cache(rules_hash, cwd=None):
+    """Open the default classification cache for a classifier's rules."""
+    max_entries = int(os.getenv('RELEASE_NOTES_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+    return ClassificationCache(default_cache_path(cwd), rules_hash, max_entries)
+
+
+def open_segment_store(rules_hash, cwd=None):
+    """Open the default segment snapshot store for a classifier's rules."""
+    return SegmentStore(default_cache_path(cwd), rules_hash)
+
+
+def open_watermark_store(rules_hash, cwd=None):
+    """Open the default incremental watermark store for a classifier's rules."""
+    return WatermarkStore(default_cache_path(cwd), rules_hash)
+
+
+def open_patch_id_cache(cwd=None):
+    """Open the default patch ID cache."""
+    return PatchIdCache(default_cache_path(cwd))
+
+
+def open_page_cache(cwd=None):
+    """Open the default Confluence page cache."""
+    return PageCache(default_cache_path(cwd))
+
+
+def open_jira_cache(cwd=None):
+    """Open the default Jira issue cache; JIRA_CACHE_TTL sets the lifetime in seconds."""
+    ttl = float(os.getenv('JIRA_CACHE_TTL', DEFAULT_JIRA_TTL))
+    return JiraIssueCache(default_cache_path(cwd), ttl)
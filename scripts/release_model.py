@@ -0,0 +1,148 @@
+class ReleaseItem:
+    """One change listed in a release section, as plain text.
+
+    `ticket` is the Jira key linked from the item, if any. Markup is only
+    produced by the renderer, so the same item can be written as storage
+    XHTML, wiki markup, Markdown or JSON. Sections may also hold any other
+    object with `text` and `ticket` attributes, such as classified
+    CommitRecords, so items do not need to be copied for rendering.
+    """
+
+    __slots__ = ('text', 'ticket')
+
+    def __init__(self, text, ticket=None):
+        self.text = text
+        self.ticket = ticket
+
+
+class ReleaseSection:
+    """A titled list of release items, e.g. 'New features'.
+
+    `empty_text` is shown when the section has no items and `link_label`
+    prefixes an item's ticket link; with no label, ticket links are left out.
+    """
+
+    __slots__ = ('key', 'title', 'items', 'empty_text', 'link_label')
+
+    def __init__(self, key, title, items=None, empty_text='No', link_label='Ticket Link'):
+        self.key = key
+        self.title = title
+        self.items = items if items is not None else []
+        self.empty_text = empty_text
+        self.link_label = link_label
+
+
+class TicketRef:
+    """A Jira ticket referenced by the release.
+
+    `description` is text taken from the commits; `summary`, `status` and
+    `fix_versions` come from Jira when tickets are enriched.
+    """
+
+    __slots__ = ('key', 'description', 'summary', 'status', 'fix_versions')
+
+    def __init__(self, key, description='', summary='', status='', fix_versions=()):
+        self.key = key
+        self.description = description
+        self.summary = summary
+        self.status = status
+        self.fix_versions = fix_versions
+
+    @classmethod
+    def from_issue(cls, key, issue=None, description=''):
+        """Build a TicketRef from an optional JiraIssue."""
+        if issue is None:
+            return cls(key, description)
+        return cls(key, description, issue.summary, issue.status, issue.fix_versions)
+
+    @property
+    def title(self):
+        """The Jira summary when known, else the description from the commits."""
+        return self.summary or self.description
+
+
+class Release:
+    """Everything needed to render one page of release notes.
+
+    Change sections come first, followed by the fixed deployment sections
+    (backward compatibility, upgrade and rollback steps, dependencies) and
+    the list of Jira tickets. Optional header fields left as None are not
+    rendered. `stats` is an optional ReleaseStatistics.
+    """
+
+    __slots__ = (
+        'version', 'release_type', 'owner', 'last_updated', 'sections', 'tickets',
+        'tickets_empty_text', 'backward_compatible', 'upgrade_steps', 'rollback_steps',
+        'major_rollback_steps', 'dependencies', 'stats',
+    )
+
+    def __init__(self, version, release_type, sections, tickets=None, owner=None,
+                 last_updated=None, tickets_empty_text='None', backward_compatible='Yes',
+                 upgrade_steps='', rollback_steps='', major_rollback_steps='',
+                 dependencies='N/A', stats=None):
+        self.version = version
+        self.release_type = release_type
+        self.owner = owner
+        self.last_updated = last_updated
+        self.sections = sections
+        self.tickets = tickets if tickets is not None else []
+        self.tickets_empty_text = tickets_empty_text
+        self.backward_compatible = backward_compatible
+        self.upgrade_steps = upgrade_steps
+        self.rollback_steps = rollback_steps
+        self.major_rollback_steps = major_rollback_steps
+        self.dependencies = dependencies
+        self.stats = stats
+
+    def deployment_sections(self):
+        """Return the fixed (title, text) sections that follow the changes."""
+        return [
+            ('Backward Compatible Version', self.backward_compatible),
+            ('Upgrade Steps', self.upgrade_steps),
+            ('Rollback Steps', self.rollback_steps),
+            ('Rollback Steps for Major Release', self.major_rollback_steps),
+            ('External Dependencies', self.dependencies),
+        ]
+
+    def item_count(self):
+        return sum(len(section.items) for section in self.sections)
+
+
+class ReleasePage:
+    """A child page holding part of a release that did not fit on its page.
+
+    Holds one or more sections, or the Jira ticket list, under its own
+    title. `tickets` is None for pages without a ticket list.
+    """
+
+    __slots__ = ('title', 'sections', 'tickets', 'tickets_empty_text')
+
+    def __init__(self, title, sections=None, tickets=None, tickets_empty_text='None'):
+        self.title = title
+        self.sections = sections if sections is not None else []
+        self.tickets = tickets
+        self.tickets_empty_text = tickets_empty_text
+
+
+class ReleaseStatistics:
+    """The size of a release and who made it, shown after the change sections.
+
+    `categories` is [(section title, changes)], `top_authors` is
+    [(author, commits)] and `top_directories` is [(directory, lines
+    changed)], largest first. Author and file counts of very large
+    releases are estimates.
+    """
+
+    __slots__ = ('commits', 'authors', 'added', 'deleted', 'files', 'categories', 'top_authors',
+                 'top_directories')
+
+    def __init__(self, commits, authors, added, deleted, files, categories, top_authors=(),
+                 top_directories=()):
+        self.commits = commits
+        self.authors = authors
+        self.added = added
+        self.deleted = deleted
+        self.files = files
+        self.categories = categories
+        self.top_authors = top_authors
+        self.top_directories = top_directories
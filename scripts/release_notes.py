@@ -0,0 +1,112 @@
+import argparse
+import contextlib
+import os
+import sys
+
+import instrumentation
+from output_backends import BACKENDS, BackendError, RenderedPage, load_backend
+from page_splitter import max_page_bytes, render_release_pages
+from release_cache import open_classification_cache, open_segment_store
+from release_stats import ReleaseStats
+from generate_release_notes import (
+    CLASSIFICATION_KEY,
+    SEGMENT_KEY,
+    build_release,
+    categorize_range,
+)
+from tag_index import load_tag_index
+from templates.release_renderer import WRITERS
+
+
+def build_page(from_tag, to_tag, title, output_format, enrich=True, with_stats=False):
+    """Categorize a tag range and render it, with child pages when it is too large."""
+    tags = load_tag_index()
+    for tag in (from_tag, to_tag):
+        if tag not in tags:
+            print(f"❌ Tag '{tag}' not found in repository")
+            print("Available tags:", ', '.join(tags.names()))
+            sys.exit(1)
+
+    stats = ReleaseStats() if with_stats else None
+    with instrumentation.stage('categorize'), \
+            open_classification_cache(CLASSIFICATION_KEY) as cache, \
+            open_segment_store(SEGMENT_KEY) as segments:
+        categories, jira_tickets = categorize_range(from_tag, to_tag, cache, segments, stats)
+    instrumentation.gauge('tickets', len(jira_tickets))
+    if not any(categories.values()):
+        print("❌ No changes found between tags")
+        sys.exit(1)
+
+    issues = {}
+    if enrich and os.getenv('JIRA_BASE_URL'):
+        from jira_client import enrich_tickets
+        try:
+            with instrumentation.stage('enrich'):
+                issues = enrich_tickets(jira_tickets)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    with instrumentation.stage('render'):
+        release = build_release(categories, jira_tickets, to_tag, issues, stats)
+        content, children = render_release_pages(release, title, output_format, max_page_bytes())
+    instrumentation.gauge('content_bytes', len(content.encode('utf-8')))
+    instrumentation.gauge('child_pages', len(children))
+    return RenderedPage(title, content, children, output_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate release notes for a tag range and send them to an output backend.',
+        epilog='Output backends: ' + '; '.join(f"{name}: {help_text}" for name, (_, help_text) in BACKENDS.items()),
+    )
+    parser.add_argument('--from-tag', required=True, help='Starting tag for range')
+    parser.add_argument('--to-tag', required=True, help='Ending tag for range')
+    parser.add_argument('--output', default='stdout', choices=sorted(BACKENDS),
+                        help='Where the page goes (default: stdout)')
+    parser.add_argument('--format', dest='output_format', default='storage', choices=sorted(WRITERS),
+                        help='Output format (default: storage)')
+    parser.add_argument('--title', help="Page title (default: PAGE_TITLE, or '<to-tag> Release Notes')")
+    parser.add_argument('--destination', help='Directory for the file backend (default: current directory)')
+    parser.add_argument('--stats', action='store_true',
+                        help='Add commit, author and change-size statistics (reads --numstat in the same walk)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the page instead of sending it, without Jira or Confluence requests')
+    args = parser.parse_args()
+    title = args.title or os.getenv('PAGE_TITLE') or f"{args.to_tag} Release Notes"
+
+    # Load the backend first, so a missing package fails before any work
+    try:
+        output = load_backend('stdout' if args.dry_run else args.output)
+    except BackendError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    # Keep standard output for the page itself when printing it
+    to_stdout = args.dry_run or args.output == 'stdout'
+    messages = contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext()
+    with messages:
+        # Log records go wherever standard output points now
+        instrumentation.configure_logging()
+    try:
+        with messages:
+            print(f"🔍 Generating release notes from {args.from_tag} to {args.to_tag}")
+            page = build_page(args.from_tag, args.to_tag, title, args.output_format,
+                              enrich=not args.dry_run, with_stats=args.stats)
+            if args.dry_run and args.output != 'stdout':
+                print(f"⏭️ Dry run: not sending '{title}' ({len(page.children)} child pages) to {args.output}")
+        try:
+            with instrumentation.stage('publish'):
+                published = output(page, args.destination)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if not published:
+            sys.exit(1)
+    finally:
+        with messages:
+            instrumentation.write_report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+import argparse
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import instrumentation
+from tag_index import RELEASE_TAG_RE, load_tag_index
+
+DEFAULT_PORT = 8093
+DEFAULT_MAX_PENDING = 100
+MAX_PAYLOAD_BYTES = 1024 * 1024
+# Finished jobs listed by GET /status
+RECENT_JOBS = 50
+TAG_REF_PREFIX = 'refs/tags/'
+
+
+def load_repositories(path=None, specs=()):
+    """Read {name: {'path', 'space_key', 'ancestor_id'}} for the served repositories.
+
+    The JSON file maps GitHub full names ('org/repo') to a local clone path,
+    or to an object with 'path' and optional 'space_key' and 'ancestor_id'
+    overriding SPACE_KEY and ANCESTOR_ID. Paths are relative to the file.
+    `specs` add 'org/repo=/path' entries from the command line.
+    """
+    repositories = {}
+    if path:
+        with open(path, encoding='utf-8') as config:
+            try:
+                entries = json.load(config)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid repository file {path}: {e}") from e
+        if not isinstance(entries, dict):
+            raise ValueError(f"Repository file {path} must map repository names to paths")
+        base = os.path.dirname(os.path.abspath(path))
+        for name, entry in entries.items():
+            if isinstance(entry, str):
+                entry = {'path': entry}
+            if not entry.get('path'):
+                raise ValueError(f"Repository '{name}' is missing a path")
+            repositories[name] = dict(entry, path=os.path.normpath(os.path.join(base, entry['path'])))
+    for spec in specs:
+        name, separator, repo = spec.partition('=')
+        if not separator or not name or not repo:
+            raise ValueError(f"Invalid repository '{spec}', expected org/repo=/path/to/clone")
+        repositories[name] = {'path': os.path.abspath(repo)}
+    if not repositories:
+        raise ValueError("No repositories configured")
+    return repositories
+
+
+def tag_from_event(event, payload):
+    """Return the tag created by a GitHub 'push' or 'create' event, or None."""
+    if event == 'push':
+        ref = payload.get('ref') or ''
+        if payload.get('deleted') or not ref.startswith(TAG_REF_PREFIX):
+            return None
+        return ref[len(TAG_REF_PREFIX):]
+    if event == 'create' and payload.get('ref_type') == 'tag':
+        return payload.get('ref')
+    return None
+
+
+def signature_valid(secret, body, signature):
+    """Check GitHub's X-Hub-Signature-256 header against the payload."""
+    expected = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or '')
+
+
+def _warm_worker():
+    # Ctrl-C stops the server, which then shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Import the pipeline once per worker rather than once per tag
+    import generate_release_notes  # noqa: F401
+    instrumentation.configure_logging()
+
+
+def _fetch_tags():
+    result = subprocess.run(['git', 'fetch', '--quiet', '--tags'], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"⚠️ git fetch --tags failed: {result.stderr.strip()}")
+
+
+def publish_tag(path, tag, settings):
+    """Generate and publish the notes for a pushed tag; runs in a pool worker.
+
+    The range starts at the release before `tag`, and tags missing from
+    the clone are fetched first. `settings` (PAGE_TITLE, SPACE_KEY, ...)
+    apply to this job only. Workers outlive jobs, so what they load stays
+    warm for the next push: the tag index, the `git cat-file` process,
+    the Confluence client with its page ids, and stored segments mean
+    only the commits since the previous release are walked and
+    classified. Returns (start tag, stage summary).
+    """
+    from generate_release_notes import generate_and_publish
+
+    os.chdir(path)
+    tags = load_tag_index()
+    if tag not in tags:
+        _fetch_tags()
+        tags = load_tag_index()
+        if tag not in tags:
+            raise ValueError(f"Tag '{tag}' not found in {path}")
+    previous = tags.previous_release(tag)
+    if previous is None:
+        raise ValueError(f"No release tag before '{tag}' in {path}")
+
+    instrumentation.metrics.reset()
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        generate_and_publish(previous.name, tag)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return previous.name, instrumentation.metrics.summary()
+
+
+class ReleaseNotesService:
+    """Queue pushed tags and publish them on a bounded pool of worker processes.
+
+    Tags of one repository are published one at a time, in the order they
+    arrive, so two jobs never update the same pages at once; different
+    repositories run in parallel up to `max_workers`. A tag already
+    queued or running is not queued again, since GitHub redelivers
+    webhooks that time out, and at most `max_pending` tags wait.
+    """
+
+    def __init__(self, repositories, max_workers=None, max_pending=DEFAULT_MAX_PENDING,
+                 title_format='{tag} Release Notes'):
+        self.repositories = repositories
+        self.max_pending = max_pending
+        self.title_format = title_format
+        max_workers = max_workers or int(os.getenv('RELEASE_NOTES_DAEMON_WORKERS', os.cpu_count() or 1))
+        # Spawned rather than forked: the HTTP server threads may hold locks
+        self.pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker,
+        )
+        # Reentrant: a future that is already done runs its callback inside submit
+        self._lock = threading.RLock()
+        self._queued = {name: deque() for name in repositories}
+        self._running = {}
+        self.recent = deque(maxlen=RECENT_JOBS)
+
+    def submit(self, name, tag):
+        """Queue a tag; returns 'queued', 'duplicate' or 'full'."""
+        with self._lock:
+            if self._running.get(name) == tag or tag in self._queued[name]:
+                return 'duplicate'
+            if sum(len(queue) for queue in self._queued.values()) >= self.max_pending:
+                return 'full'
+            self._queued[name].append(tag)
+            if name not in self._running:
+                self._start_next(name)
+        return 'queued'
+
+    def _start_next(self, name):
+        # Called with the lock held
+        tag = self._queued[name].popleft()
+        self._running[name] = tag
+        repository = self.repositories[name]
+        settings = {'PAGE_TITLE': self.title_format.format(repository=name, tag=tag)}
+        if repository.get('space_key'):
+            settings['SPACE_KEY'] = repository['space_key']
+        if repository.get('ancestor_id'):
+            settings['ANCESTOR_ID'] = str(repository['ancestor_id'])
+        started = time.perf_counter()
+        future = self.pool.submit(publish_tag, repository['path'], tag, settings)
+        future.add_done_callback(lambda done: self._finished(name, tag, started, done))
+
+    def _finished(self, name, tag, started, future):
+        try:
+            self._report(name, tag, time.perf_counter() - started, future)
+        finally:
+            # Always release the repository, or its later tags would never run
+            with self._lock:
+                del self._running[name]
+                if self._queued[name]:
+                    self._start_next(name)
+
+    def _report(self, name, tag, elapsed, future):
+        error = future.exception()
+        instrumentation.count('daemon_jobs', status='failed' if error else 'published')
+        if error:
+            # A SystemExit has already been explained by the worker's output
+            reason = 'see output above' if isinstance(error, SystemExit) else str(error)
+            self.recent.append({'repository': name, 'tag': tag, 'status': 'failed', 'error': reason,
+                                'seconds': round(elapsed, 3)})
+            print(f"❌ {name} {tag} failed after {elapsed:.1f}s: {reason}")
+        else:
+            start_tag, summary = future.result()
+            self.recent.append({'repository': name, 'tag': tag, 'from_tag': start_tag,
+                                'status': 'published', 'seconds': round(elapsed, 3)})
+            print(f"✅ {name} {start_tag}..{tag} published in {elapsed:.1f}s ({summary})")
+
+    def status(self):
+        with self._lock:
+            return {
+                'running': dict(self._running),
+                'queued': {name: list(queue) for name, queue in self._queued.items() if queue},
+                'recent': list(self.recent),
+            }
+
+    def idle(self):
+        with self._lock:
+            return not self._running and not any(self._queued.values())
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class WebhookServer:
+    """Local HTTP endpoint receiving GitHub tag-push webhooks.
+
+    POST /webhook takes 'push' and 'create' events; tags matching vX.Y.Z
+    in a configured repository are queued on the ReleaseNotesService and
+    answered with 202. Other events and refs are acknowledged and
+    ignored. With `secret`, deliveries must carry a matching
+    X-Hub-Signature-256. GET /status lists running, queued and recent jobs.
+    """
+
+    def __init__(self, service, host='127.0.0.1', port=DEFAULT_PORT, secret=None):
+        self.service = service
+        self.secret = secret
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle_delivery(self, event, body, signature):
+        """Return (HTTP status, response payload) for one webhook delivery."""
+        if self.secret and not signature_valid(self.secret, body, signature):
+            return 401, {'error': 'Invalid signature'}
+        if event == 'ping':
+            return 200, {'status': 'pong'}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'Payload is not JSON'}
+        if not isinstance(payload, dict):
+            return 400, {'error': 'Payload is not a JSON object'}
+
+        tag = tag_from_event(event, payload)
+        if tag is None:
+            return 200, {'status': 'ignored', 'reason': 'not a new tag'}
+        name = (payload.get('repository') or {}).get('full_name')
+        if name not in self.service.repositories:
+            return 404, {'error': f"Repository '{name}' is not served here"}
+        if not RELEASE_TAG_RE.match(tag):
+            return 200, {'status': 'ignored', 'reason': f"'{tag}' is not a release tag"}
+
+        result = self.service.submit(name, tag)
+        if result == 'full':
+            return 503, {'error': 'Too many queued tags, retry later'}
+        print(f"🔍 {name} {tag} {result}")
+        return (202 if result == 'queued' else 200), {'status': result, 'repository': name, 'tag': tag}
+
+    def _handler_class(self):
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if urlparse(self.path).path.rstrip('/') == '/status':
+                    self._reply(200, webhook.service.status())
+                else:
+                    self._reply(404, {'error': 'Not found'})
+
+            def do_POST(self):
+                if urlparse(self.path).path.rstrip('/') != '/webhook':
+                    self._reply(404, {'error': 'Not found'})
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_PAYLOAD_BYTES:
+                    self.close_connection = True
+                    self._reply(413, {'error': 'Payload too large'})
+                    return
+                body = self.rfile.read(length)
+                self._reply(*webhook.handle_delivery(
+                    self.headers.get('X-GitHub-Event'), body, self.headers.get('X-Hub-Signature-256')
+                ))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve a GitHub webhook that publishes release notes for every pushed release tag.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--repos', help='JSON file mapping org/repo names to local clones')
+    parser.add_argument('--repo', dest='repo_specs', action='append', default=[],
+                        help='Serve one repository as org/repo=/path/to/clone (repeatable)')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes (default: RELEASE_NOTES_DAEMON_WORKERS, or one per CPU)')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help='Tags that may wait before deliveries are refused')
+    parser.add_argument('--title-format', default='{tag} Release Notes',
+                        help='Confluence page title, with {repository} and {tag}')
+    args = parser.parse_args()
+
+    try:
+        repositories = load_repositories(args.repos, args.repo_specs)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    instrumentation.configure_logging()
+    service = ReleaseNotesService(repositories, args.workers, args.max_pending, args.title_format)
+    webhook = WebhookServer(service, args.host, args.port, os.getenv('RELEASE_NOTES_WEBHOOK_SECRET'))
+    print(f"🔍 Listening for tag pushes on {webhook.base_url}/webhook "
+          f"for {len(repositories)} repositories")
+    try:
+        webhook.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        webhook.server.server_close()
+        service.close()
+        instrumentation.write_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,81 @@
 import argparse
+import logging
 import os
 import re
 import subprocess
-from datetime import datetime
-from github import Github
-from confluence_publisher import publish_to_confluence
+import sys
+from release_model import Release, ReleaseSection, TicketRef
+from templates.release_renderer import render_release
+from commit_classifier import CommitClassifier
+import instrumentation
+from git_log_reader import iter_git_log
+from git_backend import get_backend
+from page_splitter import max_page_bytes, render_release_pages
+from patch_ids import dedupe_commits
+from release_cache import open_classification_cache
+from release_stats import ReleaseStats
+from tag_index import parse_version
 
-def get_git_commits(from_tag=None, to_tag=None):
-    """Get commits from local git repository."""
+logger = logging.getLogger(__name__)
+
+def single_tag_range(tag):
+    """Return (revision range, extra git log args) covering a single tag, or None.
+
+    That is the tagged commit alone or, for a merge, the commits of the
+    merged branch too.
+    """
+    commit = get_backend().read_commit(tag)
+    if commit is None:
+        return None
+    if len(commit.parents) <= 1:
+        return commit.sha, ('-1',)
+    return f'{commit.sha}^..{commit.sha}', ()
+
+def get_git_commits(from_tag=None, to_tag=None, stats=None):
+    """Get commits from local git repository as CommitRecords, one per patch ID.
+
+    With a ReleaseStats, the same walk reads `--numstat` and counts every
+    commit of the range, including duplicates left out of the list.
+    """
     try:
         if from_tag and to_tag:
-            cmd = ['git', 'log', '--pretty=format:%s', f'{from_tag}..{to_tag}']
+            revision_range = f'{from_tag}..{to_tag}'
         else:
-            # For single tag, limit to first occurrence
-            cmd = ['git', 'log', '-n', '1', '--pretty=format:%H', to_tag]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                commit_hash = result.stdout.strip()
-                cmd = ['git', 'log', '--pretty=format:%s', f'{commit_hash}^..{commit_hash}']
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        print(f"Git command: {' '.join(cmd)}")  # Debug output
-        if result.returncode == 0:
-            commits = [line for line in result.stdout.split('\n') if line]
-            print(f"Raw commit output: {result.stdout}")  # Debug output
-            # Remove duplicate commits
-            return list(dict.fromkeys(commits))
-        print(f"Git command failed with return code: {result.returncode}")  # Debug output
+            # For single tag, read the tagged commit over the persistent pipe
+            commit = get_backend().read_commit(to_tag)
+            if commit is None:
+                logger.error(f"Git revision not found: {to_tag}")
+                return []
+            if len(commit.parents) <= 1:
+                logger.debug(f"Commit subject: {commit.subject}")
+                if stats is not None:
+                    for record, files in iter_git_log(commit.sha, ('-1',), with_numstat=True):
+                        stats.add(record, files)
+                return [commit] if commit.subject else []
+            # A merge also brings in the commits of the merged branch
+            revision_range = f'{commit.sha}^..{commit.sha}'
+
+        logger.debug(f"Git revision range: {revision_range}")
+        if stats is not None:
+            git_log = stats.track(iter_git_log(revision_range, with_numstat=True))
+        else:
+            git_log = iter_git_log(revision_range)
+        commits = [commit for commit in git_log if commit.subject]
+        # Remove cherry-picks and backports of the same change
+        unique = dedupe_commits(commits)
+        if len(unique) < len(commits):
+            logger.info(f"Skipped {len(commits) - len(unique)} duplicate commits")
+        if logger.isEnabledFor(logging.DEBUG):
+            for commit in unique:
+                logger.debug(f"Commit subject: {commit.subject}")
+        return unique
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Git command failed with return code: {e.returncode}")
         return []
     except Exception as e:
-        print(f"Error getting git commits: {str(e)}")
+        logger.error(f"Error getting git commits: {str(e)}")
         return []
 
-def parse_version(tag):
-    """Parse version number from tag."""
-    match = re.match(r'v(\d+)\.(\d+)\.(\d+)', tag)
-    if not match:
-        raise ValueError(f"Invalid tag format: {tag}")
-    return [int(x) for x in match.groups()]
-
 def determine_release_type(from_version, to_version):
     """Determine if release is major, minor, or patch."""
     if from_version[0] != to_version[0]:
@@ -47,26 +84,49 @@ def determine_release_type(from_version, to_version):
         return "Minor"
     return "Patch"
 
+CHANGE_CLASSIFIER = CommitClassifier(
+    [
+        ('features', ['feat:', 'feature:', 'new:']),
+        ('bugs', ['fix:', 'bug:', 'patch:']),
+        ('api_changes', ['api:', 'endpoint:', 'rest:']),
+        ('security', ['security:', 'sec:', 'auth:']),
+        ('ux_enhancements', ['ui:', 'ux:', 'design:']),
+        ('app_updates', ['app:', 'mobile:', 'web:']),
+        ('product_changes', ['prod:', 'product:']),
+    ],
+    r'\[([A-Z]+-\d+)\]'
+)
+TICKET_DESCRIPTION_RE = re.compile(r'\s*(.+?)(?=\[|$)')
+
 def extract_jira_tickets(commit_messages):
     """Extract JIRA ticket references from commit messages."""
     tickets = set()
-    pattern = r'\[([A-Z]+-\d+)\]'
     ticket_details = {}
 
     for message in commit_messages:
         if message:  # Skip empty messages
-            matches = re.findall(pattern, message)
-            for ticket in matches:
+            seen_in_message = set()
+            for ticket, match in CHANGE_CLASSIFIER.iter_tickets(message):
                 tickets.add(ticket)
+                if ticket in seen_in_message:
+                    continue
+                seen_in_message.add(ticket)
                 # Extract description after the ticket reference
-                desc_match = re.search(rf'\[{ticket}\]\s*(.+?)(?=\[|$)', message)
+                desc_match = TICKET_DESCRIPTION_RE.match(message, match.end())
                 if desc_match:
                     ticket_details[ticket] = desc_match.group(1).strip()
 
     return sorted(list(tickets)), ticket_details
 
-def categorize_changes(commit_messages):
-    """Categorize changes based on commit messages."""
+def categorize_changes(commits, cache=None):
+    """Categorize changes based on commit subjects.
+
+    Each category lists the classified CommitRecords themselves, with
+    `ticket` set to the first JIRA reference in the subject. Commits are
+    expected to be unique by patch ID, as returned by get_git_commits. When
+    a ClassificationCache is given, only commits it has never seen are
+    classified; the rest are looked up by SHA.
+    """
     categories = {
         'features': [],
         'bugs': [],
@@ -77,44 +137,90 @@ def categorize_changes(commit_messages):
         'security': []
     }
 
-    seen_messages = set()  # Track unique messages
-    for msg in commit_messages:
-        if not msg or msg in seen_messages:  # Skip empty or duplicate messages
+    cached = cache.get_many([commit.sha for commit in commits]) if cache else {}
+    parsed = []
+    for commit in commits:
+        if not commit.subject:  # Skip empty messages
             continue
-        seen_messages.add(msg)
-        msg_lower = msg.lower()
-
-        # Enhanced categorization based on prefixes and keywords
-        if any(prefix in msg_lower for prefix in ['feat:', 'feature:', 'new:']):
-            categories['features'].append(msg)
-        elif any(prefix in msg_lower for prefix in ['fix:', 'bug:', 'patch:']):
-            categories['bugs'].append(msg)
-        elif any(prefix in msg_lower for prefix in ['api:', 'endpoint:', 'rest:']):
-            categories['api_changes'].append(msg)
-        elif any(prefix in msg_lower for prefix in ['security:', 'sec:', 'auth:']):
-            categories['security'].append(msg)
-        elif any(prefix in msg_lower for prefix in ['ui:', 'ux:', 'design:']):
-            categories['ux_enhancements'].append(msg)
-        elif any(prefix in msg_lower for prefix in ['app:', 'mobile:', 'web:']):
-            categories['app_updates'].append(msg)
-        elif any(prefix in msg_lower for prefix in ['prod:', 'product:']):
-            categories['product_changes'].append(msg)
 
+        if commit.sha in cached:
+            commit.classify(*cached[commit.sha])
+        else:
+            # Single scan over the message against all prefixes and keywords
+            category, ticket = CHANGE_CLASSIFIER.classify(commit.subject)
+            parsed.append((commit.sha, category, None, ticket))
+            commit.classify(category, None, ticket)
+        if commit.category:
+            categories[commit.category].append(commit)
+
+    if cache:
+        cache.put_many(parsed)
     return categories
 
-def format_jira_link(ticket, description=''):
-    """Format JIRA ticket link with description."""
-    base_url = "https://sinhaludyog.atlassian.net/browse"
-    if description:
-        return f"[{ticket}] {description} - {base_url}/{ticket}"
-    return f"[{ticket}] - {base_url}/{ticket}"
+CHANGE_SECTIONS = [
+    ('features', 'New features', 'No new features'),
+    ('product_changes', 'Product changes', 'No'),
+    ('bugs', 'Bug fixes', 'No'),
+    ('app_updates', 'App updates', 'No'),
+    ('api_changes', 'API changes', 'No'),
+    ('ux_enhancements', 'User experience enhancements', 'No'),
+    ('security', 'Security updates', 'No'),
+]
+# Sections whose items link to their JIRA ticket, with the link label
+LINKED_SECTIONS = {'features': 'Ticket Link', 'bugs': 'Ticket'}
+
+def build_release(to_tag, release_type, changes, jira_tickets, ticket_details, issues=None, stats=None):
+    """Build the Release model from categorized changes.
+
+    `issues` maps ticket keys to JiraIssues; their Jira summary is shown in
+    place of the description scraped from the commit. `stats` is an
+    optional ReleaseStats of the range.
+    """
+    issues = issues or {}
+    sections = []
+    for key, title, empty_text in CHANGE_SECTIONS:
+        sections.append(ReleaseSection(
+            key, title, changes[key], empty_text=empty_text, link_label=LINKED_SECTIONS.get(key)
+        ))
+
+    return Release(
+        to_tag,
+        release_type,
+        sections,
+        tickets=[
+            TicketRef.from_issue(ticket, issues.get(ticket), ticket_details.get(ticket, ''))
+            for ticket in jira_tickets
+        ],
+        tickets_empty_text='',
+        backward_compatible="Yes",
+        upgrade_steps="Run Github Action workflow of client",
+        rollback_steps="Run Github Action workflow of client with backward compatible version",
+        major_rollback_steps="N/A - release type minor" if release_type.lower() != "major" else "* Detailed rollback steps for major version change",
+        dependencies="N/A",
+        stats=stats.statistics(sections) if stats is not None else None
+    )
 
-def generate_release_notes(from_tag, to_tag):
-    """Generate release notes content."""
+def generate_release_notes(from_tag, to_tag, output_format='wiki'):
+    """Generate release notes content in Confluence wiki markup by default."""
+    release = generate_release(from_tag, to_tag)
+
+    # Render the release model in a single pass
+    with instrumentation.stage('render'):
+        content = render_release(release, (output_format,))[output_format]
+    instrumentation.gauge('content_bytes', len(content.encode('utf-8')))
+
+    logger.info(f"Generated {len(content)} characters of {output_format} content "
+                f"for {release.item_count()} changes")
+    return content
+
+def generate_release(from_tag, to_tag, with_stats=False):
+    """Collect, categorize and enrich the commits of a range into a Release."""
     # Get commits from local git repository
-    commit_messages = get_git_commits(from_tag, to_tag)
-    print(f"Found {len(commit_messages)} commits")
-    print("Commit messages:", commit_messages)
+    stats = ReleaseStats() if with_stats else None
+    with instrumentation.stage('git_log'):
+        commits = get_git_commits(from_tag, to_tag, stats)
+    instrumentation.gauge('commits', len(commits))
+    logger.info(f"Found {len(commits)} commits")
 
     # Parse versions and determine release type
     to_version = parse_version(to_tag)
@@ -122,105 +228,67 @@ def generate_release_notes(from_tag, to_tag):
     if from_tag:
         from_version = parse_version(from_tag)
         release_type = determine_release_type(from_version, to_version)
-    print(f"Release type determined: {release_type}")
+    logger.info(f"Release type determined: {release_type}")
 
     # Categorize changes
-    changes = categorize_changes(commit_messages)
-    print("Categorized changes:")
+    with instrumentation.stage('categorize'), \
+            open_classification_cache(CHANGE_CLASSIFIER.rules_hash) as cache:
+        changes = categorize_changes(commits, cache)
     for category, items in changes.items():
-        print(f"{category}: {len(items)} items")
-        for item in items:
-            print(f"  - {item}")
+        instrumentation.gauge('items', len(items), category=category)
+        logger.debug(f"{category}: {len(items)} items")
 
     # Extract JIRA tickets
-    jira_tickets, ticket_details = extract_jira_tickets(commit_messages)
-    print(f"Found JIRA tickets: {jira_tickets}")
-
-    # Generate content with enhanced formatting
-    content = f"Type of Release:\n\n{release_type}\n\n"
-    content += f"Release version:\n\n{to_tag}\n\n"
-
-    # Features section with JIRA links
-    content += "New features\n\n"
-    if changes['features']:
-        for feature in changes['features']:
-            ticket_match = re.search(r'\[([A-Z]+-\d+)\]', feature)
-            if ticket_match:
-                ticket = ticket_match.group(1)
-                desc = ticket_details.get(ticket, '')
-                content += f"{feature}\nTicket Link → {format_jira_link(ticket, desc)}\n\n"
-            else:
-                content += f"{feature}\n\n"
-    else:
-        content += "No new features\n\n"
-
-    # Product changes section
-    content += "Product changes:\n\n"
-    if changes['product_changes']:
-        for change in changes['product_changes']:
-            content += f"{change}\n"
-    else:
-        content += "No\n"
-
-    # Bug fixes section with JIRA links
-    content += "\nBug fixes:\n\n"
-    if changes['bugs']:
-        for bug in changes['bugs']:
-            ticket_match = re.search(r'\[([A-Z]+-\d+)\]', bug)
-            if ticket_match:
-                ticket = ticket_match.group(1)
-                desc = ticket_details.get(ticket, '')
-                content += f"{bug}\nTicket → {format_jira_link(ticket, desc)}\n\n"
-            else:
-                content += f"{bug}\n\n"
-    else:
-        content += "No\n"
-
-    # Other sections
-    sections = [
-        ('App updates', changes['app_updates']),
-        ('API changes', changes['api_changes']),
-        ('User experience enhancements', changes['ux_enhancements']),
-        ('Security updates', changes['security'])
-    ]
-
-    for section_name, items in sections:
-        content += f"\n{section_name}:\n\n"
-        if items:
-            content += '\n'.join(f"{item}" for item in items) + '\n'
-        else:
-            content += "No\n"
-
-    # Standard sections
-    content += "\nBackward Compatible Version *:\n\nYes\n\n"
-    content += "Upgrade Steps *:\n\nRun Github Action workflow of client\n\n"
-    content += "Rollback Steps *:\n\nRun Github Action workflow of client with backward compatible version\n\n"
-    content += "Rollback Steps for Major Release *:\n\n"
-    content += "N/A - release type minor\n\n" if release_type.lower() != "major" else "* Detailed rollback steps for major version change\n\n"
-    content += "External Dependencies:\n\nN/A\n\n"
-
-    # JIRA tickets summary
-    content += "Jira Tickets:\n\n"
-    if jira_tickets:
-        for ticket in jira_tickets:
-            desc = ticket_details.get(ticket, '')
-            content += f"{format_jira_link(ticket, desc)}\n\n"
-
-    print("\nGenerated content preview:")
-    print(content)
-    return content
+    with instrumentation.stage('extract_tickets'):
+        jira_tickets, ticket_details = extract_jira_tickets(commit.subject for commit in commits)
+    instrumentation.gauge('tickets', len(jira_tickets))
+    logger.info(f"Found {len(jira_tickets)} JIRA tickets")
+    # The HTTP clients are imported on use, so rendering needs no requests
+    issues = {}
+    if os.getenv('JIRA_BASE_URL'):
+        from jira_client import enrich_tickets
+        with instrumentation.stage('enrich'):
+            issues = enrich_tickets(jira_tickets)
+
+    return build_release(to_tag, release_type, changes, jira_tickets, ticket_details, issues, stats)
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--from-tag', help='Starting tag for range')
     parser.add_argument('--to-tag', help='Ending tag for range', required=True)
+    parser.add_argument('--stats', action='store_true',
+                        help='Add commit, author and change-size statistics to the page')
     args = parser.parse_args()
+    instrumentation.configure_logging()
 
-    content = generate_release_notes(args.from_tag, args.to_tag)
+    # Render the page, moving overflowing sections to child pages when
+    # CONFLUENCE_MAX_PAGE_BYTES is set
+    title = f"{args.to_tag} Release Notes"
+    release = generate_release(args.from_tag, args.to_tag, args.stats)
+    with instrumentation.stage('render'):
+        content, children = render_release_pages(release, title, 'wiki', max_page_bytes())
+    instrumentation.gauge('content_bytes', len(content.encode('utf-8')))
+    instrumentation.gauge('child_pages', len(children))
+    logger.info(f"Generated {len(content)} characters of wiki content for {release.item_count()} changes")
 
     # Publish to Confluence
-    title = f"{args.to_tag} Release Notes"
-    publish_to_confluence(title, content)
+    from confluence_publisher import env_targets, publish_page_tree, publish_to_confluence, publish_to_targets
+    try:
+        with instrumentation.stage('publish'):
+            if children:
+                logger.info(f"Page split into {len(children)} child pages")
+                results = publish_page_tree(env_targets(title, content), children)
+                if any(result.error for result in results):
+                    sys.exit(1)
+            elif os.getenv('CONFLUENCE_TARGETS'):
+                # Publish to several spaces/ancestors concurrently
+                results = publish_to_targets(env_targets(title, content))
+                if any(result.error for result in results):
+                    sys.exit(1)
+            else:
+                publish_to_confluence(title, content)
+    finally:
+        instrumentation.write_report()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,207 @@
+import hashlib
+import math
+
+from release_model import ReleaseStatistics
+
+# Authors and directories tracked exactly before the least frequent is
+# replaced; the top entries of a summary this size are reliable
+TOP_CAPACITY = 100
+# Entries listed on the page
+TOP_LISTED = 10
+# Directories are grouped this many path segments deep
+DIRECTORY_DEPTH = 2
+# Distinct values counted exactly before switching to an estimate
+EXACT_DISTINCT_LIMIT = 4096
+# 2**12 one-byte registers for the estimate, about 1.6% standard error
+REGISTER_BITS = 12
+
+
+class SpaceSaving:
+    """Approximate heaviest keys of a stream in fixed memory (space-saving).
+
+    At most `capacity` keys are counted. A new key arriving when the
+    summary is full replaces the smallest one and inherits its count, so
+    a count can only be overestimated, by at most the smallest count
+    kept. Keys heavier than that are never missed.
+    """
+
+    __slots__ = ('capacity', 'counts')
+
+    def __init__(self, capacity=TOP_CAPACITY, counts=None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+
+    def add(self, key, weight=1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.capacity:
+            counts[key] = weight
+        else:
+            smallest = min(counts, key=counts.get)
+            counts[key] = counts.pop(smallest) + weight
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.add(key, count)
+
+    def top(self, count=TOP_LISTED):
+        """Return the `count` heaviest (key, count) pairs, largest first."""
+        return sorted(self.counts.items(), key=lambda pair: (-pair[1], pair[0]))[:count]
+
+
+class DistinctCounter:
+    """Count distinct strings, exactly up to `limit`, then as a HyperLogLog estimate."""
+
+    __slots__ = ('limit', 'values', 'registers')
+
+    def __init__(self, limit=EXACT_DISTINCT_LIMIT):
+        self.limit = limit
+        self.values = set()
+        self.registers = None
+
+    def add(self, value):
+        if self.registers is not None:
+            self._add_hash(value)
+            return
+        self.values.add(value)
+        if len(self.values) > self.limit:
+            self._switch_to_estimate()
+
+    def _switch_to_estimate(self):
+        self.registers = bytearray(1 << REGISTER_BITS)
+        for value in self.values:
+            self._add_hash(value)
+        self.values = set()
+
+    def _add_hash(self, value):
+        digest = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = digest >> (64 - REGISTER_BITS)
+        rank = 64 - REGISTER_BITS - (digest & ((1 << (64 - REGISTER_BITS)) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if self.registers is None and other.registers is None:
+            for value in other.values:
+                self.add(value)
+            return
+        if self.registers is None:
+            self._switch_to_estimate()
+        if other.registers is None:
+            for value in other.values:
+                self._add_hash(value)
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    def __len__(self):
+        if self.registers is None:
+            return len(self.values)
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / sum(2.0 ** -rank for rank in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * size and empty:
+            estimate = size * math.log(size / empty)
+        return round(estimate)
+
+    def to_dict(self):
+        if self.registers is None:
+            return {'values': sorted(self.values)}
+        return {'registers': self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls()
+        if 'registers' in data:
+            counter.registers = bytearray.fromhex(data['registers'])
+        else:
+            counter.values = set(data['values'])
+        return counter
+
+
+def directory_of(path, depth=DIRECTORY_DEPTH):
+    """Return the directory a path is grouped under, e.g. 'src/api/' or '(root)'."""
+    parts = path.split('/')[:-1][:depth]
+    return '/'.join(parts) + '/' if parts else '(root)'
+
+
+class ReleaseStats:
+    """Commit, author and change-size statistics gathered while history streams by.
+
+    Fed from the same `git log --numstat` walk as classification, one
+    commit at a time, and holds a fixed amount of state whatever the size
+    of the range. Summaries of separate walks (tag segments, repositories)
+    can be merged.
+    """
+
+    def __init__(self):
+        self.commits = 0
+        self.added = 0
+        self.deleted = 0
+        self.authors = DistinctCounter()
+        self.files = DistinctCounter()
+        self.top_authors = SpaceSaving()
+        self.top_directories = SpaceSaving()
+
+    def add(self, commit, files):
+        """Count one CommitRecord and its FileStats."""
+        self.commits += 1
+        self.authors.add(commit.author)
+        self.top_authors.add(commit.author)
+        for added, deleted, path in files:
+            self.added += added
+            self.deleted += deleted
+            self.files.add(path)
+            # Binary files have no line counts but still count as changed
+            self.top_directories.add(directory_of(path), added + deleted or 1)
+
+    def track(self, git_log):
+        """Count (CommitRecord, [FileStat]) pairs from iter_git_log and yield the commits."""
+        for commit, files in git_log:
+            self.add(commit, files)
+            yield commit
+
+    def merge(self, other):
+        self.commits += other.commits
+        self.added += other.added
+        self.deleted += other.deleted
+        self.authors.merge(other.authors)
+        self.files.merge(other.files)
+        self.top_authors.merge(other.top_authors)
+        self.top_directories.merge(other.top_directories)
+
+    def to_dict(self):
+        """Return a JSON-serializable form, e.g. for segment snapshots."""
+        return {
+            'commits': self.commits,
+            'added': self.added,
+            'deleted': self.deleted,
+            'authors': self.authors.to_dict(),
+            'files': self.files.to_dict(),
+            'top_authors': self.top_authors.counts,
+            'top_directories': self.top_directories.counts,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.commits = data['commits']
+        stats.added = data['added']
+        stats.deleted = data['deleted']
+        stats.authors = DistinctCounter.from_dict(data['authors'])
+        stats.files = DistinctCounter.from_dict(data['files'])
+        stats.top_authors = SpaceSaving(counts=data['top_authors'])
+        stats.top_directories = SpaceSaving(counts=data['top_directories'])
+        return stats
+
+    def statistics(self, sections):
+        """Return the ReleaseStatistics to render, with per-section change counts."""
+        return ReleaseStatistics(
+            self.commits, len(self.authors), self.added, self.deleted, len(self.files),
+            [(section.title, len(section.items)) for section in sections],
+            self.top_authors.top(), self.top_directories.top(),
+        )
@@ -0,0 +1,177 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+
+PREFIXES = [
+    'feat: ', 'fix: ', 'api: ', 'sec: ', 'prod: ', 'app: ', 'ux: ',
+    'feature: ', 'bug: ', 'ui: ', 'mobile: ', 'security: ', '',
+]
+PROJECTS = ['ABC', 'PAY', 'CORE', 'WEB']
+AUTHORS = [(f"Developer {number}", f"dev{number}@example.com") for number in range(40)]
+COMPONENTS = ['api', 'web', 'mobile', 'billing', 'auth', 'search', 'infra', 'docs']
+WORDS = (
+    'add update remove refactor improve handle support validate cache retry '
+    'user account payment invoice report search token session page layout '
+    'endpoint timeout error login profile export import filter sort'
+).split()
+START_TIME = 1600000000
+MARKER_FILE = 'synthetic-repo.txt'
+
+
+def _subject(rng):
+    subject = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+    roll = rng.random()
+    key = f"{rng.choice(PROJECTS)}-{rng.randint(1, 5000)}"
+    if roll < 0.4:
+        subject = f"[{key}] {subject}"
+    elif roll < 0.55:
+        subject = f"{key} | {subject}"
+    elif roll < 0.6:
+        subject = f"{subject} ({key})"
+    return rng.choice(PREFIXES) + subject
+
+
+def _body(rng):
+    if rng.random() < 0.7:
+        return ''
+    lines = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+             for _ in range(rng.randint(1, 6))]
+    if rng.random() < 0.3:
+        lines.append(f"Refs {rng.choice(PROJECTS)}-{rng.randint(1, 5000)}")
+    return '\n\n' + '\n'.join(lines)
+
+
+def _data(text):
+    encoded = text.encode('utf-8')
+    return b'data %d\n%s\n' % (len(encoded), encoded)
+
+
+def _commit(rng, ref, mark, when, parent, merge):
+    name, email = rng.choice(AUTHORS)
+    component = rng.choice(COMPONENTS)
+    path = f"{component}/module_{rng.randint(0, 24)}.txt"
+
+    yield b'commit %s\n' % ref
+    yield b'mark :%d\n' % mark
+    yield f"author {name} <{email}> {when} +0000\n".encode('utf-8')
+    yield f"committer {name} <{email}> {when} +0000\n".encode('utf-8')
+    yield _data(_subject(rng) + _body(rng))
+    if parent:
+        yield b'from :%d\n' % parent
+    if merge:
+        yield b'merge :%d\n' % merge
+    yield f"M 100644 inline {path}\n".encode('utf-8')
+    yield _data(f"{component} change {mark}\n")
+
+
+def fast_import_stream(commits, tag_every, seed=0):
+    """Yield a `git fast-import` stream for a synthetic history.
+
+    Every commit changes one file under a component directory and has a
+    conventional-commit style subject, often with a Jira key, and
+    sometimes a multi-line body. Every `tag_every` commits get a
+    vMAJOR.MINOR.PATCH tag, as does the last one. About 2% of commits
+    merge in a one-commit side branch, so the history is not purely linear.
+    """
+    rng = random.Random(seed)
+    tags = []
+    major, minor, patch = 1, 0, 0
+    for mark in range(1, commits + 1):
+        when = START_TIME + mark * 60
+        side_mark = None
+        # Now and then, branch off the previous commit and merge the branch back
+        if mark > 1 and rng.random() < 0.02:
+            side_mark = commits + mark
+            yield from _commit(rng, b'refs/heads/side', side_mark, when - 30, mark - 1, None)
+        yield from _commit(rng, b'refs/heads/main', mark, when, mark - 1 if mark > 1 else None, side_mark)
+
+        if mark % tag_every == 0 or mark == commits:
+            if rng.random() < 0.03:
+                major, minor, patch = major + 1, 0, 0
+            elif rng.random() < 0.4:
+                minor, patch = minor + 1, 0
+            else:
+                patch += 1
+            tags.append((f"v{major}.{minor}.{patch}", mark))
+
+    for tag, mark in tags:
+        yield f"reset refs/tags/{tag}\n".encode('utf-8')
+        yield b'from :%d\n\n' % mark
+
+
+def build_repo(path, commits, tag_every=None, seed=0):
+    """Create a synthetic repository at `path`, or reuse one built with the same settings.
+
+    Returns the list of tag names in history order.
+    """
+    tag_every = tag_every or max(10, commits // 200)
+    settings = f"{commits} {tag_every} {seed}"
+    marker = os.path.join(path, '.git', MARKER_FILE)
+    if os.path.isfile(marker):
+        with open(marker, encoding='utf-8') as existing:
+            if existing.read().strip() == settings:
+                return list_tags(path)
+        raise ValueError(f"{path} holds a different synthetic repository")
+
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(['git', 'init', '-q', '-b', 'main', path], check=True)
+    process = subprocess.Popen(['git', 'fast-import', '--quiet'], stdin=subprocess.PIPE, cwd=path)
+    try:
+        buffer = []
+        size = 0
+        for chunk in fast_import_stream(commits, tag_every, seed):
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= 1 << 20:
+                process.stdin.write(b''.join(buffer))
+                buffer, size = [], 0
+        process.stdin.write(b''.join(buffer))
+        process.stdin.close()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, 'git fast-import')
+    subprocess.run(['git', 'checkout', '-q', 'main'], check=True, cwd=path)
+    with open(marker, 'w', encoding='utf-8') as output:
+        output.write(settings + '\n')
+    return list_tags(path)
+
+
+def list_tags(path):
+    """Return the repository's tags, oldest commit first."""
+    result = subprocess.run(
+        ['git', 'tag', '--sort=creatordate'],
+        capture_output=True, text=True, check=True, cwd=path
+    )
+    return result.stdout.split()
+
+
+def parse_size(text):
+    """Parse commit counts such as 1000, 10k or 1m."""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic git repository for benchmarks.')
+    parser.add_argument('path', help='Directory to create the repository in')
+    parser.add_argument('--commits', default='10k', help='Number of commits, e.g. 1k, 100k, 1m')
+    parser.add_argument('--tag-every', type=int, help='Tag every N commits')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        tags = build_repo(args.path, parse_size(args.commits), args.tag_every, args.seed)
+    except (ValueError, subprocess.CalledProcessError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {args.path}: {parse_size(args.commits)} commits, {len(tags)} tags ({tags[0]}..{tags[-1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import bisect
+import json
+import os
+import re
+import subprocess
+from collections import namedtuple
+
+from release_cache import git_common_dir
+
+TAG_INDEX_FILENAME = 'release-notes-tags.json'
+TAG_INDEX_VERSION = 1
+RELEASE_TAG_RE = re.compile(r'^v\d+\.\d+\.\d+$')
+
+TagInfo = namedtuple('TagInfo', ['name', 'sha', 'version', 'date'])
+
+
+def parse_version(tag):
+    """Parse version number from tag."""
+    match = re.match(r'v(\d+)\.(\d+)\.(\d+)', tag)
+    if not match:
+        raise ValueError(f"Invalid tag format: {tag}")
+    return [int(x) for x in match.groups()]
+
+
+def _version_or_none(tag):
+    try:
+        return tuple(parse_version(tag))
+    except ValueError:
+        return None
+
+
+def _natural_key(name):
+    # Digit runs compare as numbers, like git's version:refname sort
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def _refs_stamp(common_dir):
+    """Return a fingerprint that changes whenever a tag ref is written.
+
+    packed-refs is rewritten on `git pack-refs` and on deletes; loose tags
+    are files under refs/tags whose directories change when tags are added
+    or removed and whose files change when a tag is moved.
+    """
+    stamp = []
+    packed = os.path.join(common_dir, 'packed-refs')
+    stamp.append(os.stat(packed).st_mtime_ns if os.path.exists(packed) else 0)
+    latest = 0
+    count = 0
+    for root, _, files in os.walk(os.path.join(common_dir, 'refs', 'tags')):
+        latest = max(latest, os.stat(root).st_mtime_ns)
+        for name in files:
+            latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+            count += 1
+    stamp.extend([latest, count])
+    return stamp
+
+
+def _read_tags(cwd=None):
+    """List all tags with their peeled commit SHA and commit date."""
+    cmd = [
+        'git', 'for-each-ref',
+        '--format=%(refname:short)%09%(objectname)%09%(*objectname)'
+        '%09%(committerdate:unix)%09%(*committerdate:unix)',
+        'refs/tags'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=cwd)
+    tags = []
+    for line in result.stdout.splitlines():
+        name, sha, peeled, date, peeled_date = line.split('\t')
+        tags.append((name, peeled or sha, int(peeled_date or date or 0)))
+    return tags
+
+
+def reachable_tags(end_ref, start_ref=None, cwd=None):
+    """Return the names of tags reachable from END_REF, and not from START_REF if given.
+
+    Only these tags can split START_REF..END_REF into segments: a hotfix
+    tag on a maintenance branch sorts between two releases by version but
+    is not part of the range.
+    """
+    cmd = ['git', 'tag', '--merged', end_ref]
+    if start_ref:
+        cmd += ['--no-merged', start_ref]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=cwd)
+    return set(result.stdout.splitlines())
+
+
+class TagIndex:
+    """Tag name to peeled commit SHA, semantic version and commit date.
+
+    Release tags (vX.Y.Z) are kept sorted by version so neighbour lookups
+    such as "the release before X" are binary searches. Tags without a
+    vX.Y.Z version (e.g. release-2024.1) are kept too and ordered by name,
+    numbers compared numerically.
+    """
+
+    def __init__(self, tags):
+        self._tags = {}
+        for name, sha, date in tags:
+            self._tags[name] = TagInfo(name, sha, _version_or_none(name), date)
+        # Pre-releases such as v1.2.0-rc1 parse to the same version as
+        # v1.2.0 and must sort before it
+        self._ordered = sorted(
+            (info for info in self._tags.values() if info.version is not None),
+            key=lambda info: (info.version, bool(RELEASE_TAG_RE.match(info.name)), info.name)
+        )
+        self._unversioned = sorted(
+            (info for info in self._tags.values() if info.version is None),
+            key=lambda info: _natural_key(info.name)
+        )
+        self._releases = [info for info in self._ordered if RELEASE_TAG_RE.match(info.name)]
+        self._release_versions = [info.version for info in self._releases]
+
+    def __contains__(self, name):
+        return name in self._tags
+
+    def __len__(self):
+        return len(self._tags)
+
+    def get(self, name):
+        """Return the TagInfo for a tag, or None."""
+        return self._tags.get(name)
+
+    def sha(self, name):
+        """Return the commit SHA a tag points to, or None."""
+        info = self._tags.get(name)
+        return info.sha if info else None
+
+    def names(self):
+        return sorted(self._tags)
+
+    def version_ordered(self):
+        """Return [(name, sha)] for all tags: version tags in version order, then the rest by name."""
+        return [(info.name, info.sha) for info in self._ordered + self._unversioned]
+
+    def releases(self):
+        """Return TagInfo for release tags in version order."""
+        return list(self._releases)
+
+    def previous_release(self, name):
+        """Return the newest release tag older than `name`, or None."""
+        version = _version_or_none(name)
+        if version is None:
+            return None
+        position = bisect.bisect_left(self._release_versions, version)
+        return self._releases[position - 1] if position else None
+
+    def next_release(self, name):
+        """Return the oldest release tag newer than `name`, or None."""
+        version = _version_or_none(name)
+        if version is None:
+            return None
+        position = bisect.bisect_right(self._release_versions, version)
+        return self._releases[position] if position < len(self._releases) else None
+
+
+_loaded = {}
+
+
+def load_tag_index(cwd=None):
+    """Load the tag index, reusing the on-disk copy while refs are unchanged.
+
+    The index is stored in the repository's git directory next to a
+    fingerprint of packed-refs and refs/tags, and is only rebuilt with
+    `git for-each-ref` when that fingerprint changes. Within a process the
+    index is also memoized per repository.
+    """
+    common_dir = git_common_dir(cwd)
+    if not common_dir:
+        return TagIndex(_read_tags(cwd))
+
+    try:
+        stamp = _refs_stamp(common_dir)
+    except OSError:
+        stamp = None
+
+    memoized = _loaded.get(common_dir)
+    if memoized and stamp is not None and memoized[0] == stamp:
+        return memoized[1]
+
+    path = os.path.join(common_dir, TAG_INDEX_FILENAME)
+    if stamp is not None:
+        try:
+            with open(path, encoding='utf-8') as cached:
+                data = json.load(cached)
+            if data.get('version') == TAG_INDEX_VERSION and data.get('stamp') == stamp:
+                index = TagIndex(data['tags'])
+                _loaded[common_dir] = (stamp, index)
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+
+    tags = _read_tags(cwd)
+    index = TagIndex(tags)
+    if stamp is not None:
+        try:
+            temporary = f'{path}.{os.getpid()}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as cached:
+                json.dump({'version': TAG_INDEX_VERSION, 'stamp': stamp, 'tags': tags}, cached)
+            os.replace(temporary, path)
+        except OSError:
+            pass
+        _loaded[common_dir] = (stamp, index)
+    return index
@@ -0,0 +1,437 @@
+import io
+import json
+import re
+from html import escape
+
+from templates.release_notes_template import (
+    JIRA_BROWSE_URL,
+    format_feature_with_ticket,
+    format_ticket_link
+)
+
+
+class ReleaseWriter:
+    """Base class for streaming a Release model to one output format.
+
+    write_release drives every writer through the same sequence of calls
+    while walking the model once; writers only ever append to their
+    stream, so rendering is linear in the size of the release.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.write = stream.write
+
+    def begin(self, release):
+        pass
+
+    def begin_section(self, section):
+        pass
+
+    def item(self, section, item):
+        pass
+
+    def end_section(self, section):
+        pass
+
+    def statistics(self, stats):
+        pass
+
+    def deployment(self, title, text):
+        pass
+
+    def begin_tickets(self, release):
+        pass
+
+    def ticket(self, ticket):
+        pass
+
+    def end_tickets(self, release):
+        pass
+
+    def end(self, release):
+        pass
+
+    def begin_page(self, page):
+        pass
+
+    def end_page(self, page):
+        pass
+
+
+STATISTICS_TITLE = 'Release Statistics'
+
+
+def _statistics_summary(stats):
+    """Return the one-line summary and the (heading, [line]) lists of a ReleaseStatistics."""
+    summary = (f"{stats.commits} commits by {stats.authors} authors, "
+               f"+{stats.added} / -{stats.deleted} lines in {stats.files} files")
+    lists = [
+        ('Changes per category', [f"{title}: {count}" for title, count in stats.categories]),
+        ('Top contributors', [f"{author}: {count} commits" for author, count in stats.top_authors]),
+        ('Most changed directories', [f"{path}: {count} lines" for path, count in stats.top_directories]),
+    ]
+    return summary, [(heading, lines) for heading, lines in lists if lines]
+
+
+def _storage_text(text):
+    return escape(text, quote=False).replace('\n', '<br/>')
+
+
+class StorageWriter(ReleaseWriter):
+    """Confluence storage format (XHTML)."""
+
+    def begin(self, release):
+        self.write(f"\n<h1>{_storage_text(release.version)} Release Notes</h1>\n\n")
+        if release.owner is not None:
+            self.write(f"<p>Owned by {_storage_text(release.owner)}</p>\n")
+        if release.last_updated is not None:
+            self.write(f"<p>Last updated: {_storage_text(release.last_updated)}</p>\n")
+        self.write(f"\n<h2>Type of Release:</h2>\n<p>{_storage_text(release.release_type)}</p>\n\n")
+        self.write(f"<h2>Release version:</h2>\n<p>{_storage_text(release.version)}</p>\n\n")
+
+    def begin_section(self, section):
+        self.write(f"<h2>{_storage_text(section.title)}</h2>\n")
+        self.write("<ul>" if section.items else f"<p>{_storage_text(section.empty_text)}</p>")
+
+    def item(self, section, item):
+        text = _storage_text(item.text)
+        if section.link_label:
+            text = format_feature_with_ticket(text, item.ticket, section.link_label)
+        self.write(f"<li>{text}</li>")
+
+    def end_section(self, section):
+        self.write("</ul>\n\n" if section.items else "\n\n")
+
+    def statistics(self, stats):
+        summary, lists = _statistics_summary(stats)
+        self.write(f"<h2>{STATISTICS_TITLE}</h2>\n<p>{_storage_text(summary)}</p>\n")
+        for heading, lines in lists:
+            self.write(f"<h3>{_storage_text(heading)}</h3>\n<ul>")
+            self.write(''.join(f"<li>{_storage_text(line)}</li>" for line in lines))
+            self.write("</ul>\n")
+        self.write("\n")
+
+    def deployment(self, title, text):
+        self.write(f"<h2>{_storage_text(title)}</h2>\n<p>{_storage_text(text)}</p>\n\n")
+
+    def begin_tickets(self, release):
+        self.write("<h2>Jira Tickets</h2>\n")
+        self.write("<ul>" if release.tickets else f"<p>{_storage_text(release.tickets_empty_text)}</p>")
+
+    def ticket(self, ticket):
+        link = format_ticket_link(escape(ticket.key))
+        if ticket.title:
+            link += f" {_storage_text(ticket.title)}"
+        if ticket.status:
+            link += f" <em>({_storage_text(ticket.status)})</em>"
+        if ticket.fix_versions:
+            link += f" Fix version: {_storage_text(', '.join(ticket.fix_versions))}"
+        self.write(f"<li>{link}</li>")
+
+    def end_tickets(self, release):
+        self.write("</ul>\n" if release.tickets else "\n")
+
+    def begin_page(self, page):
+        self.write(f"\n<h1>{_storage_text(page.title)}</h1>\n\n")
+
+
+WIKI_SPECIAL_RE = re.compile(r'([\\\[\]{}|])')
+# List, heading and quote markers only take effect at the start of a line
+WIKI_LIST_RE = re.compile(r'^(\s*)([*#-])', re.MULTILINE)
+WIKI_BLOCK_RE = re.compile(r'^(\s*(?:h[1-6]|bq))\.', re.MULTILINE)
+
+
+def _wiki_text(text):
+    text = WIKI_SPECIAL_RE.sub(r'\\\1', text)
+    text = WIKI_BLOCK_RE.sub(r'\1\\.', WIKI_LIST_RE.sub(r'\1\\\2', text))
+    return text.replace('\n', ' \\\\ ')
+
+
+class WikiWriter(ReleaseWriter):
+    """Confluence wiki markup."""
+
+    def begin(self, release):
+        self.write(f"h1. {_wiki_text(release.version)} Release Notes\n\n")
+        if release.owner is not None:
+            self.write(f"Owned by {_wiki_text(release.owner)}\n")
+        if release.last_updated is not None:
+            self.write(f"Last updated: {_wiki_text(release.last_updated)}\n")
+        if release.owner is not None or release.last_updated is not None:
+            self.write("\n")
+        self.write(f"h2. Type of Release\n\n{_wiki_text(release.release_type)}\n\n")
+        self.write(f"h2. Release version\n\n{_wiki_text(release.version)}\n\n")
+
+    def begin_section(self, section):
+        self.write(f"h2. {_wiki_text(section.title)}\n\n")
+        if not section.items:
+            self.write(f"{_wiki_text(section.empty_text)}\n")
+
+    def item(self, section, item):
+        self.write(f"* {_wiki_text(item.text)}")
+        if item.ticket and section.link_label:
+            self.write(f" \\\\ {section.link_label} → [{item.ticket}|{JIRA_BROWSE_URL}/{item.ticket}]")
+        self.write("\n")
+
+    def end_section(self, section):
+        self.write("\n")
+
+    def statistics(self, stats):
+        summary, lists = _statistics_summary(stats)
+        self.write(f"h2. {STATISTICS_TITLE}\n\n{_wiki_text(summary)}\n\n")
+        for heading, lines in lists:
+            self.write(f"h3. {_wiki_text(heading)}\n\n")
+            self.write(''.join(f"* {_wiki_text(line)}\n" for line in lines))
+            self.write("\n")
+
+    def deployment(self, title, text):
+        self.write(f"h2. {_wiki_text(title)}\n\n{_wiki_text(text)}\n\n")
+
+    def begin_tickets(self, release):
+        self.write("h2. Jira Tickets\n\n")
+        if not release.tickets:
+            self.write(f"{_wiki_text(release.tickets_empty_text)}\n")
+
+    def ticket(self, ticket):
+        self.write(f"* [{ticket.key}|{JIRA_BROWSE_URL}/{ticket.key}]")
+        if ticket.title:
+            self.write(f" {_wiki_text(ticket.title)}")
+        if ticket.status:
+            self.write(f" _({_wiki_text(ticket.status)})_")
+        if ticket.fix_versions:
+            self.write(f" Fix version: {_wiki_text(', '.join(ticket.fix_versions))}")
+        self.write("\n")
+
+    def begin_page(self, page):
+        self.write(f"h1. {_wiki_text(page.title)}\n\n")
+
+
+MARKDOWN_SPECIAL_RE = re.compile(r'([\\`*_\[\]<>#|])')
+# `*` and `#` are escaped everywhere; the other list markers only at line start
+MARKDOWN_LIST_RE = re.compile(r'^(\s*)([-+])', re.MULTILINE)
+MARKDOWN_ORDERED_RE = re.compile(r'^(\s*\d+)([.)])', re.MULTILINE)
+
+
+def _markdown_text(text):
+    text = MARKDOWN_SPECIAL_RE.sub(r'\\\1', text)
+    text = MARKDOWN_ORDERED_RE.sub(r'\1\\\2', MARKDOWN_LIST_RE.sub(r'\1\\\2', text))
+    return text.replace('\n', '  \n  ')
+
+
+class MarkdownWriter(ReleaseWriter):
+    """GitHub-flavoured Markdown."""
+
+    def begin(self, release):
+        self.write(f"# {_markdown_text(release.version)} Release Notes\n\n")
+        if release.owner is not None:
+            self.write(f"Owned by {_markdown_text(release.owner)}  \n")
+        if release.last_updated is not None:
+            self.write(f"Last updated: {_markdown_text(release.last_updated)}\n")
+        if release.owner is not None or release.last_updated is not None:
+            self.write("\n")
+        self.write(f"## Type of Release\n\n{_markdown_text(release.release_type)}\n\n")
+        self.write(f"## Release version\n\n{_markdown_text(release.version)}\n\n")
+
+    def begin_section(self, section):
+        self.write(f"## {_markdown_text(section.title)}\n\n")
+        if not section.items:
+            self.write(f"{_markdown_text(section.empty_text)}\n")
+
+    def item(self, section, item):
+        self.write(f"- {_markdown_text(item.text)}")
+        if item.ticket and section.link_label:
+            self.write(f" ([{item.ticket}]({JIRA_BROWSE_URL}/{item.ticket}))")
+        self.write("\n")
+
+    def end_section(self, section):
+        self.write("\n")
+
+    def statistics(self, stats):
+        summary, lists = _statistics_summary(stats)
+        self.write(f"## {STATISTICS_TITLE}\n\n{_markdown_text(summary)}\n\n")
+        for heading, lines in lists:
+            self.write(f"### {_markdown_text(heading)}\n\n")
+            self.write(''.join(f"- {_markdown_text(line)}\n" for line in lines))
+            self.write("\n")
+
+    def deployment(self, title, text):
+        self.write(f"## {_markdown_text(title)}\n\n{_markdown_text(text)}\n\n")
+
+    def begin_tickets(self, release):
+        self.write("## Jira Tickets\n\n")
+        if not release.tickets:
+            self.write(f"{_markdown_text(release.tickets_empty_text)}\n")
+
+    def ticket(self, ticket):
+        self.write(f"- [{ticket.key}]({JIRA_BROWSE_URL}/{ticket.key})")
+        if ticket.title:
+            self.write(f" {_markdown_text(ticket.title)}")
+        if ticket.status:
+            self.write(f" _({_markdown_text(ticket.status)})_")
+        if ticket.fix_versions:
+            self.write(f" Fix version: {_markdown_text(', '.join(ticket.fix_versions))}")
+        self.write("\n")
+
+    def begin_page(self, page):
+        self.write(f"# {_markdown_text(page.title)}\n\n")
+
+
+class JsonWriter(ReleaseWriter):
+    """A JSON document, written incrementally rather than built as one object."""
+
+    def begin(self, release):
+        self.write('{')
+        for field in ('version', 'release_type', 'owner', 'last_updated'):
+            self.write(f'{json.dumps(field)}: {json.dumps(getattr(release, field))}, ')
+        self.write('"sections": [')
+        self._first_section = True
+
+    def begin_section(self, section):
+        if not self._first_section:
+            self.write(', ')
+        self._first_section = False
+        self.write(f'{{"key": {json.dumps(section.key)}, "title": {json.dumps(section.title)}, "items": [')
+        self._first_item = True
+
+    def item(self, section, item):
+        if not self._first_item:
+            self.write(', ')
+        self._first_item = False
+        self.write(json.dumps({'text': item.text, 'ticket': item.ticket}))
+
+    def end_section(self, section):
+        self.write(']}')
+
+    def statistics(self, stats):
+        # Written as the last key, after the ticket list
+        self._statistics = {
+            'commits': stats.commits,
+            'authors': stats.authors,
+            'lines_added': stats.added,
+            'lines_removed': stats.deleted,
+            'files': stats.files,
+            'categories': dict(stats.categories),
+            'top_authors': [{'author': author, 'commits': count} for author, count in stats.top_authors],
+            'top_directories': [{'directory': path, 'lines': count} for path, count in stats.top_directories],
+        }
+
+    def deployment(self, title, text):
+        if self._first_section is not None:
+            self.write('], "deployment": {')
+            self._first_section = None
+        else:
+            self.write(', ')
+        self.write(f'{json.dumps(title)}: {json.dumps(text)}')
+
+    def begin_tickets(self, release):
+        # Pages have no deployment object to close, only the section list
+        self.write('], "tickets": [' if self._first_section is not None else '}, "tickets": [')
+        self._first_section = None
+        self._first_ticket = True
+
+    def ticket(self, ticket):
+        if not self._first_ticket:
+            self.write(', ')
+        self._first_ticket = False
+        self.write(json.dumps({
+            'key': ticket.key,
+            'description': ticket.description,
+            'summary': ticket.summary,
+            'status': ticket.status,
+            'fix_versions': list(ticket.fix_versions),
+        }))
+
+    def end_tickets(self, release):
+        self.write(']')
+
+    def end(self, release):
+        if release.stats is not None:
+            self.write(f', "statistics": {json.dumps(self._statistics)}')
+        self.write('}\n')
+
+    def begin_page(self, page):
+        self.write(f'{{"title": {json.dumps(page.title)}, "sections": [')
+        self._first_section = True
+
+    def end_page(self, page):
+        self.write('}\n' if self._first_section is None else ']}\n')
+
+
+WRITERS = {
+    'storage': StorageWriter,
+    'wiki': WikiWriter,
+    'markdown': MarkdownWriter,
+    'json': JsonWriter,
+}
+
+# File extension used when a format is written to disk
+OUTPUT_EXTENSIONS = {'storage': 'html', 'wiki': 'wiki', 'markdown': 'md', 'json': 'json'}
+
+
+def _write_sections(writers, sections):
+    for section in sections:
+        for writer in writers:
+            writer.begin_section(section)
+        for item in section.items:
+            for writer in writers:
+                writer.item(section, item)
+        for writer in writers:
+            writer.end_section(section)
+
+
+def _write_tickets(writers, holder):
+    for writer in writers:
+        writer.begin_tickets(holder)
+    for ticket in holder.tickets:
+        for writer in writers:
+            writer.ticket(ticket)
+    for writer in writers:
+        writer.end_tickets(holder)
+
+
+def write_release(release, streams):
+    """Render a Release to several formats in a single walk of the model.
+
+    `streams` maps a format name from WRITERS to a writable text stream.
+    """
+    writers = [WRITERS[name](stream) for name, stream in streams.items()]
+
+    for writer in writers:
+        writer.begin(release)
+    _write_sections(writers, release.sections)
+    if release.stats is not None:
+        for writer in writers:
+            writer.statistics(release.stats)
+    for title, text in release.deployment_sections():
+        for writer in writers:
+            writer.deployment(title, text)
+    _write_tickets(writers, release)
+    for writer in writers:
+        writer.end(release)
+
+
+def write_page(page, streams):
+    """Render a ReleasePage (a child page of a split release) like write_release."""
+    writers = [WRITERS[name](stream) for name, stream in streams.items()]
+
+    for writer in writers:
+        writer.begin_page(page)
+    _write_sections(writers, page.sections)
+    if page.tickets is not None:
+        _write_tickets(writers, page)
+    for writer in writers:
+        writer.end_page(page)
+
+
+def render_release(release, formats=('storage',)):
+    """Render a Release into in-memory buffers and return {format: text}."""
+    buffers = {name: io.StringIO() for name in formats}
+    write_release(release, buffers)
+    return {name: buffer.getvalue() for name, buffer in buffers.items()}
+
+
+def render_page(page, formats=('storage',)):
+    """Render a ReleasePage into in-memory buffers and return {format: text}."""
+    buffers = {name: io.StringIO() for name in formats}
+    write_page(page, buffers)
+    return {name: buffer.getvalue() for name, buffer in buffers.items()}
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# The scripts import each other as top-level modules, as when run from scripts/
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'Test Author',
+    'GIT_AUTHOR_EMAIL': 'author@example.com',
+    'GIT_COMMITTER_NAME': 'Test Author',
+    'GIT_COMMITTER_EMAIL': 'author@example.com',
+    'GIT_CONFIG_NOSYSTEM': '1',
+}
+
+
+class GitRepo:
+    """A throwaway git repository to commit and tag in."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._counter = 0
+        self.git('init', '-q', '-b', 'main')
+
+    def git(self, *args):
+        result = subprocess.run(['git', *args], cwd=self.path, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+
+    def commit(self, message, files=None, author=None):
+        """Commit `files` ({path: content}, default a new file) and return the SHA."""
+        self._counter += 1
+        for name, content in (files or {f'file{self._counter}.txt': f'{self._counter}\n'}).items():
+            path = os.path.join(self.path, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            mode = 'wb' if isinstance(content, bytes) else 'w'
+            with open(path, mode) as output:
+                output.write(content)
+            self.git('add', name)
+        args = ['commit', '-q', '--allow-empty', '-m', message]
+        if author:
+            args.append(f'--author={author} <{author.lower().replace(" ", ".")}@example.com>')
+        self.git(*args)
+        return self.git('rev-parse', 'HEAD')
+
+    def tag(self, name, ref='HEAD'):
+        self.git('tag', name, ref)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A fresh repository that is also the working directory, as in CI."""
+    for name, value in GIT_ENV.items():
+        monkeypatch.setenv(name, value)
+    for name in ('RELEASE_NOTES_NO_CACHE', 'RELEASE_NOTES_CACHE', 'RELEASE_NOTES_STATS',
+                 'RELEASE_NOTES_INCREMENTAL', 'RELEASE_NOTES_ASYNC', 'JIRA_BASE_URL'):
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / 'repo'
+    path.mkdir()
+    git_repo = GitRepo(path)
+    monkeypatch.chdir(path)
+    return git_repo
+
+
+def merge_branch(repo, branch, message=None):
+    """Merge `branch` into main with a merge commit."""
+    repo.git('checkout', '-q', 'main')
+    repo.git('merge', '-q', '--no-ff', '-m', message or f'Merge branch {branch}', branch)
+
+
+@pytest.fixture
+def merge_history(repo):
+    """Releases v1.0.0 to v1.3.0 on main, with feature branches merged between them."""
+    repo.commit('feat: ABC-1 initial release')
+    repo.tag('v1.0.0')
+    repo.git('checkout', '-q', '-b', 'search')
+    repo.commit('feat: ABC-2 search box')
+    repo.commit('fix: ABC-3 search paging')
+    repo.git('checkout', '-q', 'main')
+    repo.commit('api: ABC-4 version the REST API')
+    merge_branch(repo, 'search')
+    repo.tag('v1.1.0')
+    # A branch started before v1.1.0 and merged after it
+    repo.git('checkout', '-q', '-b', 'export', 'v1.0.0')
+    repo.commit('feat: ABC-5 CSV export')
+    repo.git('checkout', '-q', 'main')
+    repo.commit('ux: ABC-6 darker theme')
+    merge_branch(repo, 'export')
+    repo.tag('v1.2.0')
+    repo.commit('sec: ABC-7 rotate session keys')
+    repo.tag('v1.3.0')
+    return repo
+
+
+@pytest.fixture
+def hotfix_history(repo):
+    """Releases on main plus hotfix tags on maintenance branches.
+
+    v1.1.1 is cut from v1.1.0 and never merged back; v1.2.1 is cut from
+    v1.2.0 and merged into main before v1.3.0.
+    """
+    repo.commit('feat: ABC-1 initial release')
+    repo.tag('v1.0.0')
+    repo.commit('feat: ABC-2 search box')
+    repo.tag('v1.1.0')
+    repo.git('checkout', '-q', '-b', 'maint-1.1', 'v1.1.0')
+    repo.commit('fix: ABC-3 search crash')
+    repo.tag('v1.1.1')
+    repo.git('checkout', '-q', 'main')
+    repo.commit('feat: ABC-4 CSV export')
+    repo.tag('v1.2.0')
+    repo.git('checkout', '-q', '-b', 'maint-1.2', 'v1.2.0')
+    repo.commit('fix: ABC-5 export encoding')
+    repo.tag('v1.2.1')
+    repo.git('checkout', '-q', 'main')
+    repo.commit('ux: ABC-6 darker theme')
+    merge_branch(repo, 'maint-1.2')
+    repo.commit('api: ABC-7 version the REST API')
+    repo.tag('v1.3.0')
+    return repo
@@ -0,0 +1,60 @@
+from aggregate_release_notes import categorize_repository, merge_repositories
+from conftest import GitRepo
+
+
+def texts(categories):
+    return {section: [commit.text for commit in commits] for section, commits in categories.items() if commits}
+
+
+def snapshot(*rows, tickets=()):
+    return {'categories': {'bug_fixes': [list(row) for row in rows]}, 'tickets': list(tickets)}
+
+
+def test_cherry_pick_shared_by_two_repositories_is_listed_once(repo, tmp_path):
+    (tmp_path / 'other').mkdir()
+    other = GitRepo(tmp_path / 'other')
+    repo.commit('feat: ABC-1 api initial release', {'api.txt': 'api\n'})
+    repo.tag('v1.0.0')
+    repo.commit('fix: ABC-2 patch the shared parser', {'vendor/parser.py': 'fixed\n'})
+    repo.commit('feat: ABC-3 api pagination')
+    repo.tag('v1.1.0')
+    other.commit('feat: ABC-10 web initial release', {'web.txt': 'web\n'})
+    other.tag('v2.0.0')
+    other.commit('feat: ABC-11 web dark mode')
+    # The same change ported into the second repository
+    other.commit('fix: ABC-2 patch the shared parser', {'vendor/parser.py': 'fixed\n'})
+    other.tag('v2.1.0')
+
+    snapshots = [
+        ('api', categorize_repository(repo.path, 'v1.0.0', 'v1.1.0')),
+        ('web', categorize_repository(other.path, 'v2.0.0', 'v2.1.0')),
+    ]
+    categories, tickets = merge_repositories(snapshots)
+
+    assert texts(categories) == {
+        'new_features': ['feat: api pagination (api)', 'feat: web dark mode (web)'],
+        'bug_fixes': ['fix: patch the shared parser (api)'],
+    }
+    assert tickets == {'ABC-2', 'ABC-3', 'ABC-11'}
+
+
+def test_shas_and_patch_ids_are_matched_separately():
+    sha, patch_id = 'a' * 40, 'b' * 40
+    snapshots = [
+        ('api', snapshot([sha, 'bug_fixes', 'fix: one', None, patch_id])),
+        # A different commit whose SHA happens to equal the first patch ID
+        ('web', snapshot([patch_id, 'bug_fixes', 'fix: two', None, 'c' * 40])),
+        ('mirror', snapshot([sha, 'bug_fixes', 'fix: one', None, patch_id])),
+    ]
+
+    categories, _ = merge_repositories(snapshots)
+
+    assert texts(categories) == {'bug_fixes': ['fix: one (api)', 'fix: two (web)']}
+
+
+def test_labels_can_be_left_out():
+    categories, tickets = merge_repositories(
+        [('api', snapshot(['a' * 40, 'bug_fixes', 'fix: one', 'ABC-1', ''], tickets=['ABC-1']))], label=False)
+
+    assert texts(categories) == {'bug_fixes': ['fix: one']}
+    assert tickets == {'ABC-1'}
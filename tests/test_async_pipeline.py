@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import pytest
+
+import async_pipeline
+from async_pipeline import TicketLookups, run_pipeline, walk_and_classify
+from fake_confluence import FakeConfluence
+from fake_jira import FakeJira
+from generate_release_notes import CLASSIFICATION_KEY, categorize_range, generate_and_publish
+from release_cache import open_classification_cache
+
+
+def shas(categories):
+    return {section: [commit.sha for commit in commits] for section, commits in categories.items()}
+
+
+@pytest.fixture
+def history(repo):
+    """v1.0.0 to v1.1.0 with 30 ticketed commits, some on a merged branch."""
+    repo.commit('feat: ABC-1 initial release')
+    repo.tag('v1.0.0')
+    repo.git('checkout', '-q', '-b', 'search')
+    for number in range(2, 12):
+        repo.commit(f'fix: ABC-{number} search fix {number}')
+    repo.git('checkout', '-q', 'main')
+    for number in range(12, 32):
+        repo.commit(f'feat: ABC-{number} feature {number}')
+    repo.git('merge', '-q', '--no-ff', '-m', 'Merge branch search', 'search')
+    repo.commit('chore: no ticket here')
+    repo.tag('v1.1.0')
+    return repo
+
+
+@pytest.fixture
+def services(history, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_NO_CACHE', '1')
+    monkeypatch.setenv('CONFLUENCE_RATE_LIMIT', '0')
+    monkeypatch.setenv('CONFLUENCE_API_USER', 'user')
+    monkeypatch.setenv('CONFLUENCE_API_TOKEN', 'token')
+    monkeypatch.setenv('SPACE_KEY', 'REL')
+    monkeypatch.setenv('ANCESTOR_ID', '1')
+    monkeypatch.setenv('PAGE_TITLE', 'v1.1.0 Release Notes')
+
+    def run(generate):
+        with FakeConfluence() as confluence, FakeJira() as jira:
+            for number in range(1, 32):
+                jira.add_issue(f'ABC-{number}', f'Summary {number}', 'Done')
+            monkeypatch.setenv('CONFLUENCE_BASE_URL', confluence.base_url)
+            monkeypatch.setenv('JIRA_BASE_URL', jira.base_url)
+            generate('v1.0.0', 'v1.1.0')
+        [page] = confluence.pages.values()
+        return page['body']['storage']['value'], confluence.calls, jira.calls
+
+    return run
+
+
+def test_async_page_matches_the_sync_page(services):
+    sync_body, sync_confluence, sync_jira = services(generate_and_publish)
+    async_body, async_confluence, async_jira = services(run_pipeline)
+
+    assert 'Summary 31' in sync_body
+    assert async_body == sync_body
+    assert len(async_confluence) == len(sync_confluence)
+    assert len(async_jira) == len(sync_jira)
+
+
+def test_tickets_are_looked_up_in_batches_as_they_appear(history, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_NO_CACHE', '1')
+    monkeypatch.setattr(async_pipeline, 'JIRA_BATCH_SIZE', 8)
+    monkeypatch.setattr(async_pipeline, 'CACHE_BATCH_SIZE', 5)
+    batches = []
+
+    def lookup_issues(keys, client, cache):
+        batches.append(keys)
+        return {}, 0
+
+    monkeypatch.setattr(async_pipeline, 'lookup_issues', lookup_issues)
+
+    class Client:
+        calls = 0
+
+    async def walk():
+        lookups = TicketLookups(Client())
+        with open_classification_cache(CLASSIFICATION_KEY) as cache:
+            result = await walk_and_classify('v1.0.0..v1.1.0', cache, lookups)
+        await lookups.results(len(result[1]))
+        return result
+
+    categories, jira_tickets = asyncio.run(walk())
+
+    assert [len(keys) for keys in batches] == [8, 8, 8, 6]
+    assert sorted(key for keys in batches for key in keys) == sorted(jira_tickets)
+    with open_classification_cache(CLASSIFICATION_KEY) as cache:
+        expected = categorize_range('v1.0.0', 'v1.1.0', cache)
+    assert shas(categories) == shas(expected[0])
+    assert jira_tickets == expected[1]
+
+
+def test_classification_runs_off_the_event_loop_thread(history, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_NO_CACHE', '1')
+    monkeypatch.setattr(async_pipeline, 'CACHE_BATCH_SIZE', 5)
+    threads = set()
+    iter_classified = async_pipeline.iter_classified
+
+    def recording(batch, cache):
+        threads.add(threading.current_thread())
+        return iter_classified(batch, cache)
+
+    monkeypatch.setattr(async_pipeline, 'iter_classified', recording)
+
+    async def walk():
+        with open_classification_cache(CLASSIFICATION_KEY) as cache:
+            return await walk_and_classify('v1.0.0..v1.1.0', cache, TicketLookups())
+
+    categories, _ = asyncio.run(walk())
+
+    assert sum(len(items) for items in categories.values()) == 32
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,91 @@
+from itertools import combinations
+
+import pytest
+
+import batch_release_notes
+from batch_release_notes import boundary_chain, build_batch, consecutive_ranges
+from generate_release_notes import SEGMENT_KEY, categorize_commits, get_git_log, list_release_tags
+from release_cache import SegmentStore
+from tag_index import reachable_tags
+
+
+def summary(categorized):
+    """Categories and tickets of a categorized range, ignoring commit order."""
+    categories, jira_tickets = categorized
+    return {
+        section: sorted((commit.sha, commit.text, commit.ticket) for commit in commits)
+        for section, commits in categories.items() if commits
+    }, jira_tickets
+
+
+def separate_walks(ranges):
+    return {tag_range: summary(categorize_commits(get_git_log(*tag_range))) for tag_range in ranges}
+
+
+@pytest.fixture
+def walked_separately(monkeypatch):
+    """Record the ranges build_batch falls back to categorizing on their own."""
+    fallbacks = []
+    categorize_range = batch_release_notes.categorize_range
+
+    def record(start, end, *args):
+        fallbacks.append((start, end))
+        return categorize_range(start, end, *args)
+
+    monkeypatch.setattr(batch_release_notes, 'categorize_range', record)
+    return fallbacks
+
+
+@pytest.fixture
+def segments(tmp_path):
+    with SegmentStore(str(tmp_path / 'segments.sqlite3'), SEGMENT_KEY) as store:
+        yield store
+
+
+def batch_summary(ranges, segments=None):
+    return {tag_range: summary(result) for tag_range, result in build_batch(ranges, segments=segments).items()}
+
+
+def test_merged_branches_are_labelled_with_their_first_release(merge_history, walked_separately):
+    ranges = list(combinations([name for name, _ in list_release_tags()], 2))
+
+    assert batch_summary(ranges) == separate_walks(ranges)
+    assert walked_separately == []
+
+
+def test_segments_stored_by_a_batch_are_reused(merge_history, segments, walked_separately):
+    ranges = consecutive_ranges(list_release_tags(), 'v*')
+    batch_summary(ranges, segments)
+
+    assert batch_summary([('v1.0.0', 'v1.3.0'), ('v1.1.0', 'v1.2.0')], segments) == separate_walks(
+        [('v1.0.0', 'v1.3.0'), ('v1.1.0', 'v1.2.0')]
+    )
+    assert walked_separately == []
+
+
+def test_hotfix_tags_inside_a_range_do_not_break_the_single_walk(hotfix_history, walked_separately):
+    ranges = [('v1.0.0', 'v1.3.0'), ('v1.0.0', 'v1.2.0'), ('v1.2.1', 'v1.3.0')]
+    names = [name for name, _ in boundary_chain(list_release_tags(), ranges, reachable_tags('v1.3.0'))]
+
+    assert names == ['v1.0.0', 'v1.1.0', 'v1.2.0', 'v1.2.1', 'v1.3.0']
+    assert batch_summary(ranges) == separate_walks(ranges)
+    assert walked_separately == []
+
+
+def test_ranges_ending_off_the_newest_release_are_walked_on_their_own(hotfix_history, walked_separately, capsys):
+    ranges = consecutive_ranges(list_release_tags(), 'v*')
+    assert ('v1.1.0', 'v1.1.1') in ranges
+
+    result = batch_summary(ranges)
+
+    assert list(result) == ranges
+    assert result == separate_walks(ranges)
+    assert walked_separately == [('v1.1.0', 'v1.1.1'), ('v1.1.1', 'v1.2.0')]
+    assert 'v1.1.1 is not an ancestor of v1.3.0' in capsys.readouterr().out
+
+
+def test_ranges_out_of_version_order_are_rejected(merge_history):
+    with pytest.raises(ValueError, match='not in version order'):
+        build_batch([('v1.2.0', 'v1.1.0')])
+    with pytest.raises(ValueError, match='not found'):
+        build_batch([('v1.0.0', 'v9.0.0')])
@@ -0,0 +1,71 @@
+import random
+
+from commit_classifier import CommitClassifier
+from generate_release_notes import parse_commit_message
+from release_notes_generator import CHANGE_CLASSIFIER
+
+RULES = [
+    ('features', ['feat:', 'feature:', 'new:']),
+    ('bugs', ['fix:', 'bug:', 'patch:']),
+    ('api', ['api:', 'endpoint:']),
+]
+
+
+def chain_classify(rules, message):
+    """The chain of `any(keyword in message)` checks the classifier replaces."""
+    lowered = message.lower()
+    for category, keywords in rules:
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return None
+
+
+def test_earliest_rule_wins_wherever_its_keyword_appears():
+    classifier = CommitClassifier(RULES, r'[A-Z]+-\d+')
+    assert classifier.classify('fix: crash in feat: export')[0] == 'features'
+    assert classifier.classify('api: endpoint: rename, bug: typo')[0] == 'bugs'
+
+
+def test_keywords_match_case_insensitively_anywhere():
+    classifier = CommitClassifier(RULES, r'[A-Z]+-\d+')
+    assert classifier.classify('Merge: FIX: null check')[0] == 'bugs'
+    assert classifier.classify('chore: bump deps') == (None, None)
+
+
+def test_shorter_keyword_of_an_earlier_rule_beats_a_longer_later_one():
+    classifier = CommitClassifier([('short', ['fix']), ('long', ['fixture'])], r'[A-Z]+-\d+')
+    assert classifier.classify('update fixture data')[0] == 'short'
+
+
+def test_first_ticket_is_returned_with_the_pattern_group():
+    classifier = CommitClassifier(RULES, r'\[?([A-Z]+-\d+)\]?')
+    assert classifier.classify('feat: [ABC-12] export, see DEF-3') == ('features', 'ABC-12')
+    assert [ticket for ticket, _ in classifier.iter_tickets('ABC-1 and DEF-2')] == ['ABC-1', 'DEF-2']
+
+
+def test_matches_the_substring_chain_on_random_messages():
+    words = ['feat:', 'fix:', 'api:', 'feature', 'patch:', 'endpoint', 'new:', 'x', 'FIX:', 'Api:']
+    classifier = CommitClassifier(RULES, r'[A-Z]+-\d+')
+    generator = random.Random(7)
+    for _ in range(2000):
+        message = ' '.join(generator.choice(words) for _ in range(generator.randint(0, 6)))
+        assert classifier.classify(message)[0] == chain_classify(RULES, message), message
+
+
+def test_change_classifier_matches_its_rules():
+    generator = random.Random(11)
+    keywords = [keyword for _, rule in CHANGE_CLASSIFIER.rules for keyword in rule]
+    for _ in range(1000):
+        message = ' '.join(generator.choice(keywords + ['other']) for _ in range(3))
+        assert CHANGE_CLASSIFIER.classify(message)[0] == chain_classify(CHANGE_CLASSIFIER.rules, message)
+
+
+def test_rules_hash_changes_with_the_rules():
+    assert CommitClassifier(RULES, 'X').rules_hash == CommitClassifier(RULES, 'X').rules_hash
+    assert CommitClassifier(RULES, 'X').rules_hash != CommitClassifier(RULES[::-1], 'X').rules_hash
+    assert CommitClassifier(RULES, 'X').rules_hash != CommitClassifier(RULES, 'Y').rules_hash
+
+
+def test_parse_commit_message_strips_the_ticket_reference():
+    assert parse_commit_message('feat: [PAY-12] | add export') == ('feat', 'feat: add export', 'PAY-12')
+    assert parse_commit_message('docs: readme') == ('other', 'docs: readme', None)
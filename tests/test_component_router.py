@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from component_release_notes import route_commits
+from component_router import ComponentRouter, load_components
+
+COMPONENTS = {
+    'billing': ['services/billing', 'libs/payments'],
+    'search': ['services/search'],
+    'platform': ['services'],
+}
+
+
+def subjects(commits):
+    return [commit.subject for commit in commits]
+
+
+def test_prefixes_match_whole_directory_names():
+    router = ComponentRouter({'bill': ['services/bill'], 'billing': ['services/billing/']})
+
+    assert router.route_path('services/billing/api.py') == {'billing'}
+    assert router.route_path('services/bill/api.py') == {'bill'}
+    assert router.route_path('services/bill') == {'bill'}
+    assert router.route_path('services/billing.md') == set()
+
+
+def test_nested_prefixes_route_to_every_owner():
+    router = ComponentRouter(COMPONENTS)
+
+    assert router.route_path('services/billing/api.py') == {'billing', 'platform'}
+    assert router.route_path('services/README.md') == {'platform'}
+    assert router.route_path('libs/payments/card.py') == {'billing'}
+    assert router.route_path('docs/index.md') == set()
+
+
+def test_route_unions_the_owners_of_all_paths():
+    router = ComponentRouter({'billing': ['services/billing'], 'search': ['services/search']})
+
+    assert router.route(['services/billing/api.py', 'services/search/index.py', 'README.md']) == {
+        'billing', 'search'}
+    assert router.route(['README.md']) == set()
+    assert router.route([]) == set()
+
+
+def test_load_components_accepts_a_single_prefix(tmp_path):
+    path = tmp_path / 'components.json'
+    path.write_text(json.dumps({'billing': 'services/billing', 'search': ['services/search']}))
+
+    assert load_components(str(path)) == {'billing': ['services/billing'], 'search': ['services/search']}
+
+
+@pytest.mark.parametrize('content', ['{not json', '[]', '{}', '{"billing": [1]}'])
+def test_load_components_rejects_bad_files(tmp_path, content):
+    path = tmp_path / 'components.json'
+    path.write_text(content)
+
+    with pytest.raises(ValueError):
+        load_components(str(path))
+
+
+def test_route_commits_shares_commits_and_counts_unrouted(repo):
+    repo.commit('feat: ABC-1 initial release', {'README.md': 'hello\n'})
+    repo.tag('v1.0.0')
+    repo.commit('feat: ABC-2 card payments', {'services/billing/api.py': '1\n'})
+    repo.commit('fix: ABC-3 shared search and billing fix',
+                {'services/billing/api.py': '2\n', 'services/search/index.py': '1\n'})
+    repo.commit('docs: update the readme', {'README.md': 'hello again\n'})
+    repo.commit('chore: empty commit', {})
+    repo.tag('v1.1.0')
+    router = ComponentRouter({'billing': ['services/billing'], 'search': ['services/search']})
+
+    routed, unrouted = route_commits('v1.0.0', 'v1.1.0', router)
+
+    assert subjects(routed['billing']) == ['fix: ABC-3 shared search and billing fix', 'feat: ABC-2 card payments']
+    assert subjects(routed['search']) == ['fix: ABC-3 shared search and billing fix']
+    # The shared commit is the same object in both components
+    assert routed['billing'][0] is routed['search'][0]
+    assert unrouted == 2
+
+
+def test_route_commits_routes_merges_by_first_parent_diff(repo):
+    repo.commit('feat: ABC-1 initial release', {'README.md': 'hello\n'})
+    repo.tag('v1.0.0')
+    repo.git('checkout', '-q', '-b', 'search')
+    repo.commit('feat: ABC-2 search box', {'services/search/index.py': '1\n'})
+    repo.git('checkout', '-q', 'main')
+    repo.commit('feat: ABC-3 card payments', {'services/billing/api.py': '1\n'})
+    repo.git('merge', '-q', '--no-ff', '-m', 'feat: ABC-4 merge the search box', 'search')
+    repo.tag('v1.1.0')
+    router = ComponentRouter({'billing': ['services/billing'], 'search': ['services/search']})
+
+    routed, unrouted = route_commits('v1.0.0', 'v1.1.0', router)
+
+    # The merge brought the search branch into main, not the billing change
+    assert subjects(routed['search']) == ['feat: ABC-4 merge the search box', 'feat: ABC-2 search box']
+    assert subjects(routed['billing']) == ['feat: ABC-3 card payments']
+    assert unrouted == 0
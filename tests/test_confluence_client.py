@@ -0,0 +1,207 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+import confluence_client
+from confluence_client import ConfluenceClient, ConfluenceError, TokenBucket, _retry_after
+from fake_confluence import FakeConfluence
+from release_cache import PageCache
+
+
+@pytest.fixture
+def confluence():
+    with FakeConfluence() as fake:
+        yield fake
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the client's backoff sleeps instead of waiting."""
+    delays = []
+    monkeypatch.setattr(confluence_client.time, 'sleep', delays.append)
+    return delays
+
+
+def make_client(base_url, tmp_path=None, **options):
+    page_cache = PageCache(str(tmp_path / 'pages.db')) if tmp_path else None
+    return ConfluenceClient(base_url, 'user', 'token', page_cache=page_cache, **options)
+
+
+class FakeResponse:
+    def __init__(self, retry_after):
+        self.headers = {'Retry-After': retry_after} if retry_after is not None else {}
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert _retry_after(FakeResponse('3')) == 3.0
+    assert 9 < _retry_after(FakeResponse(formatdate(time.time() + 10, usegmt=True))) <= 10
+    assert _retry_after(FakeResponse('soon')) is None
+    assert _retry_after(FakeResponse(None)) is None
+
+
+def test_throttled_requests_wait_for_retry_after(sleeps):
+    with FakeConfluence(throttle_every=2, retry_after=2) as fake:
+        client = make_client(fake.base_url)
+        action, page = client.publish_page('SPACE', 'Notes', '<p>v1</p>')
+
+    assert action == 'created'
+    # The title lookup goes through, the create is throttled once and retried
+    assert fake.calls == [('GET', '/rest/api/content'), ('POST', '/rest/api/content'),
+                          ('POST', '/rest/api/content')]
+    assert sleeps == [2.0]
+    assert len(fake.pages) == 1
+
+
+def test_gives_up_after_max_retries(sleeps):
+    with FakeConfluence(throttle_every=1) as fake:
+        client = make_client(fake.base_url, max_retries=3)
+        with pytest.raises(ConfluenceError) as raised:
+            client.get_page_by_title('SPACE', 'Notes')
+
+    assert raised.value.status == 429
+    assert len(fake.calls) == 4
+    assert len(sleeps) == 3
+
+
+def test_connection_errors_retry_reads_but_not_creates(sleeps):
+    with FakeConfluence() as fake:
+        base_url = fake.base_url
+    # The server is gone, so every request fails to connect
+    client = make_client(base_url, max_retries=2, backoff=0.1, timeout=1)
+
+    with pytest.raises(ConfluenceError):
+        client.get_page_by_title('SPACE', 'Notes')
+    # Exponential backoff with jitter: 0.1 * 2**attempt, scaled by 0.5 to 1
+    assert len(sleeps) == 2
+    assert 0.05 <= sleeps[0] <= 0.1 and 0.1 <= sleeps[1] <= 0.2
+
+    sleeps.clear()
+    with pytest.raises(ConfluenceError):
+        client.create_page('SPACE', 'Notes', '<p>v1</p>')
+    assert sleeps == []
+
+
+def test_page_id_cache_turns_republishing_into_a_single_put(confluence, tmp_path):
+    client = make_client(confluence.base_url, tmp_path)
+    client.publish_page('SPACE', 'Notes', '<p>v1</p>', ancestor_id='1')
+    assert [method for method, _ in confluence.calls] == ['GET', 'POST']
+
+    # A new client (a later run) reuses the page id and version from disk
+    client = make_client(confluence.base_url, tmp_path)
+    action, page = client.publish_page('SPACE', 'Notes', '<p>v2</p>', ancestor_id='1')
+
+    assert action == 'updated'
+    assert [method for method, _ in confluence.calls] == ['GET', 'POST', 'PUT']
+    assert page['version']['number'] == 2
+    assert confluence.pages[page['id']]['body']['storage']['value'] == '<p>v2</p>'
+
+
+def test_stale_cached_version_is_refreshed_and_retried(confluence, tmp_path):
+    client = make_client(confluence.base_url, tmp_path)
+    _, page = client.publish_page('SPACE', 'Notes', '<p>v1</p>')
+    # Someone edits the page by hand
+    confluence.pages[page['id']]['version']['number'] = 5
+
+    action, page = client.publish_page('SPACE', 'Notes', '<p>v2</p>')
+
+    assert action == 'updated'
+    assert page['version']['number'] == 6
+    assert [method for method, _ in confluence.calls] == ['GET', 'POST', 'PUT', 'GET', 'PUT']
+
+
+def test_prefetched_page_saves_the_title_lookup(confluence):
+    client = make_client(confluence.base_url)
+    client.publish_page('SPACE', 'Notes', '<p>v1</p>')
+    client.prefetch_page('SPACE', 'Notes')
+    calls = len(confluence.calls)
+
+    action, _ = client.publish_page('SPACE', 'Notes', '<p>v2</p>')
+
+    assert action == 'updated'
+    assert [method for method, _ in confluence.calls[calls:]] == ['PUT']
+
+
+def test_unchanged_content_is_skipped_without_a_request(confluence, tmp_path):
+    client = make_client(confluence.base_url, tmp_path)
+    _, page = client.publish_page('SPACE', 'Notes', '<p>v1</p>', ancestor_id='1')
+    calls = len(confluence.calls)
+
+    action, skipped = client.publish_page('SPACE', 'Notes', '<p>v1</p>', ancestor_id='1')
+
+    assert action == 'skipped'
+    assert skipped['id'] == page['id']
+    assert len(confluence.calls) == calls
+    assert client.publish_summary() == '1 created, 0 updated, 1 skipped (unchanged)'
+
+
+@pytest.mark.parametrize('change', [
+    {'body': '<p>v2</p>'},
+    {'ancestor_id': '2'},
+    {'representation': 'wiki'},
+])
+def test_any_change_to_what_is_written_publishes_again(confluence, tmp_path, change):
+    client = make_client(confluence.base_url, tmp_path)
+    publish = dict(space_key='SPACE', title='Notes', body='<p>v1</p>', ancestor_id='1')
+    client.publish_page(**publish)
+
+    action, _ = client.publish_page(**dict(publish, **change))
+
+    assert action == 'updated'
+
+
+def test_force_publishes_unchanged_content(confluence, tmp_path, monkeypatch):
+    client = make_client(confluence.base_url, tmp_path)
+    client.publish_page('SPACE', 'Notes', '<p>v1</p>')
+
+    assert client.publish_page('SPACE', 'Notes', '<p>v1</p>', force=True)[0] == 'updated'
+    monkeypatch.setenv('CONFLUENCE_FORCE_PUBLISH', '1')
+    assert client.publish_page('SPACE', 'Notes', '<p>v1</p>')[0] == 'updated'
+
+
+class FakeClock:
+    """A monotonic clock that only moves when the bucket sleeps."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_a_burst_then_paces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.sleeps == pytest.approx([0.25] * 4)
+    assert clock.now == pytest.approx(101.0)
+
+
+def test_token_bucket_refills_while_idle_up_to_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+
+    clock.now += 60
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([0.5])
+
+
+def test_token_bucket_burst_defaults_to_one_second_of_requests():
+    assert TokenBucket(rate=10).capacity == 10
+    assert TokenBucket(rate=0.5).capacity == 1
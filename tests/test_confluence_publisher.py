@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from confluence_publisher import PublishTarget, env_targets, parse_targets, publish_page_tree, publish_to_targets
+from fake_confluence import FakeConfluence
+
+LATENCY = 0.2
+
+
+@pytest.fixture
+def confluence(monkeypatch):
+    with FakeConfluence(latency=LATENCY) as fake:
+        monkeypatch.setenv('CONFLUENCE_BASE_URL', fake.base_url)
+        monkeypatch.setenv('CONFLUENCE_API_USER', 'user')
+        monkeypatch.setenv('CONFLUENCE_API_TOKEN', 'token')
+        monkeypatch.setenv('CONFLUENCE_RATE_LIMIT', '0')
+        monkeypatch.setenv('RELEASE_NOTES_NO_CACHE', '1')
+        yield fake
+
+
+def test_targets_are_parsed_from_the_environment(monkeypatch):
+    assert parse_targets('ENG:1, OPS:2,') == [('ENG', '1'), ('OPS', '2')]
+    with pytest.raises(ValueError, match='SPACE_KEY:ANCESTOR_ID'):
+        parse_targets('ENG')
+
+    monkeypatch.delenv('CONFLUENCE_TARGETS', raising=False)
+    monkeypatch.setenv('SPACE_KEY', 'REL')
+    monkeypatch.setenv('ANCESTOR_ID', '9')
+    assert env_targets('Notes', 'body') == [PublishTarget('REL', '9', 'Notes', 'body')]
+    monkeypatch.setenv('CONFLUENCE_TARGETS', 'ENG:1,OPS:2')
+    assert [target.space_key for target in env_targets('Notes', 'body')] == ['ENG', 'OPS']
+
+
+def test_targets_are_published_concurrently(confluence):
+    targets = [PublishTarget(space, '1', 'v1.0.0 Release Notes', '<p>notes</p>') for space in 'ABCDEF']
+
+    started = time.monotonic()
+    results = publish_to_targets(targets, representation='storage')
+    elapsed = time.monotonic() - started
+
+    # Each publish is a title lookup and a create, so one at a time would take 12 round trips
+    assert elapsed < 6 * LATENCY
+    assert [(result.target.space_key, result.action, result.error) for result in results] == [
+        (space, 'created', None) for space in 'ABCDEF'
+    ]
+    assert sorted(page['space']['key'] for page in confluence.pages.values()) == list('ABCDEF')
+
+
+def test_a_failing_target_does_not_stop_the_others(confluence, capsys):
+    targets = [
+        PublishTarget('ENG', '1', 'Notes', '<p>notes</p>'),
+        PublishTarget('OPS', None, 'Notes', '<p>notes</p>'),
+        PublishTarget('SUP', '3', 'Notes', '<p>notes</p>'),
+    ]
+
+    results = publish_to_targets(targets, representation='storage')
+
+    assert [result.action for result in results] == ['created', None, 'created']
+    assert isinstance(results[1].error, ValueError)
+    assert {page['space']['key'] for page in confluence.pages.values()} == {'ENG', 'SUP'}
+    output = capsys.readouterr().out
+    assert '❌ OPS/None: Notes failed' in output
+    assert 'Published 2 of 3 targets' in output
+
+
+def test_child_pages_are_published_under_each_parent(confluence):
+    targets = [PublishTarget(space, '1', 'v2.0.0 Release Notes', '<p>summary</p>') for space in ('ENG', 'OPS')]
+    children = [('v2.0.0 Release Notes - New features', '<p>features</p>'),
+                ('v2.0.0 Release Notes - Bug fixes', '<p>fixes</p>')]
+
+    results = publish_page_tree(targets, children, representation='storage')
+
+    assert [result.action for result in results] == ['created'] * 6
+    parents = {result.target.space_key: result.page['id'] for result in results[:2]}
+    for result in results[2:]:
+        assert result.target.ancestor_id == parents[result.target.space_key]
@@ -0,0 +1,183 @@
+from itertools import combinations
+
+import pytest
+
+from generate_release_notes import (
+    SEGMENT_KEY,
+    categorize_commits,
+    categorize_incremental,
+    categorize_range,
+    get_git_log,
+    list_release_tags,
+    plan_segments,
+    segment_chain,
+)
+from git_log_reader import iter_git_log
+from release_cache import SegmentStore, WatermarkStore
+
+
+def summary(categorized):
+    """Categories and tickets of a categorized range, ignoring commit order."""
+    categories, jira_tickets = categorized
+    return {
+        section: sorted((commit.sha, commit.text, commit.ticket) for commit in commits)
+        for section, commits in categories.items() if commits
+    }, jira_tickets
+
+
+def direct_walk(start, end):
+    return summary(categorize_commits(get_git_log(start, end)))
+
+
+@pytest.fixture
+def segments(tmp_path):
+    with SegmentStore(str(tmp_path / 'segments.sqlite3'), SEGMENT_KEY) as store:
+        yield store
+
+
+def release_pairs():
+    names = [name for name, _ in list_release_tags()]
+    return list(combinations(names, 2))
+
+
+@pytest.mark.parametrize('history', ['merge_history', 'hotfix_history'])
+def test_composed_ranges_match_a_direct_walk(history, request, segments):
+    request.getfixturevalue(history)
+
+    for start, end in release_pairs():
+        assert summary(categorize_range(start, end, segments=segments)) == direct_walk(start, end), (start, end)
+    # Again with every segment stored
+    for start, end in release_pairs():
+        assert summary(categorize_range(start, end, segments=segments)) == direct_walk(start, end), (start, end)
+
+
+def test_merged_branches_are_split_at_each_release(merge_history, segments):
+    categorize_range('v1.0.0', 'v1.3.0', segments=segments)
+
+    plan = plan_segments('v1.0.0', 'v1.3.0', segments)
+
+    assert len(plan) == 3
+    assert all(snapshot is not None for _, _, snapshot in plan)
+    counts = [sum(snapshot['counts'].values()) for _, _, snapshot in plan]
+    # The v1.2.0 segment holds the export branch although it began before v1.1.0
+    assert counts == [4, 3, 1]
+
+
+def test_hotfix_tags_off_the_range_are_not_boundaries(hotfix_history, segments):
+    names = [name for name, _ in segment_chain('v1.0.0', 'v1.3.0')]
+    assert names == ['v1.0.0', 'v1.1.0', 'v1.2.0', 'v1.2.1', 'v1.3.0']
+
+    categorize_range('v1.0.0', 'v1.3.0', segments=segments)
+    plan = plan_segments('v1.0.0', 'v1.3.0', segments)
+
+    assert len(plan) == 4
+    assert all(snapshot is not None and snapshot.get('linear') is not False for _, _, snapshot in plan)
+
+
+def test_range_from_an_unmerged_hotfix_is_walked_directly(hotfix_history, segments):
+    assert plan_segments('v1.1.1', 'v1.2.0', segments) is None
+    # The failed check is remembered and does not affect other ranges
+    assert plan_segments('v1.1.1', 'v1.2.0', segments) is None
+    assert len(plan_segments('v1.1.0', 'v1.2.0', segments)) == 1
+    assert summary(categorize_range('v1.1.1', 'v1.3.0', segments=segments)) == direct_walk('v1.1.1', 'v1.3.0')
+
+
+def test_without_a_segment_store_the_range_is_walked(merge_history):
+    assert plan_segments('v1.0.0', 'v1.3.0', None) is None
+    assert summary(categorize_range('v1.0.0', 'v1.3.0')) == direct_walk('v1.0.0', 'v1.3.0')
+
+
+@pytest.fixture
+def watermarks(tmp_path):
+    with WatermarkStore(str(tmp_path / 'watermarks.sqlite3'), SEGMENT_KEY) as store:
+        yield store
+
+
+@pytest.fixture
+def release_branch(repo):
+    """v2.0.0 on main and a release/2.x branch with two fixes after it."""
+    repo.commit('feat: ABC-1 first feature')
+    repo.tag('v2.0.0')
+    repo.git('checkout', '-q', '-b', 'release/2.x')
+    repo.commit('fix: ABC-2 first fix')
+    repo.commit('fix: ABC-3 second fix')
+    return repo
+
+
+def full_walk(start, end):
+    return summary(categorize_commits(iter_git_log(f'{start}..{end}')))
+
+
+def incremental(watermarks, capsys):
+    result = summary(categorize_incremental('v2.0.0', 'release/2.x', watermarks))
+    return result, capsys.readouterr().out
+
+
+def test_incremental_runs_walk_only_new_commits(release_branch, watermarks, capsys):
+    first, output = incremental(watermarks, capsys)
+    assert first == full_walk('v2.0.0', 'release/2.x')
+    assert 'Incremental' not in output
+
+    release_branch.commit('fix: ABC-4 third fix')
+    release_branch.commit('feat: ABC-5 late feature')
+    second, output = incremental(watermarks, capsys)
+
+    assert '🔁 Incremental update: 2 new commits' in output
+    assert second == full_walk('v2.0.0', 'release/2.x')
+    assert second[1] == {'ABC-2', 'ABC-3', 'ABC-4', 'ABC-5'}
+
+    third, output = incremental(watermarks, capsys)
+    assert '⏭️ No new commits' in output
+    assert third == second
+
+
+def test_force_pushed_branch_is_walked_again(release_branch, watermarks, capsys):
+    incremental(watermarks, capsys)
+    release_branch.git('reset', '-q', '--hard', 'HEAD~1')
+    release_branch.commit('fix: ABC-9 rewritten fix')
+
+    result, output = incremental(watermarks, capsys)
+
+    assert 'Incremental' not in output
+    assert result == full_walk('v2.0.0', 'release/2.x')
+    assert result[1] == {'ABC-2', 'ABC-9'}
+
+
+def test_moved_start_tag_is_walked_again(release_branch, watermarks, capsys):
+    incremental(watermarks, capsys)
+    release_branch.git('tag', '-f', 'v2.0.0', 'release/2.x~1')
+    release_branch.commit('fix: ABC-4 third fix')
+
+    result, output = incremental(watermarks, capsys)
+
+    assert 'Incremental' not in output
+    assert result == full_walk('v2.0.0', 'release/2.x')
+    assert result[1] == {'ABC-3', 'ABC-4'}
+
+
+def test_merged_branches_are_picked_up_incrementally(release_branch, watermarks, capsys):
+    # A branch started before the last run and merged after it
+    release_branch.git('checkout', '-q', '-b', 'backport', 'release/2.x~1')
+    release_branch.commit('fix: ABC-6 backported fix')
+    release_branch.git('checkout', '-q', 'release/2.x')
+    incremental(watermarks, capsys)
+    # main moved on too; its commits since v2.0.0 belong in the range once merged
+    release_branch.git('checkout', '-q', 'main')
+    release_branch.commit('feat: ABC-7 feature from main')
+    release_branch.git('checkout', '-q', 'release/2.x')
+    release_branch.git('merge', '-q', '--no-ff', '-m', 'Merge backport', 'backport')
+    release_branch.git('merge', '-q', '--no-ff', '-m', 'Merge main', 'main')
+
+    result, output = incremental(watermarks, capsys)
+
+    assert '🔁 Incremental update: 4 new commits' in output
+    assert result == full_walk('v2.0.0', 'release/2.x')
+    assert result[1] == {'ABC-2', 'ABC-3', 'ABC-6', 'ABC-7'}
+
+
+def test_tag_end_ref_composes_stored_segments(merge_history, watermarks, segments, capsys):
+    categorized = categorize_incremental('v1.0.0', 'v1.3.0', watermarks, segments=segments)
+
+    assert summary(categorized) == direct_walk('v1.0.0', 'v1.3.0')
+    assert all(snapshot is not None for _, _, snapshot in plan_segments('v1.0.0', 'v1.3.0', segments))
+    assert watermarks.get('v1.0.0..v1.3.0').head_sha == merge_history.git('rev-parse', 'v1.3.0')
@@ -0,0 +1,114 @@
+import pytest
+
+import git_backend
+from conftest import GitRepo
+from git_backend import GitBackend, get_backend
+
+
+@pytest.fixture
+def history(repo):
+    first = repo.commit('feat: ABC-1 first release')
+    repo.tag('v1.0.0')
+    # An annotated tag resolves to the commit, not the tag object
+    repo.git('tag', '-a', '-m', 'Release 1.0.1', 'v1.0.1')
+    repo.git('checkout', '-q', '-b', 'release/1.x')
+    fix = repo.commit('fix: ABC-2 null check\n\nLonger explanation\nover two lines.', author='Jane Doe')
+    repo.git('checkout', '-q', 'main')
+    feature = repo.commit('feat: ABC-3 search')
+    return {'first': first, 'fix': fix, 'feature': feature}
+
+
+@pytest.fixture(params=['batch', 'subprocess'])
+def backend(request, repo, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_GIT_BACKEND', request.param)
+    git = GitBackend(repo.path)
+    yield git
+    git.close()
+
+
+def test_resolves_tags_branches_and_short_shas(history, backend):
+    assert backend.resolve('v1.0.0') == history['first']
+    assert backend.resolve('v1.0.1') == history['first']
+    assert backend.resolve('release/1.x') == history['fix']
+    assert backend.resolve('main') == history['feature']
+    assert backend.resolve(history['fix'][:8]) == history['fix']
+    assert backend.resolve('HEAD~1') == history['first']
+
+
+def test_missing_refs_resolve_to_none(history, backend):
+    assert backend.resolve('v9.9.9') is None
+    assert backend.resolve('no-such-branch') is None
+    assert backend.resolve('') is None
+    assert backend.resolve('main\nv1.0.0') is None
+    assert backend.read_commit('v9.9.9') is None
+    # Still answering after a miss
+    assert backend.resolve('main') == history['feature']
+
+
+def test_reads_commits_like_git_log(history, backend):
+    commit = backend.read_commit('release/1.x')
+
+    assert commit.sha == history['fix']
+    assert commit.author == 'Jane Doe'
+    assert commit.parents == (history['first'],)
+    assert commit.subject == 'fix: ABC-2 null check'
+    assert commit.body == 'Longer explanation\nover two lines.'
+
+
+def test_is_ancestor(history, backend):
+    assert backend.is_ancestor('v1.0.0', 'main')
+    assert backend.is_ancestor('v1.0.0', 'v1.0.0')
+    assert not backend.is_ancestor('release/1.x', 'main')
+    assert not backend.is_ancestor('main', 'v1.0.0')
+    assert not backend.is_ancestor('v9.9.9', 'main')
+
+
+def test_one_process_answers_every_lookup(history, repo, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_GIT_BACKEND', 'batch')
+    started = []
+    start = GitBackend._start
+
+    def record(self):
+        started.append(self)
+        start(self)
+
+    monkeypatch.setattr(GitBackend, '_start', record)
+    backend = GitBackend(repo.path)
+    for ref in ('v1.0.0', 'main', 'release/1.x', 'v9.9.9', 'main'):
+        backend.resolve(ref)
+    backend.close()
+
+    assert len(started) == 1
+
+
+def test_subprocess_setting_never_starts_cat_file(history, repo, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_GIT_BACKEND', 'subprocess')
+    monkeypatch.setattr(GitBackend, '_start', lambda self: pytest.fail('cat-file --batch was started'))
+
+    backend = GitBackend(repo.path)
+
+    assert not backend.enabled
+    assert backend.resolve('main') == history['feature']
+
+
+def test_falls_back_to_subprocesses_when_cat_file_dies(history, repo, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_GIT_BACKEND', 'batch')
+    backend = GitBackend(repo.path)
+    assert backend.resolve('v1.0.0') == history['first']
+
+    backend._process.kill()
+    backend._process.wait()
+
+    assert backend.resolve('main') == history['feature']
+    assert not backend.enabled
+    assert backend._process is None
+
+
+def test_backends_are_shared_per_repository(repo, tmp_path):
+    other = tmp_path / 'other'
+    other.mkdir()
+    GitRepo(other)
+
+    assert get_backend() is get_backend(repo.path)
+    assert get_backend(str(other)) is not get_backend()
+    git_backend.close_backends()
@@ -0,0 +1,67 @@
+import os
+import stat
+import subprocess
+import threading
+
+import pytest
+
+from git_log_reader import FileStat, iter_git_log
+
+
+def test_streams_messages_with_separators_and_newlines(repo):
+    repo.commit('chore: start')
+    repo.tag('v1.0.0')
+    first = repo.commit('feat: pipes | in the subject\n\nA body\nover two lines')
+    repo.commit('fix: second')
+    repo.tag('v1.1.0')
+
+    commits = list(iter_git_log('v1.0.0..v1.1.0'))
+
+    assert [commit.subject for commit in commits] == ['fix: second', 'feat: pipes | in the subject']
+    assert commits[1].sha == first
+    assert commits[1].body == 'A body\nover two lines'
+    assert commits[1].author == 'Test Author'
+
+
+def test_numstat_counts_renames_and_binary_files(repo):
+    repo.commit('base', {'src/app.py': 'a\nb\nc\n', 'logo.png': b'\x00\x01'})
+    repo.tag('v1.0.0')
+    repo.git('mv', 'src/app.py', 'src/main.py')
+    repo.commit('feat: rename', {'src/main.py': 'a\nb\nc\nd\n', 'logo.png': b'\x00\x02'})
+
+    [(commit, files)] = list(iter_git_log('v1.0.0..HEAD', with_numstat=True))
+
+    assert commit.subject == 'feat: rename'
+    assert sorted(files) == [FileStat(0, 0, 'logo.png'), FileStat(1, 0, 'src/main.py')]
+
+
+def test_failed_walk_reports_git_stderr(repo):
+    repo.commit('first')
+    with pytest.raises(subprocess.CalledProcessError) as raised:
+        list(iter_git_log('missing-tag..HEAD'))
+    assert 'missing-tag' in raised.value.stderr
+
+
+def test_large_stderr_does_not_block_the_walk(repo, tmp_path, monkeypatch):
+    # A git that writes more warnings than a pipe buffer holds before its output
+    real_git = subprocess.run(['which', 'git'], capture_output=True, text=True).stdout.strip()
+    wrapper = tmp_path / 'bin' / 'git'
+    wrapper.parent.mkdir()
+    wrapper.write_text(
+        '#!/bin/sh\n'
+        'head -c 1000000 /dev/zero | tr "\\0" "w" >&2\n'
+        f'exec {real_git} "$@"\n'
+    )
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{wrapper.parent}{os.pathsep}{os.environ['PATH']}")
+    repo.commit('feat: one')
+
+    # Walk on a thread so a deadlock fails the test instead of hanging it
+    subjects = []
+    walker = threading.Thread(
+        target=lambda: subjects.extend(commit.subject for commit in iter_git_log('HEAD')), daemon=True
+    )
+    walker.start()
+    walker.join(30)
+    assert not walker.is_alive(), 'git log reader blocked on a full stderr pipe'
+    assert subjects == ['feat: one']
@@ -0,0 +1,103 @@
+import json
+import logging
+import re
+
+import pytest
+
+import instrumentation
+from instrumentation import LATENCY_BUCKETS, Metrics, write_report
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    recorded = Metrics()
+    clock = iter([10.0, 10.5, 20.0, 20.25, 30.0, 31.0])
+    monkeypatch.setattr(instrumentation.time, 'perf_counter', lambda: next(clock))
+    with recorded.stage('categorize'):
+        pass
+    with recorded.stage('categorize'):
+        pass
+    with recorded.stage('publish'):
+        pass
+    recorded.count('http_requests', service='jira', method='POST', status='200')
+    recorded.count('http_requests', 2, service='jira', method='POST', status='200')
+    recorded.count('git_processes')
+    recorded.gauge('tickets', 42)
+    recorded.gauge('items', 3, category='bug_fixes')
+    recorded.observe('http_request_seconds', 0.02, service='jira')
+    recorded.observe('http_request_seconds', 0.3, service='jira')
+    return recorded
+
+
+def test_stages_accumulate_time_and_calls(metrics):
+    assert metrics.summary() == 'Stages: categorize 0.750s, publish 1.000s'
+    assert Metrics().summary() == 'Stages: none'
+
+
+def test_json_report(metrics):
+    report = json.loads(json.dumps(metrics.report()))
+
+    assert report['stages'] == {
+        'categorize': {'seconds': 0.75, 'calls': 2},
+        'publish': {'seconds': 1.0, 'calls': 1},
+    }
+    assert report['counters'] == {
+        'http_requests{method=POST,service=jira,status=200}': 3,
+        'git_processes': 1,
+    }
+    assert report['gauges'] == {'tickets': 42, 'items{category=bug_fixes}': 3}
+    assert report['latencies'] == {
+        'http_request_seconds{service=jira}': {'count': 2, 'sum': 0.32, 'mean': 0.16, 'max': 0.3},
+    }
+
+
+def test_prometheus_textfile(metrics):
+    lines = metrics.prometheus().splitlines()
+
+    assert lines[:3] == [
+        '# TYPE release_notes_stage_seconds gauge',
+        'release_notes_stage_seconds{stage="categorize"} 0.750000',
+        'release_notes_stage_seconds{stage="publish"} 1.000000',
+    ]
+    assert '# TYPE release_notes_http_requests_total counter' in lines
+    assert 'release_notes_http_requests_total{method="POST",service="jira",status="200"} 3' in lines
+    assert 'release_notes_git_processes_total 1' in lines
+    assert 'release_notes_items{category="bug_fixes"} 3' in lines
+    # Histogram buckets are cumulative and end with +Inf
+    buckets = [line for line in lines if line.startswith('release_notes_http_request_seconds_bucket')]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 2
+    assert 'release_notes_http_request_seconds_bucket{service="jira",le="0.025"} 1' in lines
+    assert 'release_notes_http_request_seconds_sum{service="jira"} 0.320000' in lines
+    assert 'release_notes_http_request_seconds_count{service="jira"} 2' in lines
+    # Every sample line is '<name>{labels} <value>' and every metric is declared once
+    for line in lines:
+        assert line.startswith('# TYPE ') or re.match(r'^[a-z_]+(\{[^}]*\})? \S+$', line)
+    declared = [line.split()[2] for line in lines if line.startswith('# TYPE ')]
+    assert len(declared) == len(set(declared))
+
+
+def test_write_report_logs_the_summary_and_writes_both_files(metrics, tmp_path, monkeypatch, caplog):
+    json_path = tmp_path / 'metrics.json'
+    prometheus_path = tmp_path / 'release_notes.prom'
+    monkeypatch.setenv('RELEASE_NOTES_METRICS', str(json_path))
+    monkeypatch.setenv('RELEASE_NOTES_PROMETHEUS', str(prometheus_path))
+
+    with caplog.at_level(logging.INFO, logger='instrumentation'):
+        write_report(metrics)
+
+    assert '📊 Stages: categorize 0.750s, publish 1.000s' in caplog.messages
+    assert json.loads(json_path.read_text())['gauges']['tickets'] == 42
+    assert prometheus_path.read_text() == metrics.prometheus()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['metrics.json', 'release_notes.prom']
+
+
+def test_unwritable_metric_file_is_a_warning(metrics, monkeypatch, caplog, tmp_path):
+    monkeypatch.delenv('RELEASE_NOTES_METRICS', raising=False)
+    monkeypatch.setenv('RELEASE_NOTES_PROMETHEUS', str(tmp_path / 'missing' / 'release_notes.prom'))
+
+    with caplog.at_level(logging.INFO, logger='instrumentation'):
+        write_report(metrics)
+
+    assert any(message.startswith('⚠️ Could not write metrics') for message in caplog.messages)
@@ -0,0 +1,119 @@
+import re
+
+import pytest
+
+from fake_jira import FakeJira
+from jira_client import JiraClient, JiraIssue, enrich_tickets
+from release_cache import JiraIssueCache
+
+KEY_IN_RE = re.compile(r'key in \(([^)]*)\)')
+
+
+@pytest.fixture
+def jira():
+    with FakeJira() as fake:
+        for number in range(1, 301):
+            fake.add_issue(f'ABC-{number}', f'Summary {number}', 'Done', ['1.0'] if number % 2 else [])
+        yield fake
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with JiraIssueCache(str(tmp_path / 'jira.db')) as jira_cache:
+        yield jira_cache
+
+
+def searched_keys(fake):
+    return [len(KEY_IN_RE.search(jql).group(1).split(', ')) for jql in fake.searches]
+
+
+@pytest.fixture(autouse=True)
+def record_searches(monkeypatch):
+    # Keep the JQL of every search, to check how keys were batched
+    original = FakeJira._search
+
+    def search(self, jql, *args):
+        self.__dict__.setdefault('searches', []).append(jql)
+        return original(self, jql, *args)
+
+    monkeypatch.setattr(FakeJira, '_search', search)
+
+
+def test_tickets_are_fetched_in_batched_key_in_searches(jira, cache):
+    client = JiraClient(jira.base_url, 'user', 'token')
+    keys = [f'ABC-{number}' for number in range(1, 251)]
+
+    issues = enrich_tickets(keys, client, cache, batch_size=100)
+
+    assert len(issues) == 250
+    assert issues['ABC-1'] == JiraIssue('ABC-1', 'Summary 1', 'Done', ('1.0',))
+    assert issues['ABC-2'].fix_versions == ()
+    assert sorted(searched_keys(jira)) == [50, 100, 100]
+    assert client.calls == 3
+
+
+def test_large_batches_are_paged_with_start_at(jira, cache):
+    client = JiraClient(jira.base_url, 'user', 'token')
+
+    issues = enrich_tickets([f'ABC-{number}' for number in range(1, 151)], client, cache, batch_size=150)
+
+    # Jira returns at most 100 issues per page
+    assert len(issues) == 150
+    assert client.calls == 2
+
+
+def test_unknown_keys_are_left_out_and_not_searched_again(jira, cache):
+    client = JiraClient(jira.base_url, 'user', 'token')
+
+    issues = enrich_tickets(['ABC-1', 'NOPE-1'], client, cache)
+    assert set(issues) == {'ABC-1'}
+
+    assert enrich_tickets(['ABC-1', 'NOPE-1'], client, cache) == issues
+    assert client.calls == 1
+
+
+def test_cache_answers_repeat_lookups_until_entries_expire(jira, tmp_path):
+    client = JiraClient(jira.base_url, 'user', 'token')
+    path = str(tmp_path / 'jira.db')
+    keys = ['ABC-1', 'ABC-2', 'ABC-3']
+    with JiraIssueCache(path) as cache:
+        enrich_tickets(keys, client, cache)
+    with JiraIssueCache(path) as cache:
+        assert enrich_tickets(keys + ['ABC-4'], client, cache)['ABC-3'].summary == 'Summary 3'
+    assert searched_keys(jira) == [3, 1]
+
+    with JiraIssueCache(path, ttl=-1) as expired:
+        enrich_tickets(keys, client, expired)
+    assert searched_keys(jira) == [3, 1, 3]
+
+
+def test_failed_batch_is_reported_and_left_out(jira, cache, monkeypatch, capsys):
+    client = JiraClient(jira.base_url, 'user', 'token')
+    search_issues = client.search_issues
+
+    def failing_search(keys):
+        if 'ABC-1' in keys:
+            raise RuntimeError('boom')
+        return search_issues(keys)
+
+    monkeypatch.setattr(client, 'search_issues', failing_search)
+    keys = sorted(f'ABC-{number}' for number in range(1, 11))
+    issues = enrich_tickets(keys, client, cache, batch_size=5)
+
+    # The first batch of five sorted keys holds ABC-1
+    assert sorted(issues) == keys[5:]
+    assert 'Jira lookup failed for 5 tickets' in capsys.readouterr().out
+
+
+def test_enrichment_is_off_without_jira_base_url(monkeypatch):
+    monkeypatch.delenv('JIRA_BASE_URL', raising=False)
+    assert enrich_tickets(['ABC-1']) == {}
+
+
+def test_concurrent_searches_are_all_counted(jira):
+    client = JiraClient(jira.base_url, 'user', 'token')
+
+    issues = enrich_tickets([f'ABC-{number}' for number in range(1, 201)], client, batch_size=1, max_workers=16)
+
+    assert len(issues) == 200
+    assert client.calls == len(jira.searches) == 200
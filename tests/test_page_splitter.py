@@ -0,0 +1,118 @@
+import pytest
+
+from confluence_publisher import PublishTarget, publish_page_tree
+from fake_confluence import FakeConfluence
+from page_splitter import SIZE_MARGIN, render_release_pages, split_release
+from release_model import Release, ReleaseItem, ReleasePage, ReleaseSection, TicketRef
+from templates.release_renderer import render_page, render_release
+
+FORMATS = ['storage', 'wiki', 'markdown']
+
+
+def make_release(features=300, fixes=40, tickets=200):
+    feature_items = [ReleaseItem(f'feat: feature number {number} with a longer description')
+                     for number in range(features)]
+    sections = [
+        ReleaseSection('new_features', 'New features', feature_items),
+        ReleaseSection('bug_fixes', 'Bug fixes',
+                       [ReleaseItem(f'fix: bug {number}', f'ABC-{number}') for number in range(fixes)]),
+        ReleaseSection('api_changes', 'API changes'),
+    ]
+    return Release('v2.0.0', 'Major', sections,
+                   [TicketRef(f'ABC-{number}', f'ticket-{number:04d}') for number in range(tickets)])
+
+
+def size(text):
+    return len(text.encode('utf-8'))
+
+
+def test_release_that_fits_is_not_split():
+    release = make_release(features=3, fixes=2, tickets=2)
+    content, children = render_release_pages(release, 'v2.0.0 Release Notes', 'storage', max_bytes=100000)
+    assert children == []
+    assert content == render_release(release)['storage']
+
+
+@pytest.mark.parametrize('output_format', FORMATS)
+def test_split_pages_fit_and_list_every_item_once(output_format):
+    release = make_release()
+    max_bytes = 8000
+    assert size(render_release(release, (output_format,))[output_format]) > max_bytes
+
+    content, children = render_release_pages(release, 'Notes', output_format, max_bytes)
+
+    assert size(content) <= max_bytes
+    assert all(size(child) <= max_bytes for _, child in children)
+    everything = content + ''.join(child for _, child in children)
+    for number in range(300):
+        assert everything.count(f'feature number {number} ') == 1
+    for number in range(200):
+        assert everything.count(f'ticket-{number:04d}') == 1
+
+
+def test_tickets_move_first_and_parent_names_its_children():
+    release = make_release(features=5, fixes=5, tickets=60)
+    # Just too large, and the ticket list alone is more than the overshoot
+    max_bytes = size(render_release(release)['storage']) - 100
+    parent, pages = split_release(release, 'Notes', 'storage', max_bytes)
+
+    assert [page.title for page in pages] == ['Notes - Jira Tickets']
+    assert parent.tickets == []
+    assert "'Notes - Jira Tickets'" in parent.tickets_empty_text
+    # The change sections and deployment sections stay on the release page
+    assert [len(section.items) for section in parent.sections] == [5, 5, 0]
+    assert 'Rollback Steps' in render_release(parent)['storage']
+
+
+def test_oversized_section_is_spread_over_numbered_parts():
+    release = make_release(features=600, fixes=0, tickets=0)
+    parent, pages = split_release(release, 'Notes', 'storage', 10000)
+
+    titles = [page.title for page in pages]
+    assert len(titles) > 1
+    assert titles[0] == f'Notes - New features (1 of {len(titles)})'
+    assert sum(len(page.sections[0].items) for page in pages) == 600
+    [placeholder] = parent.sections[0].items
+    assert placeholder.text.startswith('600 changes, listed on ')
+
+
+def test_child_pages_are_published_under_the_release_page(repo, monkeypatch):
+    monkeypatch.setenv('CONFLUENCE_RATE_LIMIT', '0')
+    monkeypatch.setenv('RELEASE_NOTES_NO_CACHE', '1')
+    content, children = render_release_pages(make_release(), 'Split Notes', 'storage', 8000)
+
+    with FakeConfluence() as fake:
+        monkeypatch.setenv('CONFLUENCE_BASE_URL', fake.base_url)
+        monkeypatch.setenv('CONFLUENCE_API_USER', 'user')
+        monkeypatch.setenv('CONFLUENCE_API_TOKEN', 'token')
+        parent = PublishTarget('SPACE', '1', 'Split Notes', content)
+        results = publish_page_tree([parent], children, 'storage')
+
+    assert all(result.error is None for result in results)
+    pages = {page['title']: page for page in fake.pages.values()}
+    parent_id = pages['Split Notes']['id']
+    assert pages['Split Notes']['ancestors'] == [{'id': '1'}]
+    for title, _ in children:
+        assert pages[title]['ancestors'] == [{'id': parent_id}]
+
+
+@pytest.mark.parametrize('output_format', FORMATS)
+def test_parts_are_filled_by_size_not_item_count(output_format):
+    # Long items first, so equal item counts per part would overflow the first parts
+    items = [ReleaseItem('feat: ' + 'long description ' * 60) for _ in range(30)]
+    items += [ReleaseItem(f'feat: short {number}') for number in range(600)]
+    release = Release('v2.0.0', 'Major', [ReleaseSection('new_features', 'New features', items)], [])
+    max_bytes = 10000
+
+    parent, pages = split_release(release, 'Notes', output_format, max_bytes)
+
+    assert [item for page in pages for item in page.sections[0].items] == items
+    sizes = [size(render_page(page, (output_format,))[output_format]) for page in pages]
+    assert all(part <= max_bytes for part in sizes)
+    # Every part but the last is full: the next item would not have fitted,
+    # measured like the splitter under the longest part title
+    for page, following in zip(pages, pages[1:]):
+        section = page.sections[0]
+        fuller = ReleasePage('Notes - New features (630 of 630)', [ReleaseSection(
+            section.key, section.title, section.items + following.sections[0].items[:1])])
+        assert size(render_page(fuller, (output_format,))[output_format]) > max_bytes * SIZE_MARGIN
@@ -0,0 +1,71 @@
+import patch_ids
+from git_log_reader import iter_git_log
+from patch_ids import dedupe_commits, get_patch_ids
+from release_cache import PatchIdCache
+from release_notes_generator import get_git_commits
+
+
+def backported_history(repo):
+    """A change on main and the same change, retitled, merged in from a release branch."""
+    repo.commit('chore: base', {'app.py': 'base\n'})
+    repo.tag('v1.0.0')
+    repo.git('checkout', '-q', '-b', 'release')
+    repo.commit('fix: [ABC-1] backport null check', {'app.py': 'base\nnull check\n'})
+    repo.git('checkout', '-q', 'main')
+    repo.commit('fix: ABC-1 null check', {'app.py': 'base\nnull check\n'})
+    repo.commit('feat: same subject', {'a.txt': 'a\n'})
+    repo.commit('feat: same subject', {'b.txt': 'b\n'})
+    repo.git('merge', '-q', '--no-ff', '-m', 'Merge release', 'release')
+    repo.tag('v1.1.0')
+
+
+def test_backport_with_an_edited_subject_is_dropped(repo):
+    backported_history(repo)
+    commits = list(iter_git_log('v1.0.0..v1.1.0'))
+
+    unique = dedupe_commits(commits)
+
+    subjects = [commit.subject for commit in unique]
+    assert len(commits) == 5
+    assert len(unique) == 4
+    assert sum('null check' in subject for subject in subjects) == 1
+
+
+def test_distinct_commits_sharing_a_subject_and_merges_are_kept(repo):
+    backported_history(repo)
+
+    subjects = [commit.subject for commit in dedupe_commits(iter_git_log('v1.0.0..v1.1.0'))]
+
+    assert subjects.count('feat: same subject') == 2
+    assert 'Merge release' in subjects
+
+
+def test_get_git_commits_lists_each_change_once(repo):
+    backported_history(repo)
+
+    subjects = [commit.subject for commit in get_git_commits('v1.0.0', 'v1.1.0')]
+
+    assert len(subjects) == 4
+    assert sum('null check' in subject for subject in subjects) == 1
+
+
+def test_patch_ids_are_computed_once_and_cached(repo, tmp_path, monkeypatch):
+    backported_history(repo)
+    shas = [commit.sha for commit in iter_git_log('v1.0.0..v1.1.0')]
+    computed = []
+    compute = patch_ids.compute_patch_ids
+
+    def recording_compute(missing, cwd=None):
+        computed.append(list(missing))
+        return compute(missing, cwd)
+
+    monkeypatch.setattr(patch_ids, 'compute_patch_ids', recording_compute)
+
+    with PatchIdCache(str(tmp_path / 'patch-ids.db')) as cache:
+        first = get_patch_ids(shas, cache)
+        second = get_patch_ids(shas, cache)
+
+    assert first == second
+    assert computed == [shas, []]
+    # Merges have no diff of their own
+    assert sorted(bool(patch_id) for patch_id in first.values()) == [False, True, True, True, True]
@@ -0,0 +1,117 @@
+import sqlite3
+
+import pytest
+
+import release_cache
+from release_cache import (
+    ClassificationCache,
+    JiraIssueCache,
+    PageCache,
+    PatchIdCache,
+    SegmentStore,
+    WatermarkStore,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(release_cache, 'time', fake)
+    return fake
+
+
+def entries(*shas):
+    return [(sha, 'feature', f'change {sha}', None) for sha in shas]
+
+
+def stored(path):
+    with sqlite3.connect(path) as connection:
+        return {row[0] for row in connection.execute('SELECT sha FROM classifications')}
+
+
+def test_rewriting_cached_shas_does_not_trigger_eviction(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    with ClassificationCache(path, 'rules', max_entries=10) as cache:
+        cache.put_many(entries(*'abcdefgh'))
+        for _ in range(3):
+            cache.put_many(entries(*'abcdefgh'))
+
+        assert cache._entries <= 10
+    assert stored(path) == set('abcdefgh')
+
+
+def test_eviction_trims_least_recently_used_below_the_limit(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    with ClassificationCache(path, 'rules', max_entries=10) as cache:
+        for sha in 'abcdefgh':
+            cache.put_many(entries(sha))
+        cache.get_many(['a', 'b'])
+        cache.put_many(entries(*'ijklm'))
+
+        assert cache._entries == 9
+    assert stored(path) == set('abijklm') | {'g', 'h'}
+
+
+def test_entry_count_survives_reopening(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    with ClassificationCache(path, 'rules', max_entries=10) as cache:
+        cache.put_many(entries(*'abcdef'))
+    with ClassificationCache(path, 'rules', max_entries=10) as cache:
+        assert cache._entries == 6
+        cache.put_many(entries(*'abcdef'))
+        cache.put_many(entries('g'))
+    assert len(stored(path)) == 7
+
+
+def test_changed_rules_hash_misses_old_entries(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    with ClassificationCache(path, 'old-rules') as cache:
+        cache.put_many(entries('a', 'b'))
+        assert cache.get_many(['a', 'b', 'c']) == {sha: ('feature', f'change {sha}', None) for sha in 'ab'}
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    with ClassificationCache(path, 'new-rules') as cache:
+        assert cache.get_many(['a', 'b']) == {}
+        assert cache.misses == 2
+    with SegmentStore(path, 'old-rules') as segments:
+        segments.put('a', 'b', {'commits': 1})
+    with SegmentStore(path, 'new-rules') as segments:
+        assert segments.get('a', 'b') is None
+
+
+@pytest.mark.parametrize('store', [
+    lambda path: ClassificationCache(path, 'rules'),
+    lambda path: SegmentStore(path, 'rules'),
+    lambda path: WatermarkStore(path, 'rules'),
+    PatchIdCache,
+    PageCache,
+    JiraIssueCache,
+])
+def test_stores_without_a_path_are_disabled(store, tmp_path):
+    with store(None) as disabled:
+        assert not disabled.enabled
+    with store(str(tmp_path / 'cache.sqlite3')) as enabled:
+        assert enabled.enabled
+    assert not enabled.enabled
+
+
+def test_failing_database_disables_the_store_with_one_warning(tmp_path, capsys):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = PageCache(path)
+    cache.put('https://wiki', 'REL', 'v1.0.0 Release Notes', 1, 1)
+    with sqlite3.connect(path) as connection:
+        connection.execute('DROP TABLE confluence_pages')
+
+    assert cache.get('https://wiki', 'REL', 'v1.0.0 Release Notes') is None
+    assert cache.get('https://wiki', 'REL', 'v1.0.0 Release Notes') is None
+    assert not cache.enabled
+    assert capsys.readouterr().out.count('Confluence page cache disabled') == 1
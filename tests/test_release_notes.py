@@ -0,0 +1,74 @@
+import sys
+
+import pytest
+
+import release_notes
+from release_notes_generator import generate_release
+
+
+@pytest.fixture
+def history(repo, monkeypatch):
+    monkeypatch.setenv('RELEASE_NOTES_NO_CACHE', '1')
+    monkeypatch.delenv('PAGE_TITLE', raising=False)
+    repo.commit('feat: ABC-1 initial release')
+    repo.tag('v1.0.0')
+    repo.commit('feat: ABC-2 search box')
+    repo.commit('fix: ABC-3 search paging')
+    repo.tag('v1.1.0')
+    return repo
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['release_notes.py', '--from-tag', 'v1.0.0', '--to-tag', 'v1.1.0', *args])
+    release_notes.main()
+
+
+def test_dry_run_prints_the_page_without_jira(history, monkeypatch, capsys):
+    # Nothing listens here, so any Jira request would fail the run
+    monkeypatch.setenv('JIRA_BASE_URL', 'http://127.0.0.1:9')
+
+    run(monkeypatch, '--output', 'confluence', '--format', 'markdown', '--dry-run')
+
+    out, err = capsys.readouterr()
+    assert out.startswith('# v1.1.0 Release Notes')
+    assert 'search box' in out and 'search paging' in out
+    # Progress messages go to stderr, leaving stdout for the page
+    assert 'Dry run' in err and 'Dry run' not in out
+
+
+def test_stdout_is_the_default_backend(history, monkeypatch, capsys):
+    run(monkeypatch, '--title', 'Custom Title')
+
+    out, _ = capsys.readouterr()
+    expected = release_notes.build_page('v1.0.0', 'v1.1.0', 'Custom Title', 'storage')
+    assert out == expected.content
+
+
+def test_file_backend_writes_the_page_and_its_children(history, monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv('CONFLUENCE_MAX_PAGE_BYTES', '600')
+    destination = tmp_path / 'notes'
+
+    run(monkeypatch, '--output', 'file', '--format', 'wiki', '--destination', str(destination))
+
+    page = release_notes.build_page('v1.0.0', 'v1.1.0', 'v1.1.0 Release Notes', 'wiki')
+    assert page.children
+    files = {path.name: path.read_text(encoding='utf-8') for path in destination.iterdir()}
+    assert files == {f'{title}.wiki': content for title, content in [(page.title, page.content), *page.children]}
+    assert 'Wrote' in capsys.readouterr().out
+
+
+def test_unknown_tag_exits(history, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['release_notes.py', '--from-tag', 'v0.9.0', '--to-tag', 'v1.1.0'])
+
+    with pytest.raises(SystemExit):
+        release_notes.main()
+    assert "Tag 'v0.9.0' not found" in capsys.readouterr().err
+
+
+def test_generator_needs_no_jira_client_without_jira_base_url(history, monkeypatch):
+    # Importing jira_client would pull in requests
+    monkeypatch.setitem(sys.modules, 'jira_client', None)
+
+    release = generate_release('v1.0.0', 'v1.1.0')
+
+    assert release.item_count() == 2
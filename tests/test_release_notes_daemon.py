@@ -0,0 +1,251 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import release_notes_daemon
+from conftest import GitRepo
+from fake_confluence import FakeConfluence
+from fake_github import FakeGitHub
+from release_notes_daemon import (
+    ReleaseNotesService,
+    WebhookServer,
+    load_repositories,
+    signature_valid,
+    tag_from_event,
+)
+
+
+def wait_until_idle(service, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not service.idle():
+        assert time.monotonic() < deadline, f"jobs still running: {service.status()}"
+        time.sleep(0.02)
+
+
+class StubJobs:
+    """Stands in for publish_tag, recording which jobs overlap.
+
+    A job for a tag passed to hold() waits until release(tag) is called.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = set()
+        self.overlaps = []
+        self.finished = []
+        self.held = {}
+
+    def hold(self, *tags):
+        for tag in tags:
+            self.held[tag] = threading.Event()
+
+    def release(self, tag):
+        self.held[tag].set()
+
+    def __call__(self, path, tag, settings):
+        with self.lock:
+            self.running.add((path, tag))
+            self.overlaps.append(set(self.running))
+        if tag in self.held:
+            assert self.held[tag].wait(30)
+        with self.lock:
+            self.running.discard((path, tag))
+            self.finished.append((path, tag, settings['PAGE_TITLE']))
+        if tag == 'v9.9.9':
+            raise ValueError(f"Tag '{tag}' not found in {path}")
+        return 'v1.0.0', 'Stages: none'
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    stub = StubJobs()
+    monkeypatch.setattr(release_notes_daemon, 'publish_tag', stub)
+    return stub
+
+
+@pytest.fixture
+def service(jobs):
+    repositories = {'org/api': {'path': '/srv/api'}, 'org/web': {'path': '/srv/web', 'space_key': 'WEB'}}
+    notes = ReleaseNotesService(repositories, max_workers=1, max_pending=3, title_format='{repository} {tag}')
+    # Jobs run on threads here so the stub can be patched in
+    notes.pool.shutdown()
+    notes.pool = ThreadPoolExecutor(max_workers=4)
+    yield notes
+    for event in jobs.held.values():
+        event.set()
+    notes.close()
+
+
+@pytest.fixture
+def github(service):
+    with WebhookServer(service, port=0, secret='s3cret') as webhook:
+        yield FakeGitHub(f'{webhook.base_url}/webhook', secret='s3cret')
+
+
+def test_tag_pushes_and_creates_are_recognised():
+    assert tag_from_event('push', {'ref': 'refs/tags/v1.2.0'}) == 'v1.2.0'
+    assert tag_from_event('push', {'ref': 'refs/tags/v1.2.0', 'deleted': True}) is None
+    assert tag_from_event('push', {'ref': 'refs/heads/main'}) is None
+    assert tag_from_event('create', {'ref': 'v1.2.0', 'ref_type': 'tag'}) == 'v1.2.0'
+    assert tag_from_event('create', {'ref': 'feature', 'ref_type': 'branch'}) is None
+    assert tag_from_event('issues', {'ref': 'refs/tags/v1.2.0'}) is None
+
+
+def test_signatures_use_hmac_sha256():
+    body = b'{"zen": "Keep it simple"}'
+    assert not signature_valid('s3cret', body, None)
+    assert not signature_valid('s3cret', body, 'sha256=' + '0' * 64)
+    assert signature_valid('s3cret', body, 'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest())
+
+
+def test_repositories_file_paths_are_relative_to_it(tmp_path):
+    config = tmp_path / 'repos.json'
+    config.write_text(json.dumps({'org/api': 'api', 'org/web': {'path': '../web', 'space_key': 'WEB'}}))
+
+    repositories = load_repositories(str(config), ['org/cli=/srv/cli'])
+
+    assert repositories == {
+        'org/api': {'path': str(tmp_path / 'api')},
+        'org/web': {'path': str(tmp_path.parent / 'web'), 'space_key': 'WEB'},
+        'org/cli': {'path': '/srv/cli'},
+    }
+    with pytest.raises(ValueError):
+        load_repositories(None, ['no-path'])
+
+
+def test_pushed_release_tag_is_queued_and_published(github, service, jobs):
+    status, reply = github.push_tag('org/api', 'v1.1.0')
+    wait_until_idle(service)
+
+    assert status == 202
+    assert reply == {'status': 'queued', 'repository': 'org/api', 'tag': 'v1.1.0'}
+    assert jobs.finished == [('/srv/api', 'v1.1.0', 'org/api v1.1.0')]
+    assert service.status()['recent'][0]['status'] == 'published'
+
+
+def test_create_event_is_accepted_too(github, service, jobs):
+    assert github.push_tag('org/web', 'v2.0.0', event='create')[0] == 202
+    wait_until_idle(service)
+    assert jobs.finished == [('/srv/web', 'v2.0.0', 'org/web v2.0.0')]
+
+
+def test_redelivered_tag_is_not_queued_twice(github, service, jobs):
+    jobs.hold('v1.1.0')
+    assert github.push_tag('org/api', 'v1.1.0')[0] == 202
+    status, reply = github.push_tag('org/api', 'v1.1.0')
+    jobs.release('v1.1.0')
+    wait_until_idle(service)
+
+    assert (status, reply['status']) == (200, 'duplicate')
+    assert len(jobs.finished) == 1
+
+
+def test_unknown_repositories_and_other_refs(github, service, jobs):
+    assert github.push_tag('org/unknown', 'v1.0.0')[0] == 404
+    status, reply = github.push_tag('org/api', 'nightly')
+    assert (status, reply['status']) == (200, 'ignored')
+    branch = dict(github.push_payload('org/api', 'v1.0.0', '0' * 40), ref='refs/heads/main')
+    assert github.deliver('push', branch)[1]['status'] == 'ignored'
+    assert github.deliver('ping', {'zen': 'hello'}) == (200, {'status': 'pong'})
+    assert jobs.finished == []
+
+
+def test_unsigned_deliveries_are_rejected(github, service, jobs):
+    assert FakeGitHub(github.webhook_url, secret='wrong').push_tag('org/api', 'v1.1.0')[0] == 401
+    assert FakeGitHub(github.webhook_url).push_tag('org/api', 'v1.1.0')[0] == 401
+    assert jobs.finished == []
+
+
+def test_full_queue_answers_503(github, service, jobs):
+    jobs.hold('v1.0.0')
+    assert github.push_tag('org/api', 'v1.0.0')[0] == 202
+    for tag in ('v1.1.0', 'v1.2.0', 'v1.3.0'):
+        assert github.push_tag('org/api', tag)[0] == 202
+
+    assert github.push_tag('org/api', 'v1.4.0')[0] == 503
+    assert service.status()['queued'] == {'org/api': ['v1.1.0', 'v1.2.0', 'v1.3.0']}
+    jobs.release('v1.0.0')
+    wait_until_idle(service)
+
+
+def test_tags_of_one_repository_run_one_at_a_time_in_push_order(github, service, jobs):
+    jobs.hold('v1.0.0', 'v2.0.0')
+    for repository, tag in [('org/api', 'v1.0.0'), ('org/api', 'v1.1.0'), ('org/web', 'v2.0.0')]:
+        assert github.push_tag(repository, tag)[0] == 202
+
+    # The other repository runs alongside, the second api tag waits
+    status = service.status()
+    assert status['running'] == {'org/api': 'v1.0.0', 'org/web': 'v2.0.0'}
+    assert status['queued'] == {'org/api': ['v1.1.0']}
+    jobs.release('v1.0.0')
+    jobs.release('v2.0.0')
+    wait_until_idle(service)
+
+    api_tags = [tag for path, tag, _ in jobs.finished if path == '/srv/api']
+    assert api_tags == ['v1.0.0', 'v1.1.0']
+    for running in jobs.overlaps:
+        assert len([path for path, _ in running if path == '/srv/api']) <= 1
+    assert any(len(running) == 2 for running in jobs.overlaps)
+
+
+def test_failed_job_is_reported_and_the_next_tag_still_runs(github, service, jobs, capsys):
+    jobs.hold('v9.9.9')
+    github.push_tag('org/api', 'v9.9.9')
+    github.push_tag('org/api', 'v1.0.0')
+    jobs.release('v9.9.9')
+    wait_until_idle(service)
+
+    recent = service.status()['recent']
+    assert [(job['tag'], job['status']) for job in recent] == [('v9.9.9', 'failed'), ('v1.0.0', 'published')]
+    assert "not found" in recent[0]['error']
+    assert '❌ org/api v9.9.9 failed' in capsys.readouterr().out
+
+
+def test_new_tags_are_published_by_worker_processes(repo, tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFLUENCE_RATE_LIMIT', '0')
+    monkeypatch.setenv('SPACE_KEY', 'REL')
+    monkeypatch.setenv('ANCESTOR_ID', '1')
+    (tmp_path / 'web').mkdir()
+    for name, clone in [('api', repo), ('web', GitRepo(tmp_path / 'web'))]:
+        clone.commit('feat: ABC-1 first release')
+        clone.tag('v1.0.0')
+        clone.commit(f'feat: ABC-2 {name} search')
+        clone.tag('v1.1.0')
+        clone.commit(f'fix: ABC-3 {name} crash')
+        clone.tag('v1.2.0')
+    config = tmp_path / 'repos.json'
+    config.write_text(json.dumps({'org/api': 'repo', 'org/web': {'path': 'web', 'space_key': 'WEB'}}))
+
+    with FakeConfluence() as confluence:
+        monkeypatch.setenv('CONFLUENCE_BASE_URL', confluence.base_url)
+        monkeypatch.setenv('CONFLUENCE_API_USER', 'user')
+        monkeypatch.setenv('CONFLUENCE_API_TOKEN', 'token')
+        service = ReleaseNotesService(load_repositories(str(config)), max_workers=2)
+        try:
+            with WebhookServer(service, port=0) as webhook:
+                github = FakeGitHub(f'{webhook.base_url}/webhook')
+                for repository in ('org/api', 'org/web'):
+                    assert github.push_tag(repository, 'v1.1.0')[0] == 202
+                    assert github.push_tag(repository, 'v1.2.0')[0] == 202
+                wait_until_idle(service, timeout=120)
+                recent = service.status()['recent']
+        finally:
+            service.close()
+        pages = {(page['space']['key'], page['title']): page for page in confluence.pages.values()}
+
+    assert sorted((job['repository'], job['from_tag'], job['tag'], job['status']) for job in recent) == [
+        ('org/api', 'v1.0.0', 'v1.1.0', 'published'),
+        ('org/api', 'v1.1.0', 'v1.2.0', 'published'),
+        ('org/web', 'v1.0.0', 'v1.1.0', 'published'),
+        ('org/web', 'v1.1.0', 'v1.2.0', 'published'),
+    ]
+    assert set(pages) == {('REL', 'v1.1.0 Release Notes'), ('REL', 'v1.2.0 Release Notes'),
+                          ('WEB', 'v1.1.0 Release Notes'), ('WEB', 'v1.2.0 Release Notes')}
+    notes = pages[('WEB', 'v1.2.0 Release Notes')]['body']['storage']['value']
+    assert 'web crash' in notes
+    assert 'web search' not in notes
@@ -0,0 +1,133 @@
+import html
+import json
+import re
+
+import pytest
+
+from release_model import Release, ReleaseItem, ReleaseSection, TicketRef
+from templates.release_renderer import WRITERS, render_release
+
+TRICKY_TEXTS = [
+    'Escape <script> & "quotes"',
+    'Pipes | and [brackets] and {braces}',
+    '* starts like a list item',
+    '# starts like a numbered item',
+    '- starts like a dash item',
+    'h2. starts like a heading',
+    '1. starts like an ordered item',
+    r'back\slash and *bold* and _italic_',
+]
+
+UNESCAPE_RE = re.compile(r'\\(.)')
+
+
+def tricky_release():
+    return Release(
+        'v1.2.0', 'Minor',
+        [
+            ReleaseSection('new_features', 'New features', [ReleaseItem(text) for text in TRICKY_TEXTS],
+                           link_label=None),
+            ReleaseSection('bug_fixes', 'Bug fixes', [ReleaseItem('fix: <b> & co', 'ABC-1')]),
+            ReleaseSection('api_changes', 'API changes'),
+        ],
+        tickets=[TicketRef('ABC-1', 'Null | check <here>')],
+        major_rollback_steps='* Detailed rollback steps for major version change',
+    )
+
+
+def storage_items(page):
+    items = re.findall(r'<li>(.*?)</li>', page)
+    return [html.unescape(item.split('<br/>')[0]) for item in items]
+
+
+def wiki_items(page):
+    items = [line[2:] for line in page.splitlines() if line.startswith('* ')]
+    return [UNESCAPE_RE.sub(r'\1', item.split(' \\\\ ')[0]) for item in items]
+
+
+def markdown_items(page):
+    items = [line[2:] for line in page.splitlines() if line.startswith('- ')]
+    return [UNESCAPE_RE.sub(r'\1', re.sub(r' \(\[ABC-1\]\(.*\)\)$', '', item)) for item in items]
+
+
+def json_items(page):
+    document = json.loads(page)
+    return [item['text'] for section in document['sections'] for item in section['items']]
+
+
+@pytest.fixture(scope='module')
+def pages():
+    return render_release(tricky_release(), tuple(WRITERS))
+
+
+@pytest.mark.parametrize('output_format, items', [
+    ('storage', storage_items),
+    ('wiki', wiki_items),
+    ('markdown', markdown_items),
+    ('json', json_items),
+])
+def test_every_format_lists_the_same_items(pages, output_format, items):
+    expected = TRICKY_TEXTS + ['fix: <b> & co']
+    if output_format == 'json':
+        assert items(pages[output_format]) == expected
+    else:
+        # The ticket list follows the change items
+        assert items(pages[output_format])[:len(expected)] == expected
+
+
+def test_rendering_formats_together_matches_rendering_each_alone():
+    together = render_release(tricky_release(), tuple(WRITERS))
+    for name in WRITERS:
+        assert render_release(tricky_release(), (name,))[name] == together[name]
+
+
+def test_wiki_line_start_markers_are_escaped(pages):
+    wiki = pages['wiki']
+    assert '\n\\* Detailed rollback steps for major version change\n' in wiki
+    assert '* \\* starts like a list item\n' in wiki
+    assert '* \\# starts like a numbered item\n' in wiki
+    assert '* \\- starts like a dash item\n' in wiki
+    assert '* h2\\. starts like a heading\n' in wiki
+    assert '* Pipes \\| and \\[brackets\\] and \\{braces\\}\n' in wiki
+    # Every line starting with a list marker is a real list item
+    assert all(line.startswith('* ') for line in wiki.splitlines() if line.startswith(('*', '#', '-')))
+    assert '[ABC-1|' in wiki
+    assert 'Null \\| check <here>' in wiki
+
+
+def test_markdown_line_start_markers_are_escaped(pages):
+    markdown = pages['markdown']
+    assert '- \\- starts like a dash item\n' in markdown
+    assert '- 1\\. starts like an ordered item\n' in markdown
+    assert '- Escape \\<script\\> & "quotes"\n' in markdown
+    assert '\\* Detailed rollback steps' in markdown
+
+
+def test_storage_escapes_markup(pages):
+    storage = pages['storage']
+    assert '<li>Escape &lt;script&gt; &amp; "quotes"</li>' in storage
+    assert '<p>* Detailed rollback steps for major version change</p>' in storage
+    assert 'Null | check &lt;here&gt;' in storage
+    assert '<script>' not in storage
+
+
+def test_json_is_a_complete_document(pages):
+    document = json.loads(pages['json'])
+
+    assert document['version'] == 'v1.2.0'
+    assert [section['key'] for section in document['sections']] == ['new_features', 'bug_fixes', 'api_changes']
+    assert document['deployment']['Rollback Steps for Major Release'].startswith('* Detailed')
+    assert document['tickets'] == [{'key': 'ABC-1', 'description': 'Null | check <here>', 'summary': '',
+                                    'status': '', 'fix_versions': []}]
+
+
+def test_multi_line_text_stays_in_one_item():
+    release = Release('v1.0.0', 'Patch', [ReleaseSection('bug_fixes', 'Bug fixes', [
+        ReleaseItem('first line\n- second line')
+    ])])
+
+    pages = render_release(release, ('storage', 'wiki', 'markdown'))
+
+    assert '<li>first line<br/>- second line' in pages['storage']
+    assert '* first line \\\\ \\- second line\n' in pages['wiki']
+    assert '- first line  \n  \\- second line\n' in pages['markdown']
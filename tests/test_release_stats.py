@@ -0,0 +1,148 @@
+import json
+import random
+
+import pytest
+
+from generate_release_notes import make_segment_snapshot, merge_segment_snapshots
+from git_log_reader import CommitRecord, FileStat, iter_git_log
+from release_stats import EXACT_DISTINCT_LIMIT, DistinctCounter, ReleaseStats, SpaceSaving, directory_of
+
+
+def stream(commits):
+    """Synthetic (CommitRecord, [FileStat]) pairs, as iter_git_log(with_numstat=True) yields them."""
+    rng = random.Random(7)
+    for number in range(commits):
+        author = f'author-{min(int(rng.expovariate(0.3)), 40)}'
+        files = [FileStat(rng.randrange(50), rng.randrange(20), f'dir{rng.randrange(12)}/sub{rng.randrange(3)}/'
+                          f'file{rng.randrange(300)}.py') for _ in range(rng.randrange(1, 4))]
+        yield CommitRecord(f'{number:040x}', author), files
+
+
+def test_numstat_totals_match_the_repository(repo):
+    repo.commit('base', {'src/app.py': 'a\nb\nc\n', 'logo.png': b'\x00\x01', 'README.md': 'hi\n'})
+    repo.tag('v1.0.0')
+    repo.commit('feat: two files', {'src/api/v1.py': '1\n2\n3\n4\n', 'docs/guide.md': 'x\ny\n'})
+    repo.git('mv', 'src/app.py', 'src/main.py')
+    repo.commit('feat: rename and binary', {'src/main.py': 'a\nb\nC\nd\n', 'logo.png': b'\x00\x02'},
+                author='Other Author')
+    repo.commit('fix: shorter readme', {'README.md': ''})
+    repo.commit('chore: add notes', {'notes.txt': 'n\n'})
+    repo.tag('v1.1.0')
+    stats = ReleaseStats()
+
+    subjects = [commit.subject for commit in stats.track(iter_git_log('v1.0.0..v1.1.0', with_numstat=True))]
+
+    assert len(subjects) == stats.commits == 4
+    # 'C' and 'd' replace 'c' in the renamed file, and the readme loses its line
+    assert (stats.added, stats.deleted) == (4 + 2 + 2 + 1, 1 + 1)
+    # The rename is counted under its new path, the binary file with no lines
+    assert stats.files.exact
+    assert sorted(stats.files.values) == [
+        'README.md', 'docs/guide.md', 'logo.png', 'notes.txt', 'src/api/v1.py', 'src/main.py']
+    assert len(stats.authors) == 2
+    assert stats.top_authors.top() == [('Test Author', 3), ('Other Author', 1)]
+    assert stats.top_directories.top() == [('src/api/', 4), ('(root)', 3), ('src/', 3), ('docs/', 2)]
+
+
+def test_directories_are_grouped_two_levels_deep():
+    assert directory_of('src/api/v1/routes.py') == 'src/api/'
+    assert directory_of('src/main.py') == 'src/'
+    assert directory_of('README.md') == '(root)'
+
+
+def test_distinct_counts_are_exact_up_to_the_limit():
+    counter = DistinctCounter()
+    for number in range(EXACT_DISTINCT_LIMIT):
+        counter.add(f'path/{number}')
+        counter.add(f'path/{number}')
+
+    assert counter.exact
+    assert len(counter) == EXACT_DISTINCT_LIMIT
+
+    counter.add('one/more')
+    assert not counter.exact
+    assert counter.values == set()
+    assert abs(len(counter) - (EXACT_DISTINCT_LIMIT + 1)) <= 0.02 * (EXACT_DISTINCT_LIMIT + 1)
+
+
+@pytest.mark.parametrize('distinct', [5000, 20000, 100000])
+def test_estimate_stays_within_two_percent(distinct):
+    counter = DistinctCounter()
+    for number in range(distinct):
+        counter.add(f'src/module{number % 97}/file{number}.py')
+        counter.add(f'src/module{number % 97}/file{number}.py')
+
+    assert not counter.exact
+    assert abs(len(counter) - distinct) <= 0.02 * distinct
+
+
+def test_merged_estimates_match_one_counter():
+    values = [f'author{number}@example.com' for number in range(12000)]
+    whole = DistinctCounter()
+    exact_part, first, second = DistinctCounter(), DistinctCounter(), DistinctCounter()
+    for value in values:
+        whole.add(value)
+    for value in values[:100]:
+        exact_part.add(value)
+    for value in values[:7000]:
+        first.add(value)
+    for value in values[5000:]:
+        second.add(value)
+
+    first.merge(second)
+    exact_part.merge(first)
+
+    assert first.registers == whole.registers
+    assert exact_part.registers == whole.registers
+
+
+def test_space_saving_is_exact_within_capacity():
+    summary = SpaceSaving(capacity=5)
+    for key, weight in [('a', 3), ('b', 1), ('c', 5), ('a', 2), ('d', 1), ('b', 1)]:
+        summary.add(key, weight)
+
+    assert summary.top() == [('a', 5), ('c', 5), ('b', 2), ('d', 1)]
+    assert summary.top(2) == [('a', 5), ('c', 5)]
+
+
+def test_space_saving_keeps_heavy_keys_and_bounds_the_overestimate():
+    rng = random.Random(11)
+    keys = [f'heavy{number}' for number in range(5) for _ in range(200)]
+    keys += [f'light{rng.randrange(500)}' for _ in range(2000)]
+    rng.shuffle(keys)
+    exact = {}
+    summary = SpaceSaving(capacity=20)
+    for key in keys:
+        exact[key] = exact.get(key, 0) + 1
+        summary.add(key)
+
+    assert len(summary.counts) == 20
+    assert sorted(key for key, _ in summary.top(5)) == [f'heavy{number}' for number in range(5)]
+    smallest = min(summary.counts.values())
+    for key, count in summary.counts.items():
+        assert exact[key] <= count <= exact[key] + smallest
+
+
+def test_merged_segment_snapshots_match_one_walk():
+    pairs = list(stream(6000))
+    whole = ReleaseStats()
+    for commit, files in pairs:
+        whole.add(commit, files)
+    snapshots = []
+    for start, end in [(0, 2500), (2500, 2600), (2600, 6000)]:
+        segment = ReleaseStats()
+        for commit, files in pairs[start:end]:
+            segment.add(commit, files)
+        # Stored as JSON in the segment store
+        snapshots.append(json.loads(json.dumps(make_segment_snapshot({}, set(), segment))))
+
+    merged = ReleaseStats()
+    merge_segment_snapshots(reversed(snapshots), merged)
+
+    assert (merged.commits, merged.added, merged.deleted) == (whole.commits, whole.added, whole.deleted)
+    assert len(merged.authors) == len(whole.authors)
+    # More distinct files than the exact limit: the merged estimate is the same sketch
+    assert not whole.files.exact
+    assert merged.files.registers == whole.files.registers
+    assert merged.top_authors.top() == whole.top_authors.top()
+    assert merged.top_directories.top() == whole.top_directories.top()
@@ -0,0 +1,27 @@
+from batch_release_notes import consecutive_ranges
+from tag_index import TagIndex, load_tag_index
+
+
+def test_versions_sort_numerically_with_prereleases_first():
+    index = TagIndex([(name, name, 0) for name in ['v1.10.0', 'v1.2.0', 'v1.2.0-rc1', 'v1.9.3']])
+    assert [name for name, _ in index.version_ordered()] == ['v1.2.0-rc1', 'v1.2.0', 'v1.9.3', 'v1.10.0']
+    assert index.previous_release('v1.10.0').name == 'v1.9.3'
+    assert index.previous_release('v1.2.0') is None
+
+
+def test_tags_without_a_version_follow_in_name_order():
+    index = TagIndex([(name, name, 0) for name in ['release-10', 'v2.0.0', 'release-2', 'nightly']])
+    assert [name for name, _ in index.version_ordered()] == ['v2.0.0', 'nightly', 'release-2', 'release-10']
+    assert consecutive_ranges(index.version_ordered(), 'release-*') == [('release-2', 'release-10')]
+
+
+def test_index_is_reloaded_when_tags_change(repo):
+    first = repo.commit('feat: one')
+    repo.tag('v1.0.0')
+    assert load_tag_index().sha('v1.0.0') == first
+
+    second = repo.commit('feat: two')
+    repo.tag('v1.1.0')
+    index = load_tag_index()
+    assert index.sha('v1.1.0') == second
+    assert [info.name for info in index.releases()] == ['v1.0.0', 'v1.1.0']